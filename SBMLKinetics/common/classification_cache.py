@@ -0,0 +1,114 @@
+'''Persistent cache of the classified reactions of SBML documents.'''
+
+import hashlib
+import os
+import sqlite3
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+  sha TEXT NOT NULL,
+  version TEXT NOT NULL,
+  ok INTEGER NOT NULL,
+  PRIMARY KEY (sha, version)
+);
+CREATE TABLE IF NOT EXISTS reactions (
+  sha TEXT NOT NULL,
+  version TEXT NOT NULL,
+  position INTEGER NOT NULL,
+  reaction_id TEXT,
+  classification INTEGER NOT NULL,
+  reaction TEXT,
+  kinetic_law TEXT,
+  num_rcts INTEGER NOT NULL,
+  num_prds INTEGER NOT NULL,
+  PRIMARY KEY (sha, version, position)
+);
+"""
+
+
+def hashContent(content):
+  """
+  SHA-256 of an SBML document.
+  :param str/bytes content:
+  :return str: hex digest
+  """
+  if isinstance(content, str):
+    content = content.encode("utf-8")
+  return hashlib.sha256(content).hexdigest()
+
+
+class ClassificationCache(object):
+  """
+  SQLite store of the classified reactions of SBML documents, keyed by the
+  SHA-256 of the document and the version of the classifier. The rows are
+  tuples in the field order of the reaction records of the classifier.
+  """
+
+  def __init__(self, path, version):
+    """
+    :param str path: path of the SQLite file, created if it does not exist
+    :param str version: version of the classifier; rows of other versions
+        are ignored
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(directory):
+      os.makedirs(directory)
+    self.path = path
+    self.version = str(version)
+    self._connection = sqlite3.connect(path)
+    self._connection.executescript(_SCHEMA)
+
+  def get(self, sha):
+    """
+    Classification of a document.
+    :param str sha: hash of the document
+    :return list-tuple/None: rows of the reactions, [] if no reactions;
+        None if the document has an error; raises KeyError if not cached
+    """
+    cursor = self._connection.execute(
+        "SELECT ok FROM models WHERE sha = ? AND version = ?",
+        (sha, self.version))
+    row = cursor.fetchone()
+    if row is None:
+      raise KeyError(sha)
+    if not row[0]:
+      return None
+    cursor = self._connection.execute(
+        "SELECT reaction_id, classification, reaction, kinetic_law, num_rcts, num_prds"
+        " FROM reactions WHERE sha = ? AND version = ? ORDER BY position",
+        (sha, self.version))
+    return cursor.fetchall()
+
+  def put(self, sha, rows):
+    """
+    Stores the classification of a document.
+    :param str sha: hash of the document
+    :param list-tuple/None rows: rows of the reactions, None if the
+        document has an error
+    """
+    with self._connection:
+      self._connection.execute(
+          "DELETE FROM reactions WHERE sha = ? AND version = ?", (sha, self.version))
+      self._connection.execute(
+          "INSERT OR REPLACE INTO models (sha, version, ok) VALUES (?, ?, ?)",
+          (sha, self.version, int(rows is not None)))
+      if rows is not None:
+        self._connection.executemany(
+            "INSERT INTO reactions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(sha, self.version, position) + tuple(row)
+            for position, row in enumerate(rows)])
+
+  def __len__(self):
+    cursor = self._connection.execute(
+        "SELECT COUNT(*) FROM models WHERE version = ?", (self.version,))
+    return cursor.fetchone()[0]
+
+  def close(self):
+    self._connection.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.close()
@@ -82,6 +82,16 @@ ReactionCategory = collections.namedtuple('ReactionCategory',
 ReactionComponents = collections.namedtuple('ReactionComponents',
     'label reactants products')
 
+# Kinds of the symbols of a kinetic law
+SYMBOL_SPECIES = "species"
+SYMBOL_PARAMETER = "parameter"
+SYMBOL_COMPARTMENT = "compartment"
+SYMBOL_FUNCTION = "function"
+SYMBOL_OTHER = "other"  # e.g. time or an undefined id
+# Kinds in decreasing order of precedence for an id shared by several kinds
+SYMBOL_TYPES = [SYMBOL_SPECIES, SYMBOL_PARAMETER, SYMBOL_COMPARTMENT,
+    SYMBOL_FUNCTION]
+
 # EmptySet in a reaction (ex. curated model 006)
 EMPTYSET = "EmptySet"
 
@@ -2,3 +2,8 @@
 
 class BadKineticsMath(Exception):
   pass
+
+class ClassificationTimeout(BaseException):
+  # Derived from BaseException, like KeyboardInterrupt, so that the
+  # "except Exception" handlers of sympy do not swallow it
+  pass
@@ -1,6 +1,7 @@
 """Representation of an SBML function defintion."""
 
 import libsbml
+import threading
 
 
 class FunctionDefinition():
@@ -30,6 +31,23 @@ class FunctionDefinition():
         self.id = fid
         self.argument_names = arguments
         self.body = body
+        self._body_ast = None
+
+    @property
+    def body_ast(self):
+        """
+        Parse tree of the body, compiled on first access.
+
+        Returns
+        -------
+        libsbml.ASTNode (None if the body cannot be parsed)
+        """
+        if self._body_ast is None:
+            if self.sbml_function_definition is not None:
+                self._body_ast = self.sbml_function_definition.getBody()
+            else:
+                self._body_ast = libsbml.parseL3Formula(self.body)
+        return self._body_ast
   
     def __repr__(self):
         argument_call = ",".join(self.argument_names)
@@ -54,3 +72,176 @@ class FunctionDefinition():
                arguments=["num"], body = "2.71828182**num"))
         #
         return functions
+
+
+class FunctionExpander():
+    """
+    Inlines the calls to function definitions in a libsbml parse tree.
+    An expander is created once per model and shared by its reactions.
+    The body of each definition is expanded once, and a call is replaced
+    by a copy of the expanded body in which the formal arguments are
+    substituted by the call arguments. Substitution is done on the tree,
+    so that ids containing the name of an argument are not altered.
+    An expander can be shared by threads.
+    """
+
+    def __init__(self, function_definitions):
+        """
+        Parameters
+        ----------
+        function_definitions: list-FunctionDefinition
+        """
+        self.function_definitions = function_definitions
+        self._definitions = {fd.id: fd for fd in function_definitions}
+        # Expanded bodies by id. None for a recursive definition.
+        self._templates = {}
+        # Ids of the bodies being expanded
+        self._expanding = set()
+        # Expansions by formula
+        self._expansions = {}
+        # Bodies are expanded by one thread at a time, since a body being
+        # expanded is marked in _expanding
+        self._lock = threading.RLock()
+
+    def expandFormula(self, formula):
+        """
+        Expands the calls to function definitions in a formula.
+        Expansions are memoized, so that the reactions of a model sharing
+        an expander expand a formula only once.
+
+        Parameters
+        ----------
+        formula: str
+            SBML Level 1 formula, as in libsbml.KineticLaw.getFormula
+
+        Returns
+        -------
+        str (the formula if it has no call to expand)
+        """
+        if len(self._definitions) == 0:
+            return formula
+        if formula not in self._expansions:
+            self._expansions[formula] = self._mkExpansion(formula)
+        return self._expansions[formula]
+
+    def _mkExpansion(self, formula):
+        ast = libsbml.parseFormula(formula)
+        if ast is None:
+            return formula
+        ast, is_changed = self._inline(ast)
+        if not is_changed:
+            return formula
+        return libsbml.formulaToString(ast)
+
+    def _getBodyAST(self, function_definition):
+        if isinstance(function_definition, FunctionDefinition):
+            return function_definition.body_ast
+        return libsbml.parseL3Formula(str(function_definition.body))
+
+    def _getTemplate(self, fid):
+        """
+        Finds the expanded body of a function definition.
+
+        Returns
+        -------
+        libsbml.ASTNode (None for a recursive definition)
+        """
+        with self._lock:
+            if fid in self._templates:
+                return self._templates[fid]
+            if fid in self._expanding:
+                # Recursive definition
+                return None
+            # The mark is removed even if the expansion is interrupted,
+            # e.g. by the timeout of a reaction, so that the body is
+            # expanded again by the next call
+            self._expanding.add(fid)
+            try:
+                body_ast = self._getBodyAST(self._definitions[fid])
+                template = None
+                if body_ast is not None:
+                    template, _ = self._inline(body_ast.deepCopy())
+            finally:
+                self._expanding.discard(fid)
+            self._templates[fid] = template
+            return template
+
+    def _isCall(self, node):
+        return (node.getType() == libsbml.AST_FUNCTION)  \
+              and (node.getName() in self._definitions)
+
+    @staticmethod
+    def _iterNodes(root):
+        """
+        Iterates across the nodes of a tree so that a node comes after
+        its descendants.
+
+        Returns
+        -------
+        (libsbml.ASTNode, int, libsbml.ASTNode): parent, index in the parent,
+            node. The parent of the root is None.
+        """
+        nodes = []
+        stack = [(None, 0, root)]
+        while len(stack) > 0:
+            parent, index, node = stack.pop()
+            nodes.append((parent, index, node))
+            for idx in range(node.getNumChildren()):
+                stack.append((node, idx, node.getChild(idx)))
+        return reversed(nodes)
+
+    def _inline(self, root):
+        """
+        Replaces in place the calls to function definitions by their body.
+
+        Parameters
+        ----------
+        root: libsbml.ASTNode
+
+        Returns
+        -------
+        libsbml.ASTNode: root of the expanded tree
+        bool: a call was replaced
+        """
+        is_changed = False
+        for parent, index, node in self._iterNodes(root):
+            if not self._isCall(node):
+                continue
+            instance = self._instantiate(node)
+            if instance is None:
+                continue
+            is_changed = True
+            if parent is None:
+                root = instance
+            else:
+                parent.replaceChild(index, instance, True)
+        return root, is_changed
+
+    def _instantiate(self, call):
+        """
+        Creates the expanded body of a function call, whose arguments are
+        already expanded.
+
+        Returns
+        -------
+        libsbml.ASTNode (None if the call cannot be expanded)
+        """
+        fid = call.getName()
+        template = self._getTemplate(fid)
+        argument_names = self._definitions[fid].argument_names
+        if (template is None)  \
+              or (len(argument_names) != call.getNumChildren()):
+            return None
+        arguments = {n: call.getChild(i)
+              for i, n in enumerate(argument_names)}
+        instance = template.deepCopy()
+        for parent, index, node in self._iterNodes(instance):
+            if (node.getType() != libsbml.AST_NAME)  \
+                  or (node.getName() not in arguments):
+                continue
+            argument = arguments[node.getName()].deepCopy()
+            if parent is None:
+                instance = argument
+            else:
+                parent.replaceChild(index, argument, True)
+        return instance
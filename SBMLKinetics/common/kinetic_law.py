@@ -8,44 +8,427 @@ from SBMLKinetics.common import constants as cn
 from SBMLKinetics.common import util
 from SBMLKinetics.common import exceptions
 from SBMLKinetics.common import msgs
+from SBMLKinetics.common.function_definition import FunctionExpander
 import sympy
 from sympy import symbols
 from sympy import core
 
+import builtins
 import collections #use set to compare two lists
+import keyword
+import libsbml
 import numpy as np
-import re # Extract substrings between brackets
 
-MAX_RECURSION = 5 # Maximum number for iteration function expansions
+_NOT_COMPUTED = object() # Value of a lazy attribute before its first access
+
+
+class KineticsContext(object):
+  """
+  Sympy expressions of the kinetic law of a reaction, shared by the classifiers.
+  The kinetics strings are parsed at most once, with a local symbol table
+  built from the ids of the reaction.
+  """
+
+  def __init__(self, kinetics=None, kinetics_sim=None, ids_list=None):
+    """
+    Parameters
+    -------
+    kinetics: string-kinetics
+    kinetics_sim: string-simplified kinetics
+    ids_list: list-id list including all the ids in kinetics, reactants and products
+    """
+    self.kinetics = kinetics
+    self.kinetics_sim = kinetics_sim
+    self.ids_list = [] if ids_list is None else ids_list
+    self._cache = {}
+
+  def _memoize(self, key, func):
+    if key not in self._cache:
+      self._cache[key] = func()
+    return self._cache[key]
+
+  @property
+  def namespace(self):
+    """
+    Namespace to evaluate the kinetics: a sympy symbol for each id and the builtins.
+    None if the ids cannot be symbols, i.e. no ids or a Python keyword.
+    """
+    def mkNamespace():
+      if len(self.ids_list) == 0:
+        return None
+      if any(keyword.iskeyword(id) or id == "__debug__" for id in self.ids_list):
+        return None
+      namespace = {id: sympy.Symbol(id) for id in self.ids_list}
+      namespace["__builtins__"] = builtins
+      return namespace
+    return self._memoize("namespace", mkNamespace)
+
+  def symbol(self, id):
+    """
+    Sympy symbol of an id.
+    """
+    namespace = self.namespace
+    if namespace is not None and id in self.ids_list:
+      return namespace[id]
+    return sympy.Symbol(id)
+
+  def _parse(self, formula):
+    """
+    Evaluates a kinetics string with the symbols of the ids.
+
+    Returns
+    -------
+    (bool-parsed, expression); parsed is False if there is a strange function 
+    (i.e. delay) or an id that is not in ids_list
+    """
+    namespace = self.namespace
+    if namespace is None:
+      return False, None
+    try:
+      return True, eval(formula, namespace)
+    except:
+      return False, None
+
+  @property
+  def expression(self):
+    """
+    (bool-parsed, expression) of the kinetics.
+    """
+    return self._memoize("expression", lambda: self._parse(self.kinetics))
+
+  @property
+  def simplified_expression(self):
+    """
+    (bool-parsed, expression) of the simplified kinetics.
+    """
+    return self._memoize("simplified_expression", lambda: self._parse(self.kinetics_sim))
+
+  @property
+  def sympy_simplified(self):
+    """
+    sympy.simplify of the expression of the kinetics.
+    """
+    return self._memoize("sympy_simplified", lambda: sympy.simplify(self.expression[1]))
+
+  @property
+  def numerator_denominator(self):
+    """
+    list-str of the numerator and the denominator of the simplified kinetics,
+    ['', ''] if it cannot be parsed.
+    """
+    def mkNumeratorDenominator():
+      eq = ['', '']
+      is_parsed, kinetics_eq = self.simplified_expression
+      if is_parsed:
+        try: 
+          numerator, denominator = kinetics_eq.as_numer_denom()
+          eq[0] = str(numerator)
+          eq[1] = str(denominator)
+        except:
+          pass
+      return eq
+    return self._memoize("numerator_denominator", mkNumeratorDenominator)
+
+  @property
+  def is_polynomial(self):
+    """
+    True if the simplified kinetics is a polynomial.
+    """
+    def mkIsPolynomial():
+      polynomial_flag = False
+      is_parsed, kinetics_eq = self.simplified_expression
+      if is_parsed:
+        try:
+          polynomial_flag = kinetics_eq.is_polynomial()
+        except:
+          pass
+      return polynomial_flag
+    return self._memoize("is_polynomial", mkIsPolynomial)
+
+def _isPower(stg):
+  """
+  Tests whether there is a power term in a string: **, "pow", but not "pow(,-1)"
+  """
+  return ("pow(" in stg and "-1)" not in stg) or "**" in stg
+
+
+class ReactionFeatures(object):
+  """
+  Features of a reaction shared by the classifiers. Each feature is computed
+  on its first access, at most once per reaction.
+  """
+  _LAZY_SLOTS = ("_numerator", "_denominator", "_terms", "_terms_sim",
+      "_species_in_denominator", "_is_power", "_is_single_product_of_terms")
+  __slots__ = ("kinetics", "kinetics_sim", "reactant_list", "product_list",
+      "species_in_kinetic_law", "ids_list", "_context") + _LAZY_SLOTS
+
+  def __init__(self, kinetics=None, kinetics_sim=None, reactant_list=None,
+      product_list=None, species_in_kinetic_law=None, ids_list=None, context=None):
+    """
+    Parameters
+    -------
+    kinetics: string-kinetics
+    kinetics_sim: string-simplified kinetics
+    reactant_list: list-reactants of the reaction
+    product_list: list-products of the reaction
+    species_in_kinetic_law: list-species in the kinetics
+    ids_list: list-id list including all the ids in kinetics, reactants and products
+    context: KineticsContext-expressions of the kinetics, optional
+    """
+    self.kinetics = kinetics
+    self.kinetics_sim = kinetics_sim
+    self.reactant_list = reactant_list
+    self.product_list = product_list
+    self.species_in_kinetic_law = species_in_kinetic_law
+    self.ids_list = ids_list
+    self._context = _NOT_COMPUTED if context is None else context
+    for slot in self._LAZY_SLOTS:
+      setattr(self, slot, _NOT_COMPUTED)
+
+  @classmethod
+  def fromKwargs(cls, kwargs):
+    """
+    Features of the keyword arguments of the classifiers.
+
+    Parameters
+    -------
+    kwargs: dictionary-keyword arguments of the classifiers
+
+    Returns
+    -------
+    ReactionFeatures
+    """
+    return cls(kinetics=kwargs.get("kinetics"), kinetics_sim=kwargs.get("kinetics_sim"),
+        reactant_list=kwargs.get("reactant_list"), product_list=kwargs.get("product_list"),
+        species_in_kinetic_law=kwargs.get("species_in_kinetic_law"),
+        ids_list=kwargs.get("ids_list"), context=kwargs.get("context"))
+
+  def _memoize(self, slot, func):
+    value = getattr(self, slot)
+    if value is _NOT_COMPUTED:
+      value = func()
+      setattr(self, slot, value)
+    return value
+
+  @property
+  def context(self):
+    """
+    KineticsContext-expressions of the kinetics.
+    """
+    return self._memoize("_context", lambda: KineticsContext(kinetics=self.kinetics,
+        kinetics_sim=self.kinetics_sim, ids_list=self.ids_list))
+
+  @property
+  def num_species(self):
+    return len(self.species_in_kinetic_law)
+
+  @property
+  def num_reactants(self):
+    return len(self.reactant_list)
+
+  @property
+  def num_products(self):
+    return len(self.product_list)
+
+  def _mkNumeratorDenominator(self):
+    self._numerator, self._denominator = self.context.numerator_denominator
+
+  @property
+  def numerator(self):
+    """
+    str-numerator of the simplified kinetics, '' if it cannot be parsed.
+    """
+    if self._numerator is _NOT_COMPUTED:
+      self._mkNumeratorDenominator()
+    return self._numerator
+
+  @property
+  def denominator(self):
+    """
+    str-denominator of the simplified kinetics, '' if it cannot be parsed.
+    """
+    if self._denominator is _NOT_COMPUTED:
+      self._mkNumeratorDenominator()
+    return self._denominator
+
+  @property
+  def terms(self):
+    """
+    list-str of the kinetics split at "-".
+    """
+    return self._memoize("_terms", lambda: self.kinetics.split("-"))
+
+  @property
+  def terms_sim(self):
+    """
+    list-str of the simplified kinetics split at "-".
+    """
+    return self._memoize("_terms_sim", lambda: self.kinetics_sim.split("-"))
+
+  @property
+  def species_in_denominator(self):
+    """
+    frozenset-species in the denominator of the simplified kinetics.
+    """
+    return self._memoize("_species_in_denominator", lambda: frozenset(
+        species for species in self.species_in_kinetic_law if species in self.denominator))
+
+  @property
+  def is_species_in_denominator(self):
+    return len(self.species_in_denominator) > 0
+
+  @property
+  def is_power(self):
+    """
+    True if there is a power term in the kinetics: **, "pow", but not "pow(,-1)".
+    """
+    return self._memoize("_is_power", lambda: _isPower(self.kinetics)
+        or "**" in self.kinetics_sim)
+
+  @property
+  def is_single_product_of_terms(self):
+    """
+    True if the kinetics is a single product of terms.
+    """
+    def mkIsSingleProductOfTerms():
+      kinetics = self.kinetics
+      kinetics_sim = self.kinetics_sim
+      flag = True
+      if "+" in kinetics or "-" in kinetics:
+        flag = False
+        if "e-" in kinetics or "exp(-" in kinetics:
+          flag = True
+      elif "+" in kinetics_sim or "-" in kinetics_sim:
+        flag = False
+        if "e-" in kinetics or "exp(-" in kinetics_sim:
+          flag = True
+      return flag
+    return self._memoize("_is_single_product_of_terms", mkIsSingleProductOfTerms)
+
+  @property
+  def is_diff_of_two_products_of_terms(self):
+    """
+    True if the kinetics is the difference between two product of terms.
+    """
+    return (not self.is_single_product_of_terms) and len(self.terms) == 2
+
+  @property
+  def is_species_all_reactants(self):
+    """
+    True if all the species in the kinetics are the reactants.
+    """
+    return len(self.reactant_list) > 0 \
+        and collections.Counter(self.species_in_kinetic_law) == collections.Counter(self.reactant_list)
+
+  @property
+  def is_product_of_terms_with_all_rcts_or_prds(self):
+    """
+    True if the first product of terms has all the reactants and the second
+    one all the products, in the kinetics or the simplified kinetics.
+    """
+    reactant_list = self.reactant_list
+    product_list = self.product_list
+    if len(reactant_list) == 0 or len(product_list) == 0:
+      return False
+    if collections.Counter(self.species_in_kinetic_law) != collections.Counter(reactant_list+product_list):
+      return False
+    for terms in [self.terms, self.terms_sim]:
+      if len(terms) == 2:
+        if all(ele in terms[0] for ele in reactant_list) and all(ele in terms[1] for ele in product_list):
+          return True
+    return False
+
 
 class KineticLaw(object):
 
-  def __init__(self, libsbml_kinetics, reaction, function_definitions=None):
+  def __init__(self, libsbml_kinetics, reaction, function_definitions=None, lazy=False,
+      function_expander=None):
     """
     :param libsbml.KineticLaw libsbml_kinetics:
     :param function_definitions list-FunctionDefinition:
+    :param FunctionExpander function_expander: expander of the
+        function_definitions shared by the reactions of the model
+    :param bool lazy: compute formula, symbols and expanded_formula
+        on first access instead of now
     """
     # libsbml object for kinetics
     self.libsbml_kinetics = libsbml_kinetics
-    # String version of chemical formula
-    try:
-      self.formula = self.libsbml_kinetics.getFormula()
-    except:
-      self.formula = ""
     # Reaction for the kinetics law
     self.reaction = reaction
-    # Parameters and chemical species
-    # self.symbols = self._getSymbols()
+    self._function_definitions = function_definitions
+    self._function_expander = function_expander
+    self._formula = _NOT_COMPUTED
+    self._symbols = _NOT_COMPUTED
+    self._expanded_formula = _NOT_COMPUTED
+    self.expression_formula = None  # valid symPy expression string
+    if not lazy:
+      self._formula = self._mkFormula()
+      self._symbols = self._mkSymbols()
+      self._expanded_formula = self._mkExpandedFormula()
+
+  @property
+  def formula(self):
+    """
+    String version of chemical formula
+    """
+    if self._formula is _NOT_COMPUTED:
+      self._formula = self._mkFormula()
+    return self._formula
+
+  @formula.setter
+  def formula(self, value):
+    self._formula = value
+
+  @property
+  def symbols(self):
+    """
+    Parameters and chemical species
+    """
+    if self._symbols is _NOT_COMPUTED:
+      self._symbols = self._mkSymbols()
+    return self._symbols
+
+  @symbols.setter
+  def symbols(self, value):
+    self._symbols = value
+
+  @property
+  def expanded_formula(self):
+    """
+    Expanded kinetic formula (remove embedded functions)
+    """
+    if self._expanded_formula is _NOT_COMPUTED:
+      self._expanded_formula = self._mkExpandedFormula()
+    return self._expanded_formula
+
+  @expanded_formula.setter
+  def expanded_formula(self, value):
+    self._expanded_formula = value
+
+  def _mkFormula(self):
+    try:
+      return self.libsbml_kinetics.getFormula()
+    except:
+      return ""
+
+  def _mkSymbols(self):
     try:
-      self.symbols = self._getSymbols()
+      return self._getSymbols()
     except Exception:
-      self.symbols = []
-    # Expanded kinetic formula (remove embedded functions)
-    if function_definitions is None:
-      self.expanded_formula = None
-    else:
-      self.expandFormula(function_definitions)
-    self.expression_formula = None  # valid symPy expression string
+      return []
+
+  def _mkExpandedFormula(self):
+    if self._function_definitions is None:
+      return None
+    return self._getExpander(self._function_definitions).expandFormula(
+        self.formula)
+
+  def _getExpander(self, function_definitions):
+    if (self._function_expander is None)  \
+        or (self._function_expander.function_definitions
+        is not function_definitions):
+      self._function_expander = FunctionExpander(function_definitions)
+    return self._function_expander
 
   def __repr__(self):
     return self.formula
@@ -59,7 +442,8 @@ class KineticLaw(object):
     ----------
     function_definitions: list-FunctionDefinition
     """
-    self.expanded_formula = self._expandFormula(self.formula, function_definitions)
+    self.expanded_formula = self._getExpander(
+        function_definitions).expandFormula(self.formula)
 
   def mkSymbolExpression(self, function_definitions):
     """
@@ -73,9 +457,10 @@ class KineticLaw(object):
     -------
     str
     """
-    #if self.expanded_formula is/is not?? None:
-    self.expandFormula(function_definitions)
-    self.expression_formula = str(self.expanded_formula)
+    # Computed locally, so that concurrent calls do not see a partial result
+    expanded_formula = self._getExpander(function_definitions).expandFormula(
+        self.formula)
+    self.expression_formula = str(expanded_formula)
     self.expanded_formula = self.expression_formula.replace("^","**")
     return self.expanded_formula
 
@@ -106,14 +491,13 @@ class KineticLaw(object):
     **kwargs: dictionary-keyword arguments
     kinetics: string-kinetics
     kinetics_sim: string-simplified kinetics
+    features: ReactionFeatures-features of the reaction shared by the classifiers, optional
     
     Returns
     -------
     True or False
     """
-    kinetics = kwargs["kinetics"]
-    kinetics_sim = kwargs["kinetics_sim"]
-    return self._powerInKinetics(kinetics, kinetics_sim) 
+    return self._getFeatures(kwargs).is_power
 
   def isNoPrds(self, **kwargs):
     """
@@ -267,34 +651,26 @@ class KineticLaw(object):
     kinetics_sim: string-simplified kinetics
     species_in_kinetic_law: list-species in the kinetics
     ids_list: list-id list including all the ids in kinetics, reactants and products
+    context: KineticsContext-expressions of the kinetics shared by the classifiers, optional
+    features: ReactionFeatures-features of the reaction shared by the classifiers, optional
     
     Returns
     -------
     True or False
     """
-    reactant_list = kwargs["reactant_list"]
-    kinetics = kwargs["kinetics"]
-    kinetics_sim = kwargs["kinetics_sim"]
-    species_in_kinetic_law = kwargs["species_in_kinetic_law"]
-    ids_list = kwargs["ids_list"]
+    features = self._getFeatures(kwargs)
+    species_in_kinetic_law = features.species_in_kinetic_law
 
     flag = False
-    if self._isSingleProductOfTerms(kinetics, kinetics_sim) == True \
-      and self._SpecsInKineticsAllRcts(species_in_kinetic_law, reactant_list) == True:
+    if features.is_single_product_of_terms and features.is_species_all_reactants:
       flag = True
-    if len(species_in_kinetic_law) == 1 and species_in_kinetic_law == reactant_list:
-      if kinetics.count(species_in_kinetic_law[0]) == 1:
+    if len(species_in_kinetic_law) == 1 and species_in_kinetic_law == features.reactant_list:
+      if features.kinetics.count(species_in_kinetic_law[0]) == 1:
         flag = True
-      elif kinetics_sim.count(species_in_kinetic_law[0]) == 1:
+      elif features.kinetics_sim.count(species_in_kinetic_law[0]) == 1:
         flag = True 
-    try:
-      eq = self._numeratorDenominator(kinetics_sim, ids_list)
-      if len(species_in_kinetic_law) > 0:
-        for i in range(len(species_in_kinetic_law)):
-          if species_in_kinetic_law[i] in eq[1]:
-            flag = False
-    except:
-      pass
+    if features.is_species_in_denominator:
+      flag = False
 
     return flag
 
@@ -313,36 +689,29 @@ class KineticLaw(object):
     kinetics_sim: string-simplified kinetics
     species_in_kinetic_law: list-species in the kinetics
     ids_list: list-id list including all the ids in kinetics, reactants and products
+    context: KineticsContext-expressions of the kinetics shared by the classifiers, optional
+    features: ReactionFeatures-features of the reaction shared by the classifiers, optional
     
     Returns
     -------
     True or False
     """
-    reactant_list = kwargs["reactant_list"]
-    kinetics = kwargs["kinetics"]
-    kinetics_sim = kwargs["kinetics_sim"]
-    species_in_kinetic_law = kwargs["species_in_kinetic_law"]
-    ids_list = kwargs["ids_list"]
+    features = self._getFeatures(kwargs)
+    species_in_kinetic_law = features.species_in_kinetic_law
 
     flag = False
-    if self._isSingleProductOfTerms(kinetics, kinetics_sim) == True \
-      and self._SpecsInKineticsAllRcts(species_in_kinetic_law, reactant_list) == False\
-      and self._numSpeciesInKinetics(species_in_kinetic_law) != 0:
+    if features.is_single_product_of_terms \
+      and not features.is_species_all_reactants \
+      and features.num_species != 0:
       flag = True
-    if len(species_in_kinetic_law) == 1 and species_in_kinetic_law != reactant_list\
-      and self._isDiffOfTwoProductsOfTerms(kinetics, kinetics_sim) == False:
-      if kinetics.count(species_in_kinetic_law[0]) == 1:
+    if len(species_in_kinetic_law) == 1 and species_in_kinetic_law != features.reactant_list\
+      and not features.is_diff_of_two_products_of_terms:
+      if features.kinetics.count(species_in_kinetic_law[0]) == 1:
         flag = True
-      elif kinetics_sim.count(species_in_kinetic_law[0]) == 1:
+      elif features.kinetics_sim.count(species_in_kinetic_law[0]) == 1:
         flag = True 
-    try:
-      eq = self._numeratorDenominator(kinetics_sim, ids_list)
-      if len(species_in_kinetic_law) > 0:
-        for i in range(len(species_in_kinetic_law)):
-          if species_in_kinetic_law[i] in eq[1]:
-            flag = False
-    except:
-      pass
+    if features.is_species_in_denominator:
+      flag = False
     
     return flag
 
@@ -363,32 +732,23 @@ class KineticLaw(object):
     kinetics_sim: string-simplified kinetics
     species_in_kinetic_law: list-species in the kinetics
     ids_list: list-id list including all the ids in kinetics, reactants and products
+    context: KineticsContext-expressions of the kinetics shared by the classifiers, optional
+    features: ReactionFeatures-features of the reaction shared by the classifiers, optional
 
     Returns
     -------
     True or False
     """
 
-    reactant_list = kwargs["reactant_list"]
-    product_list = kwargs["product_list"]
-    kinetics = kwargs["kinetics"]
-    kinetics_sim = kwargs["kinetics_sim"]
-    species_in_kinetic_law = kwargs["species_in_kinetic_law"]
-    ids_list = kwargs["ids_list"]
+    features = self._getFeatures(kwargs)
 
     flag = True
-    if self._isDiffOfTwoProductsOfTerms(kinetics, kinetics_sim) == False:
+    if not features.is_diff_of_two_products_of_terms:
       flag = False
-    if self._ProductOfTermsWithAllRctsOrPrds(kinetics, kinetics_sim, species_in_kinetic_law, reactant_list, product_list) == False:
+    if not features.is_product_of_terms_with_all_rcts_or_prds:
+      flag = False
+    if features.is_species_in_denominator:
       flag = False
-    try:
-      eq = self._numeratorDenominator(kinetics_sim, ids_list)
-      if len(species_in_kinetic_law) > 0:
-        for i in range(len(species_in_kinetic_law)):
-          if species_in_kinetic_law[i] in eq[1]:
-            flag = False
-    except:
-      pass
     
     return flag
 
@@ -409,39 +769,31 @@ class KineticLaw(object):
     kinetics_sim: string-simplified kinetics
     species_in_kinetic_law: list-species in the kinetics
     ids_list: list-id list including all the ids in kinetics, reactants and products
+    context: KineticsContext-expressions of the kinetics shared by the classifiers, optional
+    features: ReactionFeatures-features of the reaction shared by the classifiers, optional
     
     Returns
     -------
     True or False
     """
-    reactant_list = kwargs["reactant_list"]
-    product_list = kwargs["product_list"]
-    kinetics = kwargs["kinetics"]
-    kinetics_sim = kwargs["kinetics_sim"]
-    species_in_kinetic_law = kwargs["species_in_kinetic_law"]
-    ids_list = kwargs["ids_list"]
+    features = self._getFeatures(kwargs)
+    species_in_kinetic_law = features.species_in_kinetic_law
 
     flag = True
-    if self._numSpeciesInKinetics(species_in_kinetic_law) == 0: #exclude the case of ZERO
+    if features.num_species == 0: #exclude the case of ZERO
       flag = False
-    if self._isDiffOfTwoProductsOfTerms(kinetics, kinetics_sim) == False:
+    if not features.is_diff_of_two_products_of_terms:
       flag = False
-    if self._ProductOfTermsWithAllRctsOrPrds(kinetics, kinetics_sim, species_in_kinetic_law, reactant_list, product_list) == True:
+    if features.is_product_of_terms_with_all_rcts_or_prds:
       flag = False
-    if len(species_in_kinetic_law) == 1 and species_in_kinetic_law == reactant_list: 
+    if len(species_in_kinetic_law) == 1 and species_in_kinetic_law == features.reactant_list: 
     #exclude the case of UNDR
-      if kinetics.count(species_in_kinetic_law[0]) == 1:
+      if features.kinetics.count(species_in_kinetic_law[0]) == 1:
         flag = False
-      elif kinetics_sim.count(species_in_kinetic_law[0]) == 1:
+      elif features.kinetics_sim.count(species_in_kinetic_law[0]) == 1:
         flag = False 
-    try:
-      eq = self._numeratorDenominator(kinetics_sim, ids_list)
-      if len(species_in_kinetic_law) > 0:
-        for i in range(len(species_in_kinetic_law)):
-          if species_in_kinetic_law[i] in eq[1]:
-            flag = False
-    except:
-      pass
+    if features.is_species_in_denominator:
+      flag = False
 
     return flag
 
@@ -458,6 +810,8 @@ class KineticLaw(object):
     kinetics: string-kinetics
     kinetics_sim: string-simplified kinetics
     ids_list: list-id list including all the ids in kinetics, reactants and products
+    context: KineticsContext-expressions of the kinetics shared by the classifiers, optional
+    features: ReactionFeatures-features of the reaction shared by the classifiers, optional
     species_in_kinetic_law: list-species in the kinetics
     parameters_in_kinetic_law: list-parameters in the kinetics  
     reactant_list: list-reactants of the reaction
@@ -467,25 +821,14 @@ class KineticLaw(object):
     True or False
     """
   
-    kinetics = kwargs["kinetics"]
-    kinetics_sim = kwargs["kinetics_sim"]
-    ids_list = kwargs["ids_list"]
-    species_in_kinetic_law = kwargs["species_in_kinetic_law"]
+    features = self._getFeatures(kwargs)
     parameters_in_kinetic_law = kwargs["parameters_in_kinetic_law"]
-    reactant_list = kwargs["reactant_list"]
-
-
-    eq = self._numeratorDenominator(kinetics_sim, ids_list)
-    flag_fr = False
-    if len(species_in_kinetic_law) > 0:
-      for i in range(len(species_in_kinetic_law)):
-        if species_in_kinetic_law[i] in eq[1]:
-          flag_fr = True
 
     flag = False
-    if flag_fr:
-      if self._numSpeciesInKinetics(species_in_kinetic_law) == 1 and self._numOfRcts(reactant_list) == 1:
-        if self._MMSingleSpecInNumerator(kinetics, ids_list, parameters_in_kinetic_law, reactant_list) == True:
+    if features.is_species_in_denominator:
+      if features.num_species == 1 and features.num_reactants == 1:
+        if self._MMSingleSpecInNumerator(features.context, parameters_in_kinetic_law,
+            features.reactant_list) == True:
           flag = True
     else:
       flag = False
@@ -504,6 +847,8 @@ class KineticLaw(object):
     **kwargs: dictionary-keyword arguments  
     kinetics: string-kinetics
     ids_list: list-id list including all the ids in kinetics, reactants and products
+    context: KineticsContext-expressions of the kinetics shared by the classifiers, optional
+    features: ReactionFeatures-features of the reaction shared by the classifiers, optional
     species_in_kinetic_law: list-species in the kinetics
     parameters_in_kinetic_law: list-parameters in the kinetics
     reactant_list: list-reactants of the reaction
@@ -513,24 +858,14 @@ class KineticLaw(object):
     True or False
     """
       
-    kinetics = kwargs["kinetics"]
-    kinetics_sim = kwargs["kinetics_sim"]
-    ids_list = kwargs["ids_list"]
-    species_in_kinetic_law = kwargs["species_in_kinetic_law"]
+    features = self._getFeatures(kwargs)
     parameters_in_kinetic_law = kwargs["parameters_in_kinetic_law"]
-    reactant_list = kwargs["reactant_list"]
-
-    eq = self._numeratorDenominator(kinetics_sim, ids_list)
-    flag_fr = False
-    if len(species_in_kinetic_law) > 0:
-      for i in range(len(species_in_kinetic_law)):
-        if species_in_kinetic_law[i] in eq[1]:
-          flag_fr = True
 
     flag = False
-    if flag_fr:
-      if self._numSpeciesInKinetics(species_in_kinetic_law) == 2 and self._numOfRcts(reactant_list) == 1:
-        if self._MMTwoSpecInNumerator(kinetics, ids_list, parameters_in_kinetic_law, species_in_kinetic_law, reactant_list) == True:  
+    if features.is_species_in_denominator:
+      if features.num_species == 2 and features.num_reactants == 1:
+        if self._MMTwoSpecInNumerator(features.context, parameters_in_kinetic_law,
+            features.species_in_kinetic_law, features.reactant_list) == True:  
           flag = True
     else:
       flag = False
@@ -551,6 +886,8 @@ class KineticLaw(object):
     **kwargs: dictionary-keyword arguments 
     kinetics_sim: string-simplified kinetics
     ids_list: list-id list including all the ids in kinetics, reactants and products
+    context: KineticsContext-expressions of the kinetics shared by the classifiers, optional
+    features: ReactionFeatures-features of the reaction shared by the classifiers, optional
     species_in_kinetic_law: list-species in the kinetics
     
     Returns
@@ -558,21 +895,12 @@ class KineticLaw(object):
     True or False
     """
 
-    kinetics_sim = kwargs["kinetics_sim"]
-    ids_list = kwargs["ids_list"]
-    species_in_kinetic_law = kwargs["species_in_kinetic_law"]
-
-    eq = self._numeratorDenominator(kinetics_sim, ids_list)
-    flag_fr = False
-    if len(species_in_kinetic_law) > 0:
-      for i in range(len(species_in_kinetic_law)):
-        if species_in_kinetic_law[i] in eq[1]:
-          flag_fr = True
+    features = self._getFeatures(kwargs)
 
     flag = False
-    if flag_fr:
-      if self._numSpeciesInKinetics(species_in_kinetic_law) == 1:
-        if self._HillFormat(kinetics_sim, ids_list, species_in_kinetic_law) == True:
+    if features.is_species_in_denominator:
+      if features.num_species == 1:
+        if self._HillFormat(features) == True:
           flag = True
     else:
       flag = False
@@ -591,23 +919,15 @@ class KineticLaw(object):
     **kwargs: dictionary-keyword arguments  
     kinetics_sim: string-simplified kinetics
     ids_list: list-id list including all the ids in kinetics, reactants and products
+    context: KineticsContext-expressions of the kinetics shared by the classifiers, optional
+    features: ReactionFeatures-features of the reaction shared by the classifiers, optional
     species_in_kinetic_law: list-species in the kinetics
 
     Returns
     -------
     True or False
     """
-    kinetics_sim = kwargs["kinetics_sim"]
-    ids_list = kwargs["ids_list"]
-    species_in_kinetic_law = kwargs["species_in_kinetic_law"]
-
-    eq = self._numeratorDenominator(kinetics_sim, ids_list)
-    flag = False
-    if len(species_in_kinetic_law) > 0:
-      for i in range(len(species_in_kinetic_law)):
-        if species_in_kinetic_law[i] in eq[1]:
-          flag = True
-    return flag
+    return self._getFeatures(kwargs).is_species_in_denominator
 
   def isPolynomial(self, **kwargs):
     """
@@ -620,59 +940,56 @@ class KineticLaw(object):
     **kwargs: dictionary-keyword arguments  
     kinetics_sim: string-simplified kinetics
     ids_list: list-id list including all the ids in kinetics, reactants and products
+    context: KineticsContext-expressions of the kinetics shared by the classifiers, optional
+    features: ReactionFeatures-features of the reaction shared by the classifiers, optional
     species_in_kinetic_law: list-species in the kinetics
 
     Returns
     -------
     True or False
     """
-    kinetics_sim = kwargs["kinetics_sim"]
-    ids_list = kwargs["ids_list"]
-    species_in_kinetic_law = kwargs["species_in_kinetic_law"]
+    features = self._getFeatures(kwargs)
+    kinetics_sim = features.kinetics_sim
+    species_in_kinetic_law = features.species_in_kinetic_law
 
     flag = False
-    if self._isPolynomial(kinetics_sim, ids_list) == True and len(species_in_kinetic_law) > 0:
+    if self._isPolynomial(features.context) == True and len(species_in_kinetic_law) > 0:
       for i in range(len(species_in_kinetic_law)):
         if species_in_kinetic_law[i] in kinetics_sim:
           flag = True
     return flag
     
-  def _numSpeciesInKinetics(self, species_in_kinetic_law):
+  def _getFeatures(self, kwargs):
     """
-    Tests whether there is no species in the kinetic law
+    Get the features of the reaction shared by the classifiers.
     
     Parameters
     -------
-    species_in_kinetic_law: list-species in the kinetics
+    kwargs: dictionary-keyword arguments of the classifiers
 
     Returns
     -------
-    Integer
+    ReactionFeatures
     """
-    return len(species_in_kinetic_law)
-
-  def _powerInKinetics(self, kinetics, kinetics_sim):
+    features = kwargs.get("features")
+    if features is None:
+      features = ReactionFeatures.fromKwargs(kwargs)
+    return features
+    
+  def _numSpeciesInKinetics(self, species_in_kinetic_law):
     """
-    Tests whether there is power term in the kinetic law: **, "pow", but not "pow(,-1)"
+    Tests whether there is no species in the kinetic law
     
     Parameters
-    ----    
-    kinetics: string-kineticse
-    kinetics_sim: string-simplified kinetics
-    
+    -------
+    species_in_kinetic_law: list-species in the kinetics
+
     Returns
     -------
-    True or False
+    Integer
     """
-    if "pow(" in kinetics and "-1)" not in kinetics:
-      return True
-    elif "**" in kinetics: 
-      return True
-    elif "**" in kinetics_sim:
-      return True
-    else:
-      False
-  
+    return len(species_in_kinetic_law)
+
   def _numOfPrds(self, product_list):
     """
     Tests for the number of prds in the reaction
@@ -701,306 +1018,105 @@ class KineticLaw(object):
     """
     return len(reactant_list)
 
-  def _isSingleProductOfTerms(self, kinetics, kinetics_sim):
+  def _MMSingleSpecInNumerator(self, context, parameters_in_kinetic_law, reactant_list):
     """
-    Tests whether the kinetics is a single product of terms
+    Tests whether kinetics is in the MM functional form with a single species in the numerator,
+    i.e. the simplified kinetics is rct*p1[*p2[*p3]]/(rct + k) for distinct parameters
     
     Parameters
     ----    
-    kinetics: string-kinetics
-    kinetics_sim: string-simplified kinetics
-    
-    Returns
-    -------
-    True or False
-    """
-    flag = True
-    if "+" in kinetics or "-" in kinetics:
-      flag = False
-      if "e-" in kinetics or "exp(-" in kinetics:
-        flag = True
-    elif "+" in kinetics_sim or "-" in kinetics_sim:
-      flag = False
-      if "e-" in kinetics or "exp(-" in kinetics_sim:
-        flag = True
-    return flag
-
-  def _SpecsInKineticsAllRcts(self, species_in_kinetic_law, reactant_list):
-    """
-    Tests whether all species in kinetics are reactants
-    
-    Parameters
-    ----    
-    species_in_kinetic_law: list-species in the kinetics
+    context: KineticsContext-expressions of the kinetics
+    parameters_in_kinetic_law: list-parameters in the kinetics  
     reactant_list: list-reactants of the reaction
     
     Returns
     -------
     True or False
     """
-    if len(reactant_list) > 0 and collections.Counter(species_in_kinetic_law) == collections.Counter(reactant_list):
-      return True
-    else:
+    #check if there are strange functions (i.e. delay) in kinetics
+    is_parsed, _ = context.expression
+    if not is_parsed or len(parameters_in_kinetic_law) < 2:
       return False
+    return self._MMFormat(context, parameters_in_kinetic_law, reactant_list[0], 
+        [], 1, 3)
 
-  def _isDiffOfTwoProductsOfTerms(self, kinetics, kinetics_sim):
+  def _MMTwoSpecInNumerator(self, context, parameters_in_kinetic_law, species_in_kinetic_law, reactant_list):
     """
-    Tests whether the kinetics is the difference between two product of terms
+    Tests whether kinetics is in the MM functional with a reactant and 2nd species as a product in the numerator,
+    i.e. the simplified kinetics is rct*cat[*p1[*p2]]/(rct + k) for distinct parameters
     
     Parameters
     ----    
-    kinetics: string-kinetics
-    kinetics_sim: string-simplified kinetics
-    
-    Returns
-    -------
-    True or False
-    """
-
-    flag = False
-    if self._isSingleProductOfTerms(kinetics, kinetics_sim) == False:
-      terms = kinetics.split("-")
-      if len(terms) == 2:
-        flag = True
-    return flag
-
-  def _ProductOfTermsWithAllRctsOrPrds(self, kinetics, kinetics_sim, species_in_kinetic_law, reactant_list, product_list):
-    """
-    Tests whether the kinetics with one/the other product terms with all reactants/products
-    
-    Parameters
-    ----    
-    kinetics: string-kinetics
-    kinetics_sim: string-simplified kinetics
+    context: KineticsContext-expressions of the kinetics
+    parameters_in_kinetic_law: list-parameters in the kinetics 
     species_in_kinetic_law: list-species in the kinetics
     reactant_list: list-reactants of the reaction
-    product_list: list-products of the reaction
-
-    Returns
-    -------
-    True or False
-    """
-
-    flag_kinetics = 1
-    flag_kinetics_sim = 1
-    terms = kinetics.split("-") 
-    if len(terms) == 2 and len(reactant_list) > 0 and len(product_list) > 0:
-      term1 = terms[0]
-      term2 = terms[1]
-      if collections.Counter(species_in_kinetic_law) == collections.Counter(reactant_list+product_list):
-        if all(ele in term1 for ele in reactant_list) and all(ele in term2 for ele in product_list):
-          flag_kinetics = 0
-
-    terms = kinetics_sim.split("-") 
-    if len(terms) == 2 and len(reactant_list) > 0 and len(product_list) > 0:
-      term1 = terms[0]
-      term2 = terms[1]
-      if collections.Counter(species_in_kinetic_law) == collections.Counter(reactant_list+product_list):
-        if all(ele in term1 for ele in reactant_list) and all(ele in term2 for ele in product_list):
-          flag_kinetics_sim = 0
-
-    if flag_kinetics*flag_kinetics_sim == 0:
-      return True
-    else:
-      return False
-
-
-  def _MMSingleSpecInNumerator(self, kinetics, ids_list, parameters_in_kinetic_law, reactant_list):
-    """
-    Tests whether kinetics is in the MM functional form with a single species in the numerator
-    
-    Parameters
-    ----    
-    kinetics: string-kinetics
-    ids_list: list-id list including all the ids in kinetics, reactants and products
-    parameters_in_kinetic_law: list-parameters in the kinetics  
-    reactant_list: list-reactants of the reaction
     
     Returns
     -------
     True or False
     """
-
-    strange_func = 0 #check if there are strang functions (i.e. delay) in kinetics
-    flag = 0
-    pre_symbols = ''
-    for i in range(len(ids_list)):
-      pre_symbols += ids_list[i]
-      pre_symbols += ' '
-    pre_symbols = pre_symbols[:-1] #remove the space at the end
-    pre_symbols_comma = pre_symbols.replace(" ",",")
-    stmt = "%s = symbols('%s')"%(pre_symbols_comma,pre_symbols)
-    try: #sometimes there is "invalid syntax error"
-      exec(stmt,globals())
-    except: 
-      strange_func = 1
-
-    try: #check if there is strange func (i.e. delay) in kinetic law
-      expr_stat = "expr = " + kinetics
-      exec(expr_stat,globals())
-    except:
-      strange_func = 1
-
-    if strange_func == 0:
-      if (len(parameters_in_kinetic_law) >= 2):                    
-        for j in range(len(parameters_in_kinetic_law)):
-          for k in range(len(parameters_in_kinetic_law)):
-            for l in range(len(parameters_in_kinetic_law)):
-              for m in range(len(parameters_in_kinetic_law)):
-                # assuming there is one parameter in the numerator
-                if k != j:
-                  pre_n = reactant_list[0]
-                  pre_d = ' ( '
-                  pre_d += reactant_list[0]
-                  pre_n += ' * '
-                  pre_d += ' + '
-                  pre_n += parameters_in_kinetic_law[j]
-                  pre_d += parameters_in_kinetic_law[k]
-                  pre_d += ' ) '
-                  pre = pre_n
-                  pre += ' / '
-                  pre += pre_d          
-                  expr1_stat = "expr1 =" + pre
-                  exec(expr1_stat,globals())
-                  if sympy.simplify(expr1) == sympy.simplify(expr):
-                    flag = 1
-                    break
-                  # assuming there are two parameters in the numerator
-                  if len(parameters_in_kinetic_law) >= 3:
-                    if l != j and l != k:
-                      pre_n += ' * '
-                      pre_n += parameters_in_kinetic_law[l]
-                      pre = pre_n
-                      pre += ' / '
-                      pre += pre_d           
-                      expr1_stat = "expr1 =" + pre
-                      exec(expr1_stat,globals()) 
-                      #exec() does not work in python function?
-                      if sympy.simplify(expr1) == sympy.simplify(expr):
-                        flag = 1
-                        break
-                      # assuming there are three parameters in the numerator
-                      if len(parameters_in_kinetic_law) >= 4:
-                        if m != j and m != k and m != l:
-                          pre_n += ' * '
-                          pre_n += parameters_in_kinetic_law[m]
-                          pre = pre_n
-                          pre += ' / '
-                          pre += pre_d       
-                          expr1_stat = "expr1 =" + pre
-                          exec(expr1_stat,globals())
-                          if sympy.simplify(expr1) == sympy.simplify(expr):
-                            flag = 1
-                            break
-              if flag == 1:
-                break
-            if flag == 1:
-              break
-          if flag == 1:
-            break
-    
-    if flag == 1:
-      return True
-    else: 
+    #check if there are strange functions (i.e. delay) in kinetics
+    is_parsed, _ = context.expression
+    if not is_parsed or len(parameters_in_kinetic_law) == 0:
       return False
+    cat = [item for item in species_in_kinetic_law if item not in reactant_list][0]
+    return self._MMFormat(context, parameters_in_kinetic_law, reactant_list[0], 
+        [cat], 0, 2)
 
-  def _MMTwoSpecInNumerator(self, kinetics, ids_list, parameters_in_kinetic_law, species_in_kinetic_law, reactant_list):
+  def _MMFormat(self, context, parameters_in_kinetic_law, rct, others, 
+      min_num_parameters, max_num_parameters):
     """
-    Tests whether kinetics is in the MM functional with a reactant and 2nd species as a product in the numerator
+    Tests whether the simplified kinetics is structurally 
+    rct*others*p_1*...*p_n/(rct + k), where p_1,...,p_n and k are distinct parameters
+    and min_num_parameters <= n <= max_num_parameters.
     
     Parameters
     ----    
-    kinetics: string-kinetics
-    ids_list: list-id list including all the ids in kinetics, reactants and products
+    context: KineticsContext-expressions of the kinetics
     parameters_in_kinetic_law: list-parameters in the kinetics 
-    species_in_kinetic_law: list-species in the kinetics
-    reactant_list: list-reactants of the reaction
+    rct: str-the reactant
+    others: list-str of the other species in the numerator
+    min_num_parameters: int-minimum number of parameters in the numerator
+    max_num_parameters: int-maximum number of parameters in the numerator
     
     Returns
     -------
     True or False
     """
-
-    strange_func = 0 #check if there are strang functions (i.e. delay) in kinetics
-    flag = 0
-    pre_symbols = ''
-    for i in range(len(ids_list)):
-      pre_symbols += ids_list[i]
-      pre_symbols += ' '
-    pre_symbols = pre_symbols[:-1] #remove the space at the end
-    pre_symbols_comma = pre_symbols.replace(" ",",")
-    stmt = "%s = symbols('%s')"%(pre_symbols_comma,pre_symbols)
-    try: #sometimes there is "invalid syntax error"
-      exec(stmt,globals())
-    except: 
-      strange_func = 1
-
-    try: #check if there is strange func (i.e. delay) in kinetic law
-      expr_stat = "expr = " + kinetics
-      exec(expr_stat,globals())
-    except:
-      strange_func = 1
-
-    if strange_func == 0:
-      if (len(parameters_in_kinetic_law) != 0):                    
-        for j in range(len(parameters_in_kinetic_law)):
-          for k in range(len(parameters_in_kinetic_law)):
-            for l in range(len(parameters_in_kinetic_law)):
-              #no parameter in the numerator
-              pre_n = reactant_list[0]
-              cat = [item for item in species_in_kinetic_law if item not in reactant_list][0]
-              pre_n += ' * '
-              pre_n += cat
-              pre_d = ' ( '
-              pre_d += reactant_list[0]
-              pre_d += ' + '
-              pre_d += parameters_in_kinetic_law[k]
-              pre_d += ' ) '
-              pre = pre_n
-              pre += ' / '
-              pre += pre_d           
-              expr1_stat = "expr1 =" + pre
-              exec(expr1_stat,globals())
-              if sympy.simplify(expr1) == sympy.simplify(expr):
-                flag = 1
-                break
-              # assuming there is one parameter in the numerator
-              if len(parameters_in_kinetic_law) >= 2:
-                if k != j:
-                  pre_n += ' * '
-                  pre_n += parameters_in_kinetic_law[j]
-                  pre = pre_n
-                  pre += ' / '
-                  pre += pre_d           
-                  expr1_stat = "expr1 =" + pre
-                  exec(expr1_stat,globals())
-                  if sympy.simplify(expr1) == sympy.simplify(expr):
-                    flag = 1
-                    break
-                  # assuming there are two parameters in the numerator
-                  if len(parameters_in_kinetic_law) >= 3:
-                    if l != j and l != k:
-                      pre_n += ' * '
-                      pre_n += parameters_in_kinetic_law[l]
-                      pre = pre_n
-                      pre += ' / '
-                      pre += pre_d
-                      expr1_stat = "expr1 =" + pre
-                      exec(expr1_stat,globals())
-                      if sympy.simplify(expr1) == sympy.simplify(expr):
-                        flag = 1
-                        break
-            if flag == 1:
-              break
-          if flag == 1:
-            break        
-    
-    if flag == 1:
-      return True
-    else: 
+    expr = context.sympy_simplified
+    if not isinstance(expr, sympy.Mul):
       return False
+    rct_symbol = context.symbol(rct)
+    parameter_symbols = set(context.symbol(p) for p in parameters_in_kinetic_law)
+    numerator_symbols = []
+    denominator = None
+    for factor in expr.args:
+      if isinstance(factor, sympy.Symbol):
+        numerator_symbols.append(factor)
+      elif isinstance(factor, sympy.Pow) and factor.exp == -1 \
+          and isinstance(factor.base, sympy.Add) and denominator is None:
+        denominator = factor.base
+      else:
+        return False
+    if denominator is None or len(denominator.args) != 2 \
+        or rct_symbol not in denominator.args:
+      return False
+    k = [term for term in denominator.args if term != rct_symbol][0]
+    if k not in parameter_symbols:
+      return False
+    expected_symbols = [rct_symbol] + [context.symbol(o) for o in others]
+    numerator_parameters = list(numerator_symbols)
+    for symbol in expected_symbols:
+      if symbol not in numerator_parameters:
+        return False
+      numerator_parameters.remove(symbol)
+    if not (min_num_parameters <= len(numerator_parameters) <= max_num_parameters):
+      return False
+    return k not in numerator_parameters \
+        and all(p in parameter_symbols for p in numerator_parameters)
 
-  def _HillFormat(self, kinetics_sim, ids_list, species_in_kinetic_law):
+  def _HillFormat(self, features):
     """
     Tests whether the kinetics is in the format of Hill equations.
     1) the numerator is one product of terms with the species to a power;
@@ -1009,9 +1125,7 @@ class KineticLaw(object):
     
     Parameters
     ----    
-    kinetics_sim: string-simplified kinetics
-    ids_list: list-id list including all the ids in kinetics, reactants and products
-    species_in_kinetic_law: list-species in the kinetics
+    features: ReactionFeatures-features of the reaction
 
     Returns
     -------
@@ -1020,24 +1134,23 @@ class KineticLaw(object):
     flag_numerator = False
     flag_denominator = False
     flag = False
-    eq = self._numeratorDenominator(kinetics_sim, ids_list)
-    numerator = eq[0]
-    denominator = eq[1]
-    species = species_in_kinetic_law[0]
+    numerator = features.numerator
+    denominator = features.denominator
+    species = features.species_in_kinetic_law[0]
 
     if "+" not in numerator and "-" not in numerator:
       if species in numerator:
-        if ("pow(" in numerator and "-1)" not in numerator) or "**" in numerator:
+        if _isPower(numerator):
           flag_numerator = True
     if "+" in denominator:
       terms = denominator.split("+")
       term1 = terms[0]
       term2 = terms[1]
       if species in term1 and species not in term2:
-        if ("pow(" in term1 and "-1)" not in term1) or "**" in term1:
+        if _isPower(term1):
           flag_denominator = True
       if species in term2 and species not in term1:
-        if ("pow(" in term2 and "-1)" not in term2) or "**" in term2:
+        if _isPower(term2):
           flag_denominator = True
 
     if flag_numerator == True and flag_denominator == True:
@@ -1045,174 +1158,62 @@ class KineticLaw(object):
 
     return flag
 
-  def _numeratorDenominator(self, kinetics_sim, ids_list):
-    """
-    Get the numerator and denominator of a "fraction" function.
-    
-    Parameters
-    ----    
-    kinetics_sim: string-simplified kinetics
-    ids_list: list-id list including all the ids in kinetics, reactants and products
-
-    Returns
-    -------
-    Type - the numerator and the denominator of the fraction
-    """
-
-    strange_func = 0 
-    pre_symbols = ''
-    for i in range(len(ids_list)):
-      pre_symbols += ids_list[i]
-      pre_symbols += ' '
-    pre_symbols = pre_symbols[:-1] #remove the space at the end
-    pre_symbols_comma = pre_symbols.replace(" ",",")
-    stmt = "%s = symbols('%s')"%(pre_symbols_comma,pre_symbols)
-    try: #sometimes there is "invalid syntax error"
-      exec(stmt,globals())
-    except: 
-      strange_func = 1
-    
-    try: #check if there is strange func (i.e. delay) in kinetic law; 
-      #sometimes ids_list is not enough for all the ids in kinetics
-      eq_stat = "kinetics_eq = " + kinetics_sim
-      exec(eq_stat,globals())
-    except:
-      strange_func = 1
-
-    eq = ['', '']
-    if strange_func == 0:
-      try: 
-        numerator = str(kinetics_eq.as_numer_denom()[0])
-        denominator = str(kinetics_eq.as_numer_denom()[1])
-        eq[0] = numerator
-        eq[1] = denominator
-      except:
-        pass
-
-    return eq
-
-
-  def _isPolynomial(self, kinetics_sim, ids_list):
+  def _isPolynomial(self, context):
     """
     Check if a function is polynomial.
     
     Parameters
     ----    
-    kinetics_sim: string-simplified kinetics
-    ids_list: list-id list including all the ids in kinetics, reactants and products
+    context: KineticsContext-expressions of the kinetics
 
     Returns
     -------
     Type - True or False
     """
+    return context.is_polynomial
 
-    strange_func = 0 #check if there are strang functions (i.e. delay) in kinetics
-    pre_symbols = ''
-    for i in range(len(ids_list)):
-      pre_symbols += ids_list[i]
-      pre_symbols += ' '
-    pre_symbols = pre_symbols[:-1] #remove the space at the end
-    pre_symbols_comma = pre_symbols.replace(" ",",")
-    stmt = "%s = symbols('%s')"%(pre_symbols_comma,pre_symbols)
-    try: #sometimes there is "invalid syntax error"
-      exec(stmt,globals())
-    except: 
-      strange_func = 1
-    
-    try: #check if there is strange func (i.e. delay) in kinetic law
-      eq_stat = "kinetics_eq = " + kinetics_sim
-      exec(eq_stat,globals())
-    except:
-      strange_func = 1
-
-    polynomial_flag = False
-    if strange_func == 0:
-      try:
-        polynomial_flag = kinetics_eq.is_polynomial()
-      except:
-        pass
-    return polynomial_flag
-
-
-  @staticmethod
-  def _expandFormula(expansion, function_definitions,
-        num_recursion=0):
-    """
-    Expands the kinetics formula, replacing function definitions
-    with their body.
-
-    Parameters
-    ----------
-    expansion: str
-        expansion of the kinetic law
-    function_definitions: list-FunctionDefinition
-    num_recursion: int
-    
-    Returns
-    -------
-    str
-    """
-    if num_recursion > MAX_RECURSION:
-      return expansion
-    done = True
-    for fd in function_definitions:
-      # Find the function calls
-      calls = re.findall(r'{}\(.*?\)'.format(fd.id), expansion)
-      if len(calls) == 0:
-        continue
-      done = False
-      for call in calls:
-        # Find argument call. Ex: '(a, b)'
-        call_arguments = re.findall(r'\(.*?\)', call)[0]
-        call_arguments = call_arguments.strip()
-        call_arguments = call_arguments[1:-1]  # Eliminate parentheses
-        arguments = call_arguments.split(',')
-        arguments = [a.strip() for a in arguments]
-        body = str(fd.body)
-        for formal_arg, call_arg in zip(fd.argument_names, arguments):
-          body = body.replace(formal_arg, call_arg)
-        expansion = expansion.replace(call, body)
-    if not done:
-      return KineticLaw._expandFormula(expansion, function_definitions,
-          num_recursion=num_recursion+1)
-    return expansion
- 
 
   def _getSymbols(self):
     """
-    Finds the parameters and species names for the
-    kinetics law. Exposing this information requires
-    a recursive search of the parse tree for the
-    kinetics expression.
-    :return list-str:
-    """
-
-    global cur_depth
-    MAX_DEPTH = 20
-    cur_depth = 0
-    def augment(ast_node, result):
-      global cur_depth
-      cur_depth += 1
-      #This step is necessary to avoid memory leaking
-      if cur_depth > MAX_DEPTH:
-        #self.reaction.id is the reason for "try"
-        raise exceptions.BadKineticsMath(self.reaction.id)
-      for idx in range(ast_node.getNumChildren()):
-        child_node = ast_node.getChild(idx)
-        if child_node.getName() is None:
-          additions = augment(child_node, result)
-          result.extend(additions)
-        else:
-          if child_node.isFunction():
-            additions = augment(child_node, result)
-            result.extend(additions)
-          else:
-            result.append(child_node.getName())
-      return result
-
+    Finds the names of the parameters, species, compartments and
+    called functions in the kinetics law. The parse tree of the
+    kinetics expression is searched with an explicit stack, so
+    that trees of any depth are handled.
+    :return list-str: names in the order of the formula, without repetitions
+    """
     ast_node = self.libsbml_kinetics.getMath()
-    if ast_node.getName() is None:
-      result = []
-    else:
-      result = [ast_node.getName()]
-    return augment(ast_node, result)
+    if ast_node is None:
+      return []
+    result = {}  # Ordered set of the names
+    stack = [ast_node]
+    while len(stack) > 0:
+      node = stack.pop()
+      name = node.getName()
+      # Functions other than the function definitions are operators
+      if (name is not None) and ((not node.isFunction())
+          or (node.getType() == libsbml.AST_FUNCTION)):
+        result[name] = None
+      stack.extend([node.getChild(idx)
+          for idx in reversed(range(node.getNumChildren()))])
+    return list(result)
+
+  def getSymbolTypes(self, simple):
+    """
+    Finds the kind of each symbol of the kinetics law.
+    :param SimpleSBML simple: model of the reaction
+    :return dict: key: symbol, value: kind in cn.SYMBOL_TYPES or
+        cn.SYMBOL_OTHER
+    """
+    symbol_types = {}
+    for symbol in self.symbols:
+      symbol_type = simple.getSymbolType(symbol)
+      if (symbol_type == cn.SYMBOL_OTHER) and self._isLocalParameter(symbol):
+        symbol_type = cn.SYMBOL_PARAMETER
+      symbol_types[symbol] = symbol_type
+    return symbol_types
+
+  def _isLocalParameter(self, an_id):
+    if self.libsbml_kinetics is None:
+      return False
+    return (self.libsbml_kinetics.getParameter(an_id) is not None)  \
+        or (self.libsbml_kinetics.getLocalParameter(an_id) is not None)
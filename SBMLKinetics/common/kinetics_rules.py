@@ -0,0 +1,185 @@
+'''Ordered rule engine of the classification of kinetic laws'''
+# A rule tests a kinetics type with a classifier of KineticLaw. It declares the
+# features of the reaction its classifier needs, with the values for which the
+# classifier can be True, so that the classifier is not called otherwise.
+# The features are computed lazily, at most once per reaction, and the rules
+# are evaluated in order until the first one that is True.
+#
+# The engine is a registry: rules are added or removed by name. They are
+# ordered by priority, and the rules with the same priority, which are
+# alternatives, by the cost of their classifiers. The conditions of a rule
+# are tested from the cheapest feature, so that a symbolic feature is only
+# computed if the cheap ones allow the classifier.
+
+from SBMLKinetics.common.kinetic_law import KineticLaw
+from SBMLKinetics.common.kinetic_law import ReactionFeatures
+
+import collections
+import operator
+
+
+# Cost classes of the features and the classifiers
+COST_CHEAP = 0 # lengths of the lists of the reaction
+COST_STRING = 1 # string tests of the kinetics
+COST_SYMBOLIC = 2 # sympy expressions of the kinetics
+
+# name: str-kinetics type
+# conditions: tuple-(str feature, value) the reaction must have for the
+#   classifier to be called
+# classifier: str-name of the classifier method of KineticLaw, or
+#   function(kinetic_law, **kwargs) with the keyword arguments of the classifiers.
+#   In the classification, the ids of the keyword arguments are anonymized and
+#   the result is reused for the reactions with the same structure, so that a
+#   classifier must not depend on the names of the ids.
+# priority: number-the rules with a lower priority are tested first
+# cost: int-cost class of the classifier
+# column: str-column of the kinetics type in the tables; None for the name
+Rule = collections.namedtuple("Rule",
+    "name conditions classifier priority cost column",
+    defaults=(0, COST_STRING, None))
+
+# key: str feature, value: (function of the ReactionFeatures of the reaction,
+#   int-cost class)
+FEATURES = {
+    "num_species": (operator.attrgetter("num_species"), COST_CHEAP),
+    "num_reactants": (operator.attrgetter("num_reactants"), COST_CHEAP),
+    "num_products": (operator.attrgetter("num_products"), COST_CHEAP),
+    "is_species_all_reactants": (operator.attrgetter("is_species_all_reactants"),
+        COST_CHEAP),
+    "is_power": (operator.attrgetter("is_power"), COST_STRING),
+    "is_single_product_of_terms": (operator.attrgetter("is_single_product_of_terms"),
+        COST_STRING),
+    "is_diff_of_two_products_of_terms":
+        (operator.attrgetter("is_diff_of_two_products_of_terms"), COST_STRING),
+    "species_in_denominator": (operator.attrgetter("is_species_in_denominator"),
+        COST_SYMBOLIC),
+    }
+
+
+def getColumn(rule):
+  """
+  Column of the kinetics type of a rule in the tables.
+  """
+  return rule.name if rule.column is None else rule.column
+
+
+class RuleEngine(object):
+  """
+  Classifies reactions with a registry of rules, compiled when it changes.
+  """
+
+  def __init__(self, rules=()):
+    """
+    Parameters
+    -------
+    rules: list-Rule
+
+    Raises
+    -------
+    ValueError if a rule has an unknown feature or classifier, or a name
+    that is not unique
+    """
+    self.rules = []
+    self._compiled = []
+    for rule in rules:
+      self.register(rule)
+
+  def register(self, rule):
+    """
+    Adds a rule, after the registered rules with the same priority and cost.
+
+    Parameters
+    -------
+    rule: Rule
+
+    Raises
+    -------
+    ValueError if the rule has an unknown feature or classifier, or the name
+    of a registered rule
+    """
+    if rule.name in self.names:
+      raise ValueError("Rule %s is already registered." % rule.name)
+    self._compileRule(rule)
+    self._compile(self.rules + [rule])
+
+  def unregister(self, name):
+    """
+    Removes the rule of a kinetics type.
+
+    Parameters
+    -------
+    name: str-kinetics type
+
+    Raises
+    -------
+    ValueError if there is no rule with the name
+    """
+    if name not in self.names:
+      raise ValueError("Rule %s is not registered." % name)
+    self._compile([rule for rule in self.rules if rule.name != name])
+
+  def _compileRule(self, rule):
+    """
+    Returns
+    -------
+    (tuple-conditions from the cheapest feature, function-classifier)
+    """
+    for feature, _ in rule.conditions:
+      if feature not in FEATURES:
+        raise ValueError("Rule %s has an unknown feature %s." % (rule.name, feature))
+    if isinstance(rule.classifier, str):
+      classifier = getattr(KineticLaw, rule.classifier, None)
+    else:
+      classifier = rule.classifier
+    if not callable(classifier):
+      raise ValueError("Rule %s has an unknown classifier %s."
+          % (rule.name, rule.classifier))
+    conditions = sorted(rule.conditions, key=lambda c: FEATURES[c[0]][1])
+    return tuple(conditions), classifier
+
+  def _compile(self, rules):
+    # sorted is stable, the rules of the same priority and cost keep their order
+    self.rules = sorted(rules, key=lambda r: (r.priority, r.cost))
+    self._compiled = [self._compileRule(rule) for rule in self.rules]
+
+  @property
+  def names(self):
+    return [rule.name for rule in self.rules]
+
+  @property
+  def columns(self):
+    return [getColumn(rule) for rule in self.rules]
+
+  def classify(self, kinetic_law, check=None, **kwargs):
+    """
+    Finds the first rule of the reaction.
+
+    Parameters
+    -------
+    kinetic_law: KineticLaw-the kinetic law of the reaction
+    check: function-called before each classifier, e.g. to interrupt it
+    **kwargs: dictionary-keyword arguments of the classifiers
+
+    Returns
+    -------
+    int-index of the rule; the number of rules if none is True
+    """
+    if kwargs.get("features") is None:
+      kwargs["features"] = ReactionFeatures.fromKwargs(kwargs)
+    reaction_features = kwargs["features"]
+    features = {}
+    for index, (conditions, classifier) in enumerate(self._compiled):
+      is_applicable = True
+      for feature, value in conditions:
+        if feature not in features:
+          features[feature] = FEATURES[feature][0](reaction_features)
+        if features[feature] != value:
+          is_applicable = False
+          break
+      if not is_applicable:
+        continue
+      if check is not None:
+        check()
+      if classifier(kinetic_law, **kwargs):
+        return index
+    return len(self._compiled)
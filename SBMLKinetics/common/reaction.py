@@ -10,10 +10,14 @@ import libsbml
 
 class Reaction(object):
 
-  def __init__(self, libsbml_reaction, function_definitions=None):
+  def __init__(self, libsbml_reaction, function_definitions=None, lazy=False,
+      function_expander=None):
     """
     :param libsbml.Reaction libsbml_reaction:
     :param function_definitions list-FunctionDefinition:
+    :param bool lazy: process the kinetic law on first access
+    :param FunctionExpander function_expander: shared expander of
+        the function_definitions
     """
     self.reaction = libsbml_reaction
     # List of species reference
@@ -24,7 +28,8 @@ class Reaction(object):
         for n in range(self.reaction.getNumProducts())]
     self.kinetic_law = KineticLaw(
         #self.reaction.getKineticLaw(), self, function_definitions=None)
-        self.reaction.getKineticLaw(), self, function_definitions=function_definitions)
+        self.reaction.getKineticLaw(), self, function_definitions=function_definitions,
+        lazy=lazy, function_expander=function_expander)
     self.id = self.reaction.getId()
 
   def getId(self):
@@ -4,13 +4,18 @@ from SBMLKinetics.common import constants as cn
 from SBMLKinetics.common.kinetic_law import KineticLaw
 from SBMLKinetics.common.reaction import Reaction
 from SBMLKinetics.common.function_definition import FunctionDefinition
+from SBMLKinetics.common.function_definition import FunctionExpander
 from SBMLKinetics.common import util
 
 import collections
+import concurrent.futures
+import functools
+import glob
 import os.path
 import numpy as np
 import sys
 import libsbml
+import threading
 import urllib3
 import warnings
 import zipfile
@@ -26,14 +31,27 @@ TYPE_FILE = "type_file" # File reference
 # model: libsbml.Model
 IteratorItem = collections.namedtuple('IteratorItem',
     'filename number model')
+# filename: name of file processed
+# number: index of item
+# content: str/bytes-SBML document, bytes as read from a zip file
+ContentItem = collections.namedtuple('ContentItem',
+    'filename number content')
+# Number of documents read ahead of the one being processed
+PREFETCH = 2
+# Extension of the SBML documents in a directory
+XML_EXTENSION = ".xml"
 
 
 class SimpleSBML(object):
 
-  def __init__(self, model_reference):
+  def __init__(self, model_reference, lazy=False):
     """
     Initializes instance variables
-    :param str model_reference: string or SBML file or Roadrunner object
+    :param str model_reference: string, bytes or buffer, SBML file
+        or Roadrunner object
+    :param bool lazy: process the formula, symbols and expansion of 
+        a kinetic law on its first access, e.g. when only the reactants, 
+        products or species are needed
     """
     ##### PUBLIC #####
     self.model = None  # libsbml object
@@ -45,20 +63,28 @@ class SimpleSBML(object):
     if util.isSBMLModel(model_reference):
       self.model = model_reference
     else:
-      xml = util.getXML(model_reference)
-      reader = libsbml.SBMLReader()
-      document = reader.readSBMLFromString(xml)
-      util.checkSBMLDocument(document, model_reference=model_reference)
-      self.model = document.getModel()
+      self.model = readSBMLDocument(model_reference).getModel()
     # Do the initializations
     self.species = [self.model.getSpecies(nn)
         for nn in range(self.model.getNumSpecies())]
     self.parameters = [self.model.getParameter(nn)
         for nn in range(self.model.getNumParameters())]
     self.function_definitions = self.getFunctionDefinitions()
+    # Function bodies are compiled once and shared by the reactions
+    self.function_expander = FunctionExpander(self.function_definitions)
     self.reactions = [Reaction(self.model.getReaction(nn), 
-        function_definitions=self.function_definitions)
+        function_definitions=self.function_definitions, lazy=lazy,
+        function_expander=self.function_expander)
         for nn in range(self.model.getNumReactions())]
+    # Indexes by id, e.g. for membership tests
+    self._duplicate_ids = set()
+    self.reaction_dct = self._mkIndex(self.reactions)  # key: id, value: Reaction
+    self.species_dct = self._mkIndex(self.species)  # key: id, value: libsbml Species
+    self.parameter_dct = self._mkIndex(self.parameters)  # key: id, value: libsbml Parameter
+    self.compartments = [self.model.getCompartment(nn)
+        for nn in range(self.model.getNumCompartments())]
+    # Kind of each id used in the kinetic laws, shared by the reactions
+    self.symbol_type_dct = self._mkSymbolTypes()  # key: id, value: cn.SYMBOL_*
 
   def getFunctionDefinitions(self):
     """
@@ -79,7 +105,7 @@ class SimpleSBML(object):
     :param str an_id: id for the reaction
     :return Reaction/None:
     """
-    return self._getInstance(self.reactions, an_id)
+    return self._getInstance(self.reaction_dct, an_id)
 
   def getSpecies(self, an_id):
     """
@@ -87,7 +113,7 @@ class SimpleSBML(object):
     :param str an_id:
     Return None if there is no such species.
     """
-    return self._getInstance(self.species, an_id)
+    return self._getInstance(self.species_dct, an_id)
 
   def getParameter(self, an_id):
     """
@@ -95,25 +121,104 @@ class SimpleSBML(object):
     :param str an_id:
     Return None if there is no such parameter.
     """
-    return self._getInstance(self.parameters, an_id)
+    return self._getInstance(self.parameter_dct, an_id)
 
-  def _getInstance(self, a_list, an_id):
+  def _mkIndex(self, a_list):
     """
-    Finds and returns the species with given name
-    Return None if there is no such molecules
-    :param str id:
+    Indexes instances by id. The ids of several instances are
+    recorded as duplicates.
+    :param list a_list: instances with getId
+    :return dict: key: id, value: first instance with the id
+    """
+    dct = {}
+    for e in a_list:
+      an_id = e.getId()
+      if an_id in dct:
+        self._duplicate_ids.add(an_id)
+      else:
+        dct[an_id] = e
+    return dct
+
+  def _mkSymbolTypes(self):
+    """
+    Indexes the kinds of the ids of the model.
+    :return dict: key: id, value: kind in cn.SYMBOL_TYPES
+    """
+    ids_dct = {
+        cn.SYMBOL_SPECIES: self.species_dct.keys(),
+        cn.SYMBOL_PARAMETER: self.parameter_dct.keys(),
+        cn.SYMBOL_COMPARTMENT: [c.getId() for c in self.compartments],
+        cn.SYMBOL_FUNCTION: [fd.id for fd in self.function_definitions],
+        }
+    dct = {}
+    # Kinds with a higher precedence are written last
+    for symbol_type in reversed(cn.SYMBOL_TYPES):
+      dct.update({i: symbol_type for i in ids_dct[symbol_type]})
+    return dct
+
+  def getSymbolType(self, an_id):
+    """
+    Finds the kind of an id.
+    :param str an_id:
+    :return str: kind in cn.SYMBOL_TYPES or cn.SYMBOL_OTHER
+    """
+    return self.symbol_type_dct.get(an_id, cn.SYMBOL_OTHER)
+
+  def _getInstance(self, a_dct, an_id):
     """
-    results = [e for e in a_list if e.getId() == an_id]
-    if len(results) > 1:
+    Finds and returns the instance with given id
+    Return None if there is no such instance
+    :param dict a_dct: index of the instances
+    :param str an_id:
+    """
+    if an_id in self._duplicate_ids and an_id in a_dct:
       raise ValueError(
           "Two instances have the same id: %s" %
-          id)
-    if len(results) == 0:
-      return None
-    return results[0]
+          an_id)
+    return a_dct.get(an_id)
 
 
 #################### FUNCTIONS #########################
+_thread_local = threading.local()
+
+def getSBMLReader():
+  """
+  libsbml reader shared by the documents read in a thread, e.g. a worker.
+  :return libsbml.SBMLReader:
+  """
+  reader = getattr(_thread_local, "reader", None)
+  if reader is None:
+    reader = libsbml.SBMLReader()
+    _thread_local.reader = reader
+  return reader
+
+def readSBMLDocument(model_reference):
+  """
+  Reads an SBML document with the reader of the thread.
+  :param str/bytes model_reference: XML string, bytes or buffer, 
+      path of a file or file object (see util.getXML)
+  :return libsbml.SBMLDocument:
+  """
+  xml = util.getXML(model_reference)
+  document = getSBMLReader().readSBMLFromString(xml)
+  util.checkSBMLDocument(document, model_reference=model_reference)
+  return document
+
+def iterSimpleSBML(contents, lazy=False):
+  """
+  Creates the models of raw SBML documents, e.g. the bytes of the members
+  of a zip file, with the reader of the thread.
+  :param iterable contents: str/bytes/buffer SBML documents
+  :param bool lazy: see SimpleSBML
+  :return SimpleSBML: None if the document is invalid
+  """
+  for content in contents:
+    try:
+      yield SimpleSBML(content, lazy=lazy)
+    except Exception as e:
+      print(e)
+      yield None
+
 def readURL(url):
   """
   :param str url:
@@ -129,6 +234,88 @@ def readURL(url):
     result = do()
   return result
   
+class ZipReader(object):
+  """
+  Reads the members of a zip file. The zip file is opened on the first read
+  in each process, so that a reader can be passed to worker processes, which
+  then read the members by name with their own handle.
+  """
+
+  def __init__(self, path):
+    """
+    :param str path: path of the zip file
+    """
+    self.path = path
+    self._zipper = None
+    self._pid = None
+
+  def _getZipper(self):
+    if self._zipper is None or self._pid != os.getpid():
+      self._zipper = zipfile.ZipFile(self.path, "r")
+      self._pid = os.getpid()
+    return self._zipper
+
+  def getNames(self):
+    """
+    :return list-str: names of the members in the order of the zip file
+    """
+    return [f.filename for f in self._getZipper().filelist]
+
+  def read(self, name):
+    """
+    :param str name: name of a member
+    :return bytes: content of the member
+    """
+    return self._getZipper().read(name)
+
+  def close(self):
+    if self._zipper is not None and self._pid == os.getpid():
+      self._zipper.close()
+    self._zipper = None
+
+  def __getstate__(self):
+    return {"path": self.path}
+
+  def __setstate__(self, state):
+    self.__init__(state["path"])
+
+@functools.lru_cache(maxsize=None)
+def getZipReader(path):
+  """
+  Reader of a zip file shared by the callers in a process.
+  :param str path: path of the zip file
+  :return ZipReader:
+  """
+  return ZipReader(path)
+
+def iterPrefetched(func, args, prefetch=PREFETCH):
+  """
+  Applies a function to arguments in order. The results of the next
+  arguments are computed in a background thread while the current one is
+  consumed, e.g. to decompress documents while a model is classified.
+  :param Function func: function of one argument
+  :param iterable args:
+  :param int prefetch: number of results computed ahead; 0 for none
+  :return object: func(arg) for each arg
+  """
+  if prefetch <= 0:
+    for arg in args:
+      yield func(arg)
+    return
+  executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+  futures = collections.deque()
+  try:
+    for arg in args:
+      futures.append(executor.submit(func, arg))
+      if len(futures) > prefetch:
+        yield futures.popleft().result()
+    while len(futures) > 0:
+      yield futures.popleft().result()
+  finally:
+    for future in futures:
+      future.cancel()
+    executor.shutdown(wait=True)
+
 def getZipfilePaths(data_dir=cn.BIOMODELS_DIR,
     zip_filename=cn.BIOMODELS_ZIP_FILENAME):
   """
@@ -142,51 +329,140 @@ def getZipfilePaths(data_dir=cn.BIOMODELS_DIR,
   files = [f.filename for f in zipper.filelist]
   return files, zipper
   
-def modelIterator(initial=0, final=1000,
-    data_dir=cn.BIOMODELS_DIR,
+def getDocumentNames(data_dir=cn.BIOMODELS_DIR,
+    zip_filename=cn.BIOMODELS_ZIP_FILENAME, pattern=None):
+  """
+  Names of the SBML documents of a zip file or of a directory, in the
+  order in which they are processed.
+  :param str data_dir: absolute path of the directory containing
+      the zip file or the xml files
+  :param str zip_filename: name of the zipfile. 
+      If None, then looks for XML files in the directory.
+  :param str pattern: glob pattern of the files relative to data_dir, 
+      "**" matches any subdirectory; all the XML files under data_dir if None.
+      Only used without zip file.
+  :return list-str: names of the members in the order of the zip file,
+      or sorted paths of the files relative to data_dir
+  """
+  if zip_filename is not None:
+    reader = ZipReader(os.path.join(data_dir, zip_filename))
+    names = reader.getNames()
+    reader.close()
+    return names
+  if pattern is None:
+    pattern = os.path.join("**", "*" + XML_EXTENSION)
+  paths = glob.glob(os.path.join(glob.escape(data_dir), pattern), recursive=True)
+  return sorted(os.path.relpath(path, data_dir) for path in paths
+      if os.path.isfile(path))
+
+def readFile(path):
+  """
+  Reads a file with a single read.
+  :param str path:
+  :return bytes:
+  """
+  with open(path, 'rb') as fd:
+    return fd.read()
+
+def readDocument(filename, data_dir=cn.BIOMODELS_DIR,
     zip_filename=cn.BIOMODELS_ZIP_FILENAME):
   """
-  Iterates across all models in a data directory.
+  Reads an SBML document of a zip file, with the reader of the process,
+  or of a directory.
+  :param str filename: name of the member of the zip file, or path of the 
+      file relative to data_dir
+  :param str data_dir: absolute path of the directory containing
+      the zip file or the xml files
+  :param str zip_filename: name of the zipfile. 
+      If None, then reads the file in the directory.
+  :return bytes:
+  """
+  if zip_filename is not None:
+    return getZipReader(os.path.join(data_dir, zip_filename)).read(filename)
+  return readFile(os.path.join(data_dir, filename))
+
+def contentIterator(initial=0, final=1000,
+    data_dir=cn.BIOMODELS_DIR,
+    zip_filename=cn.BIOMODELS_ZIP_FILENAME,
+    prefetch=PREFETCH, pattern=None, filenames=None):
+  """
+  Iterates across the raw SBML documents of a zip file or of a directory.
+  The documents are bytes, decoded only when the model is built, 
+  and the next ones are read ahead while the current one is processed.
   :param int initial: initial file to process
   :param int final: final file to process
   :param str data_dir: absolute path of the 
       directory containing
-      the xml files
+      the zip file or the xml files
   :param str zip_filename: name of the zipfile to process. 
       If None, then looks for XML files in the directory.
-  :return IteratorItem:
+  :param int prefetch: number of documents read ahead
+  :param str pattern: glob pattern of the files relative to data_dir
+      (see getDocumentNames)
+  :param list-str filenames: documents to process in this order, members of 
+      the zip file or paths relative to data_dir; all the documents if None
+  :return ContentItem:
   """
-  files, zipper = getZipfilePaths(
-      data_dir=data_dir, zip_filename=zip_filename)
-  # Functions for file types
-  def readXML(filename):
-    path = os.path.join(data_dir, filename)
-    with open(path, 'r') as fd:
-      lines = ''.join(fd.readlines())
-    return lines
-  def readZip(filename):
-    with zipper.open(filename, 'r') as fid:
-      lines = fid.read()
-    return lines
-  #
+  if filenames is None:
+    files = getDocumentNames(data_dir=data_dir, zip_filename=zip_filename,
+        pattern=pattern)
+  else:
+    files = list(filenames)
   if zip_filename is not None:
-    read_func = readZip
+    reader = ZipReader(os.path.join(data_dir, zip_filename))
+    read_func = reader.read
   else:
-    read_func = readXML
+    read_func = lambda filename: readFile(os.path.join(data_dir, filename))
   begin_num = max(initial, 0)
-  num = begin_num - 1
   end_num = min(len(files), final)
-  for filename in files[begin_num:end_num]:
-    num += 1
-    lines = read_func(filename)
-    if isinstance(lines, bytes):
-      lines = lines.decode("utf-8") 
-    try:
-      #model could be invalid sbml
-      model = SimpleSBML(lines)
-      iterator_item = IteratorItem(filename=filename,
-      model=model, number=num)
-    except Exception as e:
-      print(e)
-      iterator_item = None
-    yield iterator_item
+  def readItem(num):
+    filename = files[num]
+    return ContentItem(filename=filename, number=num, content=read_func(filename))
+  try:
+    for content_item in iterPrefetched(readItem, range(begin_num, end_num),
+        prefetch=prefetch):
+      yield content_item
+  finally:
+    if zip_filename is not None:
+      reader.close()
+
+def modelIterator(initial=0, final=1000,
+    data_dir=cn.BIOMODELS_DIR,
+    zip_filename=cn.BIOMODELS_ZIP_FILENAME,
+    pattern=None, filenames=None):
+  """
+  Iterates across all models in a data directory.
+  :param int initial: initial file to process
+  :param int final: final file to process
+  :param str data_dir: absolute path of the 
+      directory containing
+      the zip file or the xml files
+  :param str zip_filename: name of the zipfile to process. 
+      If None, then looks for XML files in the directory.
+  :param str pattern: glob pattern of the files relative to data_dir
+      (see getDocumentNames)
+  :param list-str filenames: documents to process in this order
+      (see contentIterator)
+  :return IteratorItem:
+  """
+  for content_item in contentIterator(initial=initial, final=final,
+      data_dir=data_dir, zip_filename=zip_filename, pattern=pattern,
+      filenames=filenames):
+    yield mkIteratorItem(content_item)
+
+def mkIteratorItem(content_item, lazy=False):
+  """
+  Creates the model of a raw SBML document.
+  :param ContentItem content_item:
+  :param bool lazy: see SimpleSBML
+  :return IteratorItem: None if the model is invalid
+  """
+  try:
+    #model could be invalid sbml
+    model = SimpleSBML(content_item.content, lazy=lazy)
+    iterator_item = IteratorItem(filename=content_item.filename,
+    model=model, number=content_item.number)
+  except Exception as e:
+    print(e)
+    iterator_item = None
+  return iterator_item
@@ -10,6 +10,19 @@ TYPE_XML = "type_xml"
 TYPE_FILENAME = "type_filename"
 XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>'
 DEFAULT_MSG = "An error occurred in an input file."
+XML_PROBE_LENGTH = 1024 # Characters tested to tell an XML string from a path
+
+def isXMLString(model_reference):
+  """
+  Tests if a string is an XML document rather than a file path, i.e. its
+  first character other than a blank or a byte order mark is "<".
+  :param str/bytes model_reference:
+  :return bool:
+  """
+  head = model_reference[:XML_PROBE_LENGTH]
+  if isinstance(head, str):
+    return head.lstrip("\ufeff \t\r\n").startswith("<")
+  return bytes(head).lstrip(b"\xef\xbb\xbf \t\r\n").startswith(b"<")
 
 def getXML(model_reference):
   """
@@ -18,22 +31,24 @@ def getXML(model_reference):
       or TextIOWrapper
           and the file may be an xml file or an antimony file.
       if it is a model string, it may be an xml string or antimony.
+      bytes and buffers, e.g. memoryview, are decoded as UTF-8.
+      An XML string is not probed as a file path.
   :raises IOError: Error encountered reading the SBML document
   :return str SBML xml"
   """
   # Check for a file path
   model_str = ""
+  if isinstance(model_reference, (bytes, bytearray, memoryview)):
+    model_reference = str(model_reference, "utf-8")
   if isinstance(model_reference, str):
-    if os.path.isfile(model_reference):
+    if not isXMLString(model_reference) and os.path.isfile(model_reference):
       with open(model_reference, 'r') as fd:
-        lines = fd.readlines()
-      model_str = ''.join(lines)
+        model_str = fd.read()
   if len(model_str) == 0:
-    if "readlines" in dir(model_reference):
-      lines = model_reference.readlines()
-      if isinstance(lines[0], bytes):
-        lines = [l.decode("utf-8") for l in lines]
-      model_str = ''.join(lines)
+    if hasattr(model_reference, "read"):
+      model_str = model_reference.read()
+      if isinstance(model_str, bytes):
+        model_str = model_str.decode("utf-8")
       model_reference.close()
     else:
       # Must be a string representation of a model
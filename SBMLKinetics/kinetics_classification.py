@@ -11,6 +11,10 @@ from isort import file
 from sympy.core import parameters
 from SBMLKinetics.common.simple_sbml import SimpleSBML
 import SBMLKinetics.common.simple_sbml as simple_sbml
+from SBMLKinetics.common import classification_cache
+from SBMLKinetics.common import exceptions
+from SBMLKinetics.common.kinetic_law import KineticsContext, ReactionFeatures
+from SBMLKinetics.common import kinetics_rules
 import SBMLKinetics.common.constants as cn
 import sys
 
@@ -21,7 +25,15 @@ from sympy import *
 from libsbml import * # access functions in SBML
 import time
 
+import builtins
 import collections
+import concurrent.futures
+import copy
+import functools
+import keyword
+import re
+import signal
+import threading
 import pandas as pd
 import math
 import matplotlib.pyplot as plt
@@ -51,32 +63,849 @@ HILL = "Hill equations"
 FR = "Fraction" #kinetics in fraction format other than MM, MMCAT, HILL
 PL = "Polynomial"
 NA = 'NA'
+TIMEOUT = 'Timeout' #reactions classified as NA because they exceeded the time budget
 PERCENTAGE = 'Percentage'
 PERCENTAGE_SDER = 'Percentage standard error'
 PERCENTAGE_PER_MODEL = 'Percentage per model'
 PERCENTAGE_PER_MODEL_SDER = 'Percentage per model standard error'
 RXN_NUM = 'Reaction number'
+RCT_NUM = 'Reactant number'
+PRD_NUM = 'Product number'
 BIOMOL_NUM = 'Biomodel number'
-COLUMN_NAME_df_classification = [SBMLID, REACTIONID, CLASSIFICATIONS, REACTION, KINETICLAW,
-                ZEROTH, UNI, UNIMOD, BI, BIMOD, MM, MMCAT, HILL, FR, NA]
+#rules of the kinetics types, in the order of precedence. Custom kinetics types
+#are added with registerClassifier.
+#The classifiers of the mass action types are False if a species is in the
+#denominator, those of the fraction types are False otherwise.
+K_TYPE_RULES = kinetics_rules.RuleEngine([
+    kinetics_rules.Rule("ZERO", (("num_species", 0),), "isZerothOrder",
+        priority=10, cost=kinetics_rules.COST_CHEAP, column=ZEROTH),
+    kinetics_rules.Rule("UNDR", (("species_in_denominator", False),), "isUNDR",
+        priority=20, column=UNI),
+    kinetics_rules.Rule("UNMO", (("species_in_denominator", False),), "isUNMO",
+        priority=30, column=UNIMOD),
+    kinetics_rules.Rule("BIDR", (("species_in_denominator", False),), "isBIDR",
+        priority=40, column=BI),
+    kinetics_rules.Rule("BIMO", (("species_in_denominator", False),), "isBIMO",
+        priority=50, column=BIMOD),
+    kinetics_rules.Rule("MM", (("num_species", 1), ("num_reactants", 1),
+        ("species_in_denominator", True)), "isMM",
+        priority=60, cost=kinetics_rules.COST_SYMBOLIC, column=MM),
+    kinetics_rules.Rule("MMCAT", (("num_species", 2), ("num_reactants", 1),
+        ("species_in_denominator", True)), "isMMcat",
+        priority=70, cost=kinetics_rules.COST_SYMBOLIC, column=MMCAT),
+    kinetics_rules.Rule("HILL", (("num_species", 1), ("species_in_denominator", True)),
+        "isHill", priority=80, column=HILL),
+    kinetics_rules.Rule("FR", (("species_in_denominator", True),), "isFraction",
+        priority=90, column=FR),
+    ])
+#rules of the types that are not classified by default, see registerClassifier
+POWER_TERMS_RULE = kinetics_rules.Rule("POWER", (), "isPowerTerms",
+    priority=15, column=POWER)
+POLYNOMIAL_RULE = kinetics_rules.Rule("PL", (("species_in_denominator", False),),
+    "isPolynomial", priority=95, cost=kinetics_rules.COST_SYMBOLIC, column=PL)
+
+#all the lists are following the same order of kinetics classifications, they
+#are updated in place when a classifier is registered
+TYPES_NAME = K_TYPE_RULES.names + [NA]
+_DEFAULT_TYPES_NAME = list(TYPES_NAME)
+COLUMN_NAME_df_classification = [SBMLID, REACTIONID, CLASSIFICATIONS, REACTION, KINETICLAW] \
+    + K_TYPE_RULES.columns + [NA, TIMEOUT]
+#flag columns of df_classification for each type, in the order of TYPES_NAME
+FLAG_COLUMN_NAME_df_classification = COLUMN_NAME_df_classification[5:-1]
+#df_classification is typed: categorical SBMLid and Classifications, boolean
+#flags and int8 reactant and product numbers. mkLegacyClassification gives the
+#string layout of COLUMN_NAME_df_classification, with 'x' flags.
+COLUMN_NAME_df_classification_typed = COLUMN_NAME_df_classification + [RCT_NUM, PRD_NUM]
 
 COLUMN_NAME_df_gen_stat = [CLASSIFICATIONS, PERCENTAGE, \
  PERCENTAGE_PER_MODEL, PERCENTAGE_PER_MODEL_SDER, RXN_NUM, BIOMOL_NUM]
 
-COLUMN_NAME_df_mol_stat = [SBMLID, RXN_NUM, ZEROTH, UNI, UNIMOD, BI, BIMOD, MM, MMCAT, HILL, FR, NA]
+COLUMN_NAME_df_mol_stat = [SBMLID, RXN_NUM] + K_TYPE_RULES.columns + [NA]
+
+
+# Version of the classification rules, change it when the classification of a
+# reaction changes so that the rows in the persistent cache are recomputed
+CLASSIFIER_VERSION = "2"
+
+
+def _updateTypes():
+  """
+  Updates in place the lists of the kinetics types and of the columns of the
+  tables for the rules of K_TYPE_RULES. The classifications cached in this
+  process are cleared, since the indices of the types may change.
+  """
+  TYPES_NAME[:] = K_TYPE_RULES.names + [NA]
+  COLUMN_NAME_df_classification[5:-2] = K_TYPE_RULES.columns
+  FLAG_COLUMN_NAME_df_classification[:] = COLUMN_NAME_df_classification[5:-1]
+  COLUMN_NAME_df_classification_typed[:] = COLUMN_NAME_df_classification + [RCT_NUM, PRD_NUM]
+  COLUMN_NAME_df_mol_stat[2:-1] = K_TYPE_RULES.columns
+  setFingerprintCacheSize(_fingerprint_cache.maxsize)
+
+
+def registerClassifier(rule):
+  """
+  Adds a kinetics type to the classification. The type is reported in all
+  the tables, with the column of the rule. The rule must be registered in the
+  worker processes too, i.e. when this module is imported if they are spawned.
+
+  The classifiers run once per fingerprint of the reactions (see _mkFingerprint)
+  and their result is reused for all the reactions with the fingerprint. The
+  keyword arguments of a classifier are those of the canonical kinetic law: the
+  kinetics and the lists of ids hold the placeholders _x0, _x1, ... instead of
+  the ids of the reaction. A classifier must therefore only depend on the
+  structure of the kinetic law, not on the names of its species or parameters.
+
+  input
+  -------
+  rule: kinetics_rules.Rule-e.g. POWER_TERMS_RULE, POLYNOMIAL_RULE, or a rule
+    with a function(kinetic_law, **kwargs) as classifier.
+
+  Raises
+  -------
+  ValueError if the rule is not valid or its name is registered.
+  """
+  K_TYPE_RULES.register(rule)
+  _updateTypes()
+
+
+def unregisterClassifier(name):
+  """
+  Removes a kinetics type from the classification.
+
+  input
+  -------
+  name: str-kinetics type, e.g. "POWER".
+  """
+  K_TYPE_RULES.unregister(name)
+  _updateTypes()
+
+
+def getClassifierVersion():
+  """
+  Version of the classification in the persistent cache: CLASSIFIER_VERSION,
+  with the kinetics types if they are not the default ones.
+
+  Returns
+  -------
+  str
+  """
+  if TYPES_NAME == _DEFAULT_TYPES_NAME:
+    return CLASSIFIER_VERSION
+  return "%s-%s" % (CLASSIFIER_VERSION, "-".join(TYPES_NAME))
+
+# Classification of one reaction, produced per model and merged across models
+# reaction_id: str-id of the reaction
+# classification: int-index of the kinetics type in TYPES_NAME
+# reaction: str-reactants->products
+# kinetic_law: str-expanded kinetic law
+# num_rcts: int-number of reactants
+# num_prds: int-number of products
+# timeout: bool-the reaction exceeded the time budget and is classified as NA
+ReactionRecord = collections.namedtuple('ReactionRecord',
+    'reaction_id classification reaction kinetic_law num_rcts num_prds timeout',
+    defaults=(False,))
+
+# Classified reaction of a model, yielded by iterClassifications
+# sbml_id: str-file name of the model
+# the other fields are those of ReactionRecord
+ClassifiedReaction = collections.namedtuple('ClassifiedReaction',
+    ('sbml_id',) + ReactionRecord._fields)
+
+
+# Maximum number of canonical kinetic laws whose simplification is cached
+SIMPLIFY_CACHE_SIZE = 4096
+# Identifiers in a kinetic law; numbers such as 1e-3 are not matched
+_IDENTIFIER_PATTERN = re.compile(r"(?<![\w.])[A-Za-z_]\w*(?!\w*\s*\()")
+# Names with a meaning for sympify, these are kept in the canonical form
+_SYMPIFY_NAMES = set()
+_SYMPIFY_NAMES_LOCK = threading.Lock()
+
+
+def _mkSympifyNames():
+  """
+  Names that sympify does not turn into plain symbols.
+
+  Returns
+  -------
+  set-str
+  """
+  namespace = {}
+  exec("from sympy import *", namespace)
+  return set(namespace.keys()) | set(vars(builtins).keys()) | set(keyword.kwlist)
+
+
+def _canonicalizeKinetics(kinetics, other_ids=(), by_occurrence=False):
+  """
+  Replace the identifiers of a kinetic law by positional placeholders. The
+  placeholders are numbered in the sorted order of the identifiers so that
+  sympy orders the terms in the same way as for the original names.
+  Function names and names known to sympify are kept.
+
+  input
+  -------
+  kinetics: str-kinetic law.
+  other_ids: iterable-str of ids that are numbered with those of the kinetic law,
+    e.g. the reactants and products.
+  by_occurrence: bool-number the identifiers in their order of occurrence instead,
+    so that the same law with other names has the same canonical form.
+
+  Returns
+  -------
+  str-canonical kinetic law.
+  dict-key: str placeholder, value: str identifier.
+  """
+  if len(_SYMPIFY_NAMES) == 0:
+    # filled once, by the first thread
+    with _SYMPIFY_NAMES_LOCK:
+      if len(_SYMPIFY_NAMES) == 0:
+        _SYMPIFY_NAMES.update(_mkSympifyNames())
+  ids = list(dict.fromkeys(id for id in
+      _IDENTIFIER_PATTERN.findall(kinetics) + list(other_ids)
+      if id not in _SYMPIFY_NAMES))
+  if not by_occurrence:
+    ids.sort()
+  width = len(str(len(ids)))
+  placeholder_dct = {id: "_x%0*d" % (width, i) for i, id in enumerate(ids)}
+  canonical = _IDENTIFIER_PATTERN.sub(
+      lambda match: placeholder_dct.get(match.group(0), match.group(0)), kinetics)
+  return canonical, {v: k for k, v in placeholder_dct.items()}
+
+
+def _simplifyCanonical(canonical):
+  """
+  Simplify a canonical kinetic law. Wrapped by an LRU cache.
+
+  Returns
+  -------
+  sympy expression or None if the kinetic law cannot be simplified.
+  """
+  try:
+    return simplify(canonical)
+  except exceptions.ClassificationTimeout:
+    # not a property of the kinetic law, so it must not be cached
+    raise
+  except:
+    return None
+
+_simplifyCanonicalCached = functools.lru_cache(maxsize=SIMPLIFY_CACHE_SIZE)(_simplifyCanonical)
+
+
+def _simplifyKinetics(kinetics):
+  """
+  Simplify a kinetic law. Structurally identical kinetic laws, which only
+  differ by their identifiers, are simplified once.
+
+  input
+  -------
+  kinetics: str-kinetic law.
+
+  Returns
+  -------
+  str-simplified kinetic law, kinetics itself if it cannot be simplified.
+  """
+  if not isinstance(kinetics, str):
+    expression = _simplifyCanonical(kinetics)
+    return kinetics if expression is None else str(expression)
+  canonical, id_dct = _canonicalizeKinetics(kinetics)
+  expression = _simplifyCanonicalCached(canonical)
+  if expression is None:
+    return kinetics
+  try:
+    return str(expression.xreplace({Symbol(k): Symbol(v) for k, v in id_dct.items()}))
+  except:
+    return kinetics
+
+
+def simplifyCacheInfo():
+  """
+  Hits, misses and size of the cache of simplified kinetic laws in this process.
+
+  Returns
+  -------
+  functools._CacheInfo-(hits, misses, maxsize, currsize).
+  """
+  return _simplifyCanonicalCached.cache_info()
+
+
+def setSimplifyCacheSize(maxsize = SIMPLIFY_CACHE_SIZE):
+  """
+  Resize the cache of simplified kinetic laws, which clears it.
+
+  input
+  -------
+  maxsize: int-maximum number of cached kinetic laws, None for unbounded.
+  """
+  global _simplifyCanonicalCached
+  _simplifyCanonicalCached = functools.lru_cache(maxsize=maxsize)(_simplifyCanonical)
+
+
+# Maximum number of fingerprints whose kinetics type is cached
+FINGERPRINT_CACHE_SIZE = 65536
+
+# Inputs of the classifiers of a reaction, with the ids replaced by the
+# placeholders of _canonicalizeKinetics. Kinetic laws with the same structure
+# and roles of their species and parameters have the same fingerprint, e.g.
+# "k1*A" for the reactant A and "kf*S" for the reactant S.
+# kinetics: str-canonical expanded kinetic law
+# reactant_list, product_list, species_in_kinetic_law, parameters_in_kinetic_law,
+# ids_list: tuple-str of placeholders, in the order of the reaction
+Fingerprint = collections.namedtuple('Fingerprint',
+    'kinetics reactant_list product_list species_in_kinetic_law '
+    'parameters_in_kinetic_law ids_list')
+
+# Report of the reuse of the classifications of fingerprints
+# hits: int-reactions classified with the kinetics type of their fingerprint
+# misses: int-reactions whose fingerprint was classified
+# dedup_ratio: float-fraction of the reactions whose classification was skipped
+FingerprintCacheInfo = collections.namedtuple('FingerprintCacheInfo',
+    'hits misses maxsize currsize dedup_ratio')
+
+
+class _FingerprintCache(object):
+  """
+  Least recently used cache of the kinetics type of each fingerprint,
+  shared by the threads of a process.
+  """
+
+  def __init__(self, maxsize=FINGERPRINT_CACHE_SIZE):
+    """
+    input
+    -------
+    maxsize: int-maximum number of fingerprints, None for unbounded.
+    """
+    self.maxsize = maxsize
+    self.hits = 0
+    self.misses = 0
+    self._classifications = collections.OrderedDict()
+    self._lock = threading.Lock()
+
+  def get(self, fingerprint):
+    """
+    Returns
+    -------
+    int-index of the kinetics type in TYPES_NAME; None if not cached.
+    """
+    with self._lock:
+      classification = self._classifications.get(fingerprint)
+      if classification is None:
+        self.misses += 1
+      else:
+        self.hits += 1
+        self._classifications.move_to_end(fingerprint)
+      return classification
+
+  def put(self, fingerprint, classification):
+    with self._lock:
+      self._classifications[fingerprint] = classification
+      if self.maxsize is not None and len(self._classifications) > self.maxsize:
+        self._classifications.popitem(last=False)
+
+  def getInfo(self):
+    """
+    Returns
+    -------
+    FingerprintCacheInfo
+    """
+    with self._lock:
+      num_reaction = self.hits + self.misses
+      dedup_ratio = self.hits/num_reaction if num_reaction > 0 else 0.
+      return FingerprintCacheInfo(hits=self.hits, misses=self.misses,
+          maxsize=self.maxsize, currsize=len(self._classifications),
+          dedup_ratio=dedup_ratio)
+
+_fingerprint_cache = _FingerprintCache()
+
+
+def fingerprintCacheInfo():
+  """
+  Dedup report of the classifications in this process: the reactions whose
+  kinetics type was reused from another reaction with the same fingerprint.
+
+  Returns
+  -------
+  FingerprintCacheInfo-(hits, misses, maxsize, currsize, dedup_ratio).
+  """
+  return _fingerprint_cache.getInfo()
+
+
+def setFingerprintCacheSize(maxsize = FINGERPRINT_CACHE_SIZE):
+  """
+  Resize the cache of the kinetics types of the fingerprints, which clears it
+  and its report.
+
+  input
+  -------
+  maxsize: int-maximum number of fingerprints, None for unbounded.
+  """
+  global _fingerprint_cache
+  _fingerprint_cache = _FingerprintCache(maxsize)
+
+
+def _mkFingerprint(kinetics, reactant_list, product_list, species_in_kinetic_law,
+    parameters_in_kinetic_law, ids_list):
+  """
+  Fingerprint of the inputs of the classifiers of a reaction.
+
+  input
+  -------
+  kinetics: str-expanded kinetic law.
+  reactant_list, product_list, species_in_kinetic_law, parameters_in_kinetic_law:
+    list-str, see _classifyReaction.
+  ids_list: list-str of all the ids in the kinetics, reactants and products.
+
+  Returns
+  -------
+  Fingerprint
+  """
+  canonical, placeholder_dct = _canonicalizeKinetics(kinetics, other_ids=ids_list,
+      by_occurrence=True)
+  id_dct = {v: k for k, v in placeholder_dct.items()}
+  def mkCanonical(ids):
+    return tuple(id_dct.get(id, id) for id in ids)
+  return Fingerprint(kinetics=canonical, reactant_list=mkCanonical(reactant_list),
+      product_list=mkCanonical(product_list),
+      species_in_kinetic_law=mkCanonical(species_in_kinetic_law),
+      parameters_in_kinetic_law=mkCanonical(parameters_in_kinetic_law),
+      ids_list=mkCanonical(ids_list))
+
+
+class _ReactionBudget(object):
+  """
+  Wall-clock budget for the classification of one reaction, used as a
+  context manager around the classification. Where SIGALRM is available in
+  the main thread, a timer raises ClassificationTimeout in the block once
+  the budget is exhausted, and repeats so that the timeout escapes the bare
+  excepts of the classifiers. Elsewhere the budget is only enforced by check().
+  """
+  # Seconds between the repeated timeouts once the budget is exhausted
+  REPEAT_INTERVAL = 0.05
+
+  def __init__(self, seconds=None):
+    """
+    input
+    -------
+    seconds: float-the budget; None for no limit.
+    """
+    self.seconds = seconds
+    self.expired = False
+    self._deadline = None
+    self._is_active = False
+    self._is_alarmed = False
+    self._old_handler = None
+
+  def _canAlarm(self):
+    return hasattr(signal, "setitimer") \
+        and threading.current_thread() is threading.main_thread()
+
+  def _onAlarm(self, signum, frame):
+    if self._is_active:
+      self.expired = True
+      raise exceptions.ClassificationTimeout()
+
+  def check(self):
+    """
+    Raises ClassificationTimeout if the budget is exhausted.
+    """
+    if self._deadline is not None and time.monotonic() > self._deadline:
+      self.expired = True
+    if self._is_active and self.expired:
+      raise exceptions.ClassificationTimeout()
+
+  def __enter__(self):
+    self.expired = False
+    if self.seconds is None:
+      return self
+    self._deadline = time.monotonic() + self.seconds
+    if self._canAlarm():
+      self._is_alarmed = True
+      self._old_handler = signal.signal(signal.SIGALRM, self._onAlarm)
+      signal.setitimer(signal.ITIMER_REAL, max(self.seconds, 1e-6), self.REPEAT_INTERVAL)
+    # activate last so that no timeout is raised before the block
+    self._is_active = True
+    return self
+
+  def _stop(self):
+    # deactivate first so that a pending alarm is ignored
+    self._is_active = False
+    self._deadline = None
+    if self._is_alarmed:
+      signal.setitimer(signal.ITIMER_REAL, 0)
+      signal.signal(signal.SIGALRM, self._old_handler)
+      self._is_alarmed = False
+      self._old_handler = None
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    if self.seconds is None:
+      return False
+    self._stop()
+    return exc_type is exceptions.ClassificationTimeout
+
+
+def _classifyModel(simple, reaction_timeout=None):
+  """
+  Classify the kinetics of every reaction in a model.
+
+  input
+  -------
+  simple: SimpleSBML-the model to classify.
+  reaction_timeout: float-wall-clock budget in seconds to classify a reaction;
+    a reaction exceeding it is classified as NA with its timeout flag set.
+    None (default) for no limit.
+
+  Returns
+  -------
+  list-ReactionRecord in the order of the reactions in the model.
+  """
+  return list(_iterClassifyModel(simple, reaction_timeout=reaction_timeout))
+
+
+def _iterClassifyModel(simple, reaction_timeout=None):
+  """
+  Iterates across the classified reactions of a model, each one is yielded
+  as soon as it is classified. See _classifyModel.
+
+  Returns
+  -------
+  ReactionRecord in the order of the reactions in the model.
+  """
+  types_simplified_name = TYPES_NAME[:-1]
+  num_type_classification = len(types_simplified_name)
+
+  budget = _ReactionBudget(reaction_timeout)
+  for reaction in simple.reactions:
+    reactant_list = [r.getSpecies() for r in reaction.reactants]
+    product_list = [p.getSpecies() for p in reaction.products]
+
+    reactant_stg = " + ".join(
+      [r.getSpecies() for r in reaction.reactants])
+    product_stg = " + ".join(
+      [p.getSpecies() for p in reaction.products])
+
+    reaction_str = reactant_stg + "->" + product_stg
+
+    classification = num_type_classification #not classified
+    try:
+      with budget:
+        classification = _classifyReaction(simple, reaction, reactant_list, 
+            product_list, budget)
+    except exceptions.ClassificationTimeout:
+      # The alarm fired after the block, in __exit__, before the timer was
+      # stopped: the reaction is reported as a timeout
+      budget._stop()
+      budget.expired = True
+    if budget.expired:
+      classification = num_type_classification
+
+    yield ReactionRecord(reaction_id=reaction.getId(),
+        classification=classification, reaction=reaction_str,
+        kinetic_law=reaction.kinetic_law.expanded_formula,
+        num_rcts=len(reactant_list), num_prds=len(product_list),
+        timeout=budget.expired)
+
+
+def _classifyReaction(simple, reaction, reactant_list, product_list, budget):
+  """
+  Classify the kinetics of a reaction. The classifiers run once per
+  fingerprint of the reactions, on its canonical kinetic law, and the
+  kinetics type is reused for the other reactions with the fingerprint.
+
+  input
+  -------
+  simple: SimpleSBML-the model of the reaction.
+  reaction: Reaction-the reaction to classify.
+  reactant_list: list-reactants of the reaction.
+  product_list: list-products of the reaction.
+  budget: _ReactionBudget-checked before each classifier.
+
+  Returns
+  -------
+  int-index of the kinetics type in TYPES_NAME.
+  """
+  kinetics = reaction.kinetic_law.mkSymbolExpression(simple.function_definitions)
+  budget.check()
+
+  ids_list = []
+  species_in_kinetic_law = []
+  parameters_in_kinetic_law = []
+  others_in_kinetic_law = []
+
+  symbol_types = reaction.kinetic_law.getSymbolTypes(simple)
+  for symbol, symbol_type in symbol_types.items():
+    # Functions are expanded in the kinetics
+    if symbol_type == cn.SYMBOL_FUNCTION:
+      continue
+    ids_list.append(symbol)
+    if symbol_type == cn.SYMBOL_SPECIES:
+      species_in_kinetic_law.append(symbol)
+    # Local parameters are listed after the parameters of the model
+    elif (symbol_type == cn.SYMBOL_PARAMETER)  \
+        and (symbol in simple.parameter_dct):
+      parameters_in_kinetic_law.append(symbol)
+    else:
+      others_in_kinetic_law.append(symbol)
+
+  parameters_in_kinetic_law = parameters_in_kinetic_law + others_in_kinetic_law
+
+  #only for MM, MMcat and FR
+  if len(reactant_list) != 0:
+    ids_list += reactant_list # some rcts/prds also needs symbols definition
+  if len(product_list) != 0:
+    ids_list += product_list
+  ids_list = list(dict.fromkeys(ids_list))
+
+  fingerprint = _mkFingerprint(kinetics, reactant_list, product_list,
+      species_in_kinetic_law, parameters_in_kinetic_law, ids_list)
+  classification = _fingerprint_cache.get(fingerprint)
+  if classification is None:
+    classification = _classifyFingerprint(reaction.kinetic_law, fingerprint, budget)
+    # not reached on a timeout, which is not a property of the fingerprint
+    _fingerprint_cache.put(fingerprint, classification)
+  return classification
+
+
+def _classifyFingerprint(kinetic_law, fingerprint, budget):
+  """
+  Classify the canonical kinetic law of a fingerprint.
+
+  input
+  -------
+  kinetic_law: KineticLaw-provides the classifiers.
+  fingerprint: Fingerprint
+  budget: _ReactionBudget-checked before each classifier.
+
+  Returns
+  -------
+  int-index of the kinetics type in TYPES_NAME.
+  """
+  kinetics = fingerprint.kinetics
+  kinetics_sim = _simplifyKinetics(kinetics)
+  budget.check()
+
+  #Define the keyword arguments
+  ids_list = list(fingerprint.ids_list)
+  kwargs = {"kinetics": kinetics, "kinetics_sim": kinetics_sim, \
+    "reactant_list": list(fingerprint.reactant_list), \
+    "product_list": list(fingerprint.product_list), \
+    "species_in_kinetic_law": list(fingerprint.species_in_kinetic_law), \
+    "parameters_in_kinetic_law": list(fingerprint.parameters_in_kinetic_law), \
+    "ids_list": ids_list}
+  #parse the kinetics and compute its features once for all the classifiers
+  kwargs["context"] = KineticsContext(kinetics=kinetics, kinetics_sim=kinetics_sim,
+      ids_list=ids_list)
+  kwargs["features"] = ReactionFeatures.fromKwargs(kwargs)
+
+  return K_TYPE_RULES.classify(kinetic_law, check=budget.check, **kwargs)
+
+
+def _classifyMember(args):
+  """
+  Classify the model of a document of a zip file or of a directory. Used by
+  the worker processes of _dataSetStatistics, which read a zip file with their
+  own handle.
+
+  input
+  -------
+  args: tuple-(data_dir, zip_filename, filename, model_number, reaction_timeout).
+
+  Returns
+  -------
+  (str-filename, list-ReactionRecord) or None if the model has an error.
+  """
+  data_dir, zip_filename, filename, model_number, reaction_timeout = args
+  content = simple_sbml.readDocument(filename, data_dir=data_dir, zip_filename=zip_filename)
+  item = simple_sbml.mkIteratorItem(simple_sbml.ContentItem(filename=filename,
+      number=model_number, content=content))
+  if item is None:
+    return None
+  return item.filename, _classifyModel(item.model, reaction_timeout=reaction_timeout)
+
+
+def _iterClassifiedModels(data_dir, zip_filename, initial_model_indx, final_model_indx,
+    workers=1, cache_path=None, reaction_timeout=None, use_threads=False):
+  """
+  Iterates across the classified models of a zip file in file order.
+
+  input
+  -------
+  data_dir: folder path.
+  zip_filename: str-zip file name; None for the XML files of data_dir.
+  initial_model_indx: int-the intial BioModel to process.
+  final_model_indx: int-the final BioModel to process.
+  workers: int-number of processes classifying models; 1 classifies in this process.
+  cache_path: str-path of the persistent cache of the classifications; None for no cache.
+  reaction_timeout: float-wall-clock budget in seconds to classify a reaction; None for no limit.
+  use_threads: bool-the workers are threads of this process instead of processes.
+
+  Returns
+  -------
+  (str-filename, list-ReactionRecord) or None for a model with an error.
+  """
+  if cache_path is None:
+    iterator = _iterUncachedModels(data_dir, zip_filename, initial_model_indx,
+        final_model_indx, workers=workers, reaction_timeout=reaction_timeout,
+        use_threads=use_threads)
+  else:
+    iterator = _iterCachedModels(data_dir, zip_filename, initial_model_indx,
+        final_model_indx, workers=workers, cache_path=cache_path,
+        reaction_timeout=reaction_timeout, use_threads=use_threads)
+  for item in iterator:
+    yield item
+
+
+def _iterUncachedModels(data_dir, zip_filename, initial_model_indx, final_model_indx,
+    workers=1, reaction_timeout=None, use_threads=False):
+  """
+  Iterates across the classified models of a zip file, classifying all of them.
+  See _iterClassifiedModels.
+  """
+  if workers is None or workers <= 1:
+    iterator = simple_sbml.modelIterator(initial=initial_model_indx, final=final_model_indx,
+    data_dir = data_dir, zip_filename = zip_filename)
+    for item in iterator:
+      if item is None:
+        yield None
+      else:
+        yield item.filename, _classifyModel(item.model, reaction_timeout=reaction_timeout)
+  else:
+    files = simple_sbml.getDocumentNames(data_dir=data_dir, zip_filename=zip_filename)
+    members = [(files[n], n) for n 
+        in range(max(initial_model_indx, 0), min(len(files), final_model_indx))]
+    for result in _mapClassifyMembers(data_dir, zip_filename, members, workers,
+        reaction_timeout=reaction_timeout, use_threads=use_threads):
+      yield result
+
+
+def _mapClassifyMembers(data_dir, zip_filename, members, workers,
+    reaction_timeout=None, use_threads=False):
+  """
+  Classify the models of documents of a zip file or of a directory in a
+  pool of processes or threads. Only the names of the documents are sent to
+  the workers.
+
+  input
+  -------
+  members: list-(str-filename, int-model number).
+  use_threads: bool-classify in a thread pool instead of a process pool.
+
+  Returns
+  -------
+  (str-filename, list-ReactionRecord) or None in the order of members.
+  """
+  args_list = [(data_dir, zip_filename, filename, n, reaction_timeout)
+      for filename, n in members]
+  # map keeps the file order so that the merge is identical to the serial path
+  if use_threads:
+    executor_class = concurrent.futures.ThreadPoolExecutor
+  else:
+    executor_class = concurrent.futures.ProcessPoolExecutor
+  with executor_class(max_workers=workers) as executor:
+    for result in executor.map(_classifyMember, args_list):
+      yield result
+
+
+def _iterCachedModels(data_dir, zip_filename, initial_model_indx, final_model_indx,
+    workers=1, cache_path=None, reaction_timeout=None, use_threads=False):
+  """
+  Iterates across the classified models of a zip file. The models are looked
+  up by the hash of their SBML document in the persistent cache and only the
+  new or modified models are classified and stored. A model with a reaction
+  that exceeded the time budget is not stored. See _iterClassifiedModels.
+  """
+  with classification_cache.ClassificationCache(cache_path, getClassifierVersion()) as cache:
+    content_iterator = simple_sbml.contentIterator(initial=initial_model_indx,
+        final=final_model_indx, data_dir=data_dir, zip_filename=zip_filename)
+    if workers is None or workers <= 1:
+      for content_item in content_iterator:
+        sha = classification_cache.hashContent(content_item.content)
+        try:
+          rows = cache.get(sha)
+        except KeyError:
+          item = simple_sbml.mkIteratorItem(content_item)
+          if item is None:
+            result = None
+          else:
+            result = item.filename, _classifyModel(item.model,
+                reaction_timeout=reaction_timeout)
+          _putClassifiedModel(cache, sha, result)
+          yield result
+        else:
+          yield _mkClassifiedModel(content_item.filename, rows)
+    else:
+      # look up all the models first so that the misses are classified in parallel
+      entries = [] #(filename, sha, rows), rows is False for a miss
+      misses = []
+      for content_item in content_iterator:
+        sha = classification_cache.hashContent(content_item.content)
+        try:
+          rows = cache.get(sha)
+        except KeyError:
+          rows = False
+          misses.append((content_item.filename, content_item.number))
+        entries.append((content_item.filename, sha, rows))
+      results = _mapClassifyMembers(data_dir, zip_filename, misses, workers,
+          reaction_timeout=reaction_timeout, use_threads=use_threads)
+      for filename, sha, rows in entries:
+        if rows is False:
+          result = next(results)
+          _putClassifiedModel(cache, sha, result)
+          yield result
+        else:
+          yield _mkClassifiedModel(filename, rows)
+
+
+def _putClassifiedModel(cache, sha, result):
+  """
+  Stores a classified model in the persistent cache. A model with a timeout
+  is not stored since the timeout depends on the machine and the budget.
+
+  input
+  -------
+  cache: ClassificationCache
+  sha: str-hash of the SBML document.
+  result: (str-filename, list-ReactionRecord) or None for a model with an error.
+  """
+  if result is None:
+    cache.put(sha, None)
+  elif not any(record.timeout for record in result[1]):
+    #all the fields but timeout
+    cache.put(sha, [tuple(record)[:-1] for record in result[1]])
+
+
+def _mkClassifiedModel(filename, rows):
+  """
+  Classified model from the rows of the persistent cache.
+
+  Returns
+  -------
+  (str-filename, list-ReactionRecord) or None for a model with an error.
+  """
+  if rows is None:
+    return None
+  return filename, [ReactionRecord(*row) for row in rows]
 
 
 def _dataSetStatistics(data_dir = cn.BIOMODELS_DIR, zip_filename = cn.BIOMODELS_ZIP_FILENAME,
-initial_model_indx = 0, final_model_indx = 1000): 
+initial_model_indx = 0, final_model_indx = 1000, workers = 1, cache_path = None,
+reaction_timeout = None, use_threads = False): 
   """
   Process the classification of kinetics for BioModel dataset.
   
   input
   -------
   data_dir: folder path.
-  zip_filename: str-zip filfile name, e.g. "dataSetName.zip".
+  zip_filename: str-zip filfile name, e.g. "dataSetName.zip"; None for the XML files
+    under data_dir, in sorted order.
   initial_model_indx: int-the intial BioModel to process.
   final_model_indx: int-the final BioModel to process.
+  workers: int-number of processes classifying the models in parallel.
+  cache_path: str-path of the SQLite file caching the classification of each model
+    by the hash of its SBML document; None (default) classifies all the models.
+  reaction_timeout: float-wall-clock budget in seconds to classify a reaction. A reaction
+    exceeding it is classified as NA and flagged in the "Timeout" column of df_classification;
+    None (default) for no limit.
+  use_threads: bool-the workers are threads instead of processes, e.g. where processes
+    cannot be created. The reaction_timeout is then only checked between the steps of
+    the classification.
   
   Returns
   -------
@@ -89,329 +918,531 @@ initial_model_indx = 0, final_model_indx = 1000):
   df_table_PR_per_model-df_table_PR averagely for each model.
   """
 
-  #do statistics for different types of reactions and non-classified reactions
-  rxn_num = 0        #total number of reactions deals
-  rxn_num_PR = [0]*16 #total number of reactions with certain prds and rcts (4prds*4rcts)
-  #all the lists are following the same order of kinetics classifications
-  types_name = ["ZERO", "UNDR", "UNMO", "BIDR", "BIMO", "MM", "MMCAT", "HILL", "FR", "NA"]
-  types_simplified_name = types_name[:-1]
-  
-  num_type_classification = len(types_simplified_name)
-  rxn_classification_num = [0]*(num_type_classification+1) #total number of classified cases for each type
-  rxn_classification_num_PR = np.zeros((16, (num_type_classification+1))) #16 rows for 4prds*4rcts
+  iterator = _iterClassifiedModels(data_dir, zip_filename, initial_model_indx,
+      final_model_indx, workers=workers, cache_path=cache_path,
+      reaction_timeout=reaction_timeout, use_threads=use_threads)
+  return _summarizeClassifiedModels(iterator, initial_model_indx = initial_model_indx)
+
+
+def _dataSetReactionTypeStatistics(data_dir = cn.BIOMODELS_DIR,
+    zip_filename = cn.BIOMODELS_ZIP_FILENAME, initial_model_indx = 0, final_model_indx = 1000):
+  """
+  Process the reaction types (R type) of a BioModel dataset. Only the reactant
+  and product numbers are read from libsbml, the kinetics are not classified.
+
+  input
+  -------
+  See _dataSetStatistics.
 
-  df_classification = pd.DataFrame(columns = COLUMN_NAME_df_classification)
-  df_mol_stat = pd.DataFrame(columns = COLUMN_NAME_df_mol_stat)
-  df_mol_stat_PR = {} #set of dataframes to save mol stat for each PR
+  Returns
+  -------
+  The same 7-tuple as _dataSetStatistics, of which only df_table_PR, df_table_PR_per_model
+  and the reaction and model numbers of df_gen_stat are meaningful: every reaction
+  is counted as NA and the raw tables are empty.
+  """
+  accumulator = ClassificationAccumulator()
+  for idx, item in enumerate(_iterReactionTypeModels(data_dir, zip_filename,
+      initial_model_indx, final_model_indx)):
+    if item is None:
+      print("File %d has an error." % (initial_model_indx + idx))
+    accumulator.add(item)
+  return accumulator.getStatistics()
+
+
+def _iterReactionTypeModels(data_dir, zip_filename, initial_model_indx, final_model_indx):
+  """
+  Iterates across the models of a zip file with their reactant and product
+  numbers only. The kinetic laws of the lazy models are not processed.
+
+  Returns
+  -------
+  (str-filename, list-ReactionRecord) or None for a model with an error;
+    the reactions are not classified and their classification is NA.
+  """
+  not_classified = len(TYPES_NAME) - 1
+  for content_item in simple_sbml.contentIterator(initial=initial_model_indx,
+      final=final_model_indx, data_dir=data_dir, zip_filename=zip_filename):
+    item = simple_sbml.mkIteratorItem(content_item, lazy=True)
+    if item is None:
+      yield None
+      continue
+    records = [ReactionRecord(reaction_id=reaction.getId(),
+        classification=not_classified, reaction=None, kinetic_law=None,
+        num_rcts=len(reaction.reactants), num_prds=len(reaction.products))
+        for reaction in item.model.reactions]
+    yield item.filename, records
+
+
+def iterClassifications(zip_filename = cn.BIOMODELS_ZIP_FILENAME, data_dir = cn.BIOMODELS_DIR,
+    initial_model_indx = 0, final_model_indx = 1000, workers = 1, cache_path = None,
+    reaction_timeout = None, use_threads = False):
+  """
+  Iterates across the classified reactions of a dataset. Only the current
+  model is held in memory when the models are classified serially without
+  cache, and each reaction is yielded as soon as it is classified. Otherwise
+  the reactions are yielded model by model. The statistics can be maintained
+  by a ClassificationAccumulator.
+
+  input
+  -------
+  zip_filename: str-zip file name, e.g. "dataSetName.zip"; None for the XML files of data_dir.
+  data_dir: folder path.
+  initial_model_indx, final_model_indx, workers, cache_path, reaction_timeout,
+    use_threads: see _dataSetStatistics.
+
+  Returns
+  -------
+  ClassifiedReaction in file order; the models with an error are reported and skipped.
+  """
+  if (workers is None or workers <= 1) and cache_path is None:
+    iterator = simple_sbml.modelIterator(initial=initial_model_indx, final=final_model_indx,
+        data_dir = data_dir, zip_filename = zip_filename)
+    def iterRecords(item):
+      return _iterClassifyModel(item.model, reaction_timeout=reaction_timeout)
+  else:
+    iterator = _iterClassifiedModels(data_dir, zip_filename, initial_model_indx,
+        final_model_indx, workers=workers, cache_path=cache_path,
+        reaction_timeout=reaction_timeout, use_threads=use_threads)
+    def iterRecords(item):
+      return item[1]
+  for idx, item in enumerate(iterator):
+    if item is None:
+      print("File %d has an error." % (initial_model_indx + idx))
+      continue
+    name = item[0] #filename of an IteratorItem or of a classified model
+    for record in iterRecords(item):
+      yield ClassifiedReaction(name, *record)
+
+
+class ClassificationAccumulator(object):
+  """
+  Statistics of classified reactions, maintained incrementally with counts
+  and running sums, so that the memory does not grow with the number of
+  reactions. Reactions are added one at a time, the reactions of a model
+  consecutively, or a model at a time. Accumulators of disjoint sets of
+  models, e.g. shards processed in different processes or machines, are
+  combined by merge.
+
+  Usage
+  -------
+  accumulator = ClassificationAccumulator()
+  for reaction in iterClassifications("metabolic.zip"):
+    accumulator.addReaction(reaction)
+  accumulator.merge(other_accumulator)
+  df_gen_stat = accumulator.getGenStat()
+  """
+
+  def __init__(self):
+    num_types = len(TYPES_NAME)
+    self.num_types = num_types
+    #number of reactions per PR (4prds*4rcts) and type
+    self._rxn_num_PR = np.zeros((16, num_types))
+    #number of models with reactions, overall and per PR
+    self._model_num = 0
+    self._model_num_PR = np.zeros(16)
+    #running sums and sums of squares of the fractions of the types per model
+    self._fraction_sum = np.zeros(num_types)
+    self._fraction_sumsq = np.zeros(num_types)
+    self._fraction_sum_PR = np.zeros((16, num_types))
+    self._fraction_sumsq_PR = np.zeros((16, num_types))
+    self._biomodel_non_count = 0
+    self.timeout_num = 0
+    #reactions of the model being added
+    self._model_id = None
+    self._model_counts = np.zeros((16, num_types))
+
+  @staticmethod
+  def _getPRIndex(num_rcts, num_prds):
+    #4prds*4rcts, more than two rcts or prds share the last row or column
+    return np.minimum(num_prds, 3)*4 + np.minimum(num_rcts, 3)
+
+  def add(self, model_result):
+    """
+    Adds the classified reactions of a model.
+
+    input
+    -------
+    model_result: (str-filename, list-ReactionRecord) as classified by _classifyModel;
+      None for a model with an error, which is ignored.
+    """
+    if model_result is None:
+      return
+    self._closeModel()
+    records = model_result[1]
+    #the fields of the records as arrays, the counts are bucketed at once
+    num_rcts, num_prds, classifications, timeouts = [np.fromiter(
+        (getattr(record, field) for record in records), dtype=int, count=len(records))
+        for field in ["num_rcts", "num_prds", "classification", "timeout"]]
+    counts = np.zeros((16, self.num_types))
+    np.add.at(counts, (self._getPRIndex(num_rcts, num_prds), classifications), 1)
+    self.timeout_num += int(timeouts.sum())
+    self._addModelCounts(counts)
+
+  def merge(self, other):
+    """
+    Adds the statistics of another accumulator, of different models.
+
+    input
+    -------
+    other: ClassificationAccumulator
+
+    Returns
+    -------
+    ClassificationAccumulator-self
+    """
+    self._closeModel()
+    other = other._getTotals()
+    self._rxn_num_PR += other._rxn_num_PR
+    self._model_num += other._model_num
+    self._model_num_PR += other._model_num_PR
+    self._fraction_sum += other._fraction_sum
+    self._fraction_sumsq += other._fraction_sumsq
+    self._fraction_sum_PR += other._fraction_sum_PR
+    self._fraction_sumsq_PR += other._fraction_sumsq_PR
+    self._biomodel_non_count += other._biomodel_non_count
+    self.timeout_num += other.timeout_num
+    return self
+
+  def addReaction(self, reaction):
+    """
+    Adds a classified reaction.
+
+    input
+    -------
+    reaction: ClassifiedReaction
+    """
+    if reaction.sbml_id != self._model_id:
+      self._closeModel()
+      self._model_id = reaction.sbml_id
+    xy = self._getPRIndex(reaction.num_rcts, reaction.num_prds)
+    self._model_counts[xy, reaction.classification] += 1
+    if reaction.timeout:
+      self.timeout_num += 1
+
+  def _closeModel(self):
+    """
+    Adds the statistics of the model being added to the running sums.
+    """
+    self._addModelCounts(self._model_counts)
+    self._model_id = None
+    self._model_counts = np.zeros((16, self.num_types))
+
+  def _addModelCounts(self, counts):
+    """
+    Adds the statistics of a model.
+
+    input
+    -------
+    counts: np.array-number of reactions of the model per PR and type.
+    """
+    rxn_num_permol = counts.sum()
+    if rxn_num_permol == 0:
+      return
+    self._rxn_num_PR += counts
+    fractions = counts.sum(axis=0)/rxn_num_permol
+    self._model_num += 1
+    self._fraction_sum += fractions
+    self._fraction_sumsq += fractions**2
+    if fractions[-1] != 0:
+      self._biomodel_non_count += 1
+    #the PRs with reactions in the model
+    rxn_num_permol_PR = counts.sum(axis=1)
+    is_PR = rxn_num_permol_PR != 0
+    fractions_PR = counts[is_PR]/rxn_num_permol_PR[is_PR, np.newaxis]
+    self._model_num_PR[is_PR] += 1
+    self._fraction_sum_PR[is_PR] += fractions_PR
+    self._fraction_sumsq_PR[is_PR] += fractions_PR**2
+
+  def _getTotals(self):
+    """
+    Statistics including the model being added, without closing it.
+
+    Returns
+    -------
+    ClassificationAccumulator
+    """
+    if self._model_id is None:
+      return self
+    totals = copy.deepcopy(self)
+    totals._closeModel()
+    return totals
+
+  @property
+  def rxn_num(self):
+    return int(self._getTotals()._rxn_num_PR.sum())
+
+  @property
+  def model_num(self):
+    return self._getTotals()._model_num
+
+  @property
+  def biomodel_non_count(self):
+    """
+    Number of models with non-classified reactions.
+    """
+    return self._getTotals()._biomodel_non_count
+
+  @staticmethod
+  def _getMeanAndStandardError(fraction_sum, fraction_sumsq, model_num):
+    """
+    Mean and standard error of the mean of the fractions per model, from their
+    sums and sums of squares. The standard error is 0 for a single model.
+    The arrays may have a leading PR axis, model_num is then an array of the
+    numbers of models per PR, which are not 0.
+    """
+    model_num = np.asarray(model_num, dtype=float)[..., np.newaxis]
+    mean = fraction_sum/model_num
+    variance = (fraction_sumsq - fraction_sum*mean)/np.maximum(model_num - 1, 1)
+    variance = np.where(model_num < 2, 0., np.maximum(variance, 0.))
+    return mean, np.sqrt(variance)/np.sqrt(model_num)
+
+  def getGenStat(self):
+    """
+    Returns
+    -------
+    DataFrame-df_gen_stat of _dataSetStatistics.
+    """
+    totals = self._getTotals()
+    rxn_classification_num = totals._rxn_num_PR.sum(axis=0)
+    rxn_num = rxn_classification_num.sum()
+    if rxn_num == 0:
+      return pd.DataFrame(columns = COLUMN_NAME_df_gen_stat)
+    mean, sder = self._getMeanAndStandardError(totals._fraction_sum,
+        totals._fraction_sumsq, totals._model_num)
+    df_gen_stat = pd.DataFrame({
+        CLASSIFICATIONS: list(TYPES_NAME),
+        PERCENTAGE: rxn_classification_num/rxn_num,
+        PERCENTAGE_PER_MODEL: mean,
+        PERCENTAGE_PER_MODEL_SDER: sder,
+        })
+    df_gen_stat.at[0, RXN_NUM] = int(rxn_num)
+    df_gen_stat.at[0, BIOMOL_NUM] = totals._model_num
+    return df_gen_stat
+
+  def getGenStatPR(self):
+    """
+    Returns
+    -------
+    DataFrame-df_gen_stat_PR of _dataSetStatistics.
+    """
+    totals = self._getTotals()
+    #16 PRs by types, the PRs without reactions are 0
+    rxn_num_PR = totals._rxn_num_PR.sum(axis=1)
+    is_PR = rxn_num_PR != 0
+    percentage = np.zeros((16, self.num_types))
+    mean = np.zeros((16, self.num_types))
+    sder = np.zeros((16, self.num_types))
+    percentage[is_PR] = totals._rxn_num_PR[is_PR]/rxn_num_PR[is_PR, np.newaxis]
+    mean[is_PR], sder[is_PR] = self._getMeanAndStandardError(
+        totals._fraction_sum_PR[is_PR], totals._fraction_sumsq_PR[is_PR],
+        totals._model_num_PR[is_PR])
+    return pd.DataFrame({
+        CLASSIFICATIONS: list(TYPES_NAME)*16,
+        PERCENTAGE: percentage.ravel(),
+        PERCENTAGE_PER_MODEL: mean.ravel(),
+        PERCENTAGE_PER_MODEL_SDER: sder.ravel(),
+        })
+
+  def getTablePR(self):
+    """
+    Returns
+    -------
+    DataFrame-df_table_PR of _dataSetStatistics.
+    """
+    totals = self._getTotals()
+    return _mkTablePR(totals._rxn_num_PR.sum(axis=1).astype(int))
+
+  def getTablePRPerModel(self):
+    """
+    Returns
+    -------
+    DataFrame-df_table_PR_per_model of _dataSetStatistics.
+    """
+    totals = self._getTotals()
+    rxn_num_per_model = np.zeros(16)
+    is_PR = totals._model_num_PR != 0
+    rxn_num_per_model[is_PR] = \
+        totals._rxn_num_PR[is_PR].sum(axis=1)/totals._model_num_PR[is_PR]
+    return _mkTablePR(rxn_num_per_model)
+
+
+  def getStatistics(self):
+    """
+    Statistics in the format of _dataSetStatistics. The raw tables,
+    df_classification and df_mol_stat, are not accumulated and are empty.
+
+    Returns
+    -------
+    The same 7-tuple as _dataSetStatistics.
+    """
+    return (_mkClassificationTable([]), self.getGenStat(),
+        pd.DataFrame(columns = COLUMN_NAME_df_mol_stat), self.getGenStatPR(),
+        self.biomodel_non_count, self.getTablePR(), self.getTablePRPerModel())
+
+
+def _mkTablePR(values = None):
+  """
+  Table of the reactions per number of products (rows) and reactants (columns).
+
+  input
+  -------
+  values: np.array-16 values in the order of the PR index; None for an empty table.
+  """
   df_table_PR = pd.DataFrame(columns = ["R = 0", "R = 1", "R = 2", "R > 2"], \
-                             index = ["P = 0", "P = 1", "P = 2", "P > 2"])
-  df_table_PR_per_model = pd.DataFrame(columns = ["R = 0", "R = 1", "R = 2", "R > 2"], \
-                             index = ["P = 0", "P = 1", "P = 2", "P > 2"])    
+                      index = ["P = 0", "P = 1", "P = 2", "P > 2"])
+  if values is not None:
+    df_table_PR.iloc[:, :] = np.asarray(values).reshape(4, 4).astype(object)
+  return df_table_PR
 
-  for i in range(16):
-    df_mol_stat_PR[i] = pd.DataFrame(columns = COLUMN_NAME_df_mol_stat)
-  
 
-  # for different input dataset
-  iterator = simple_sbml.modelIterator(initial=initial_model_indx, final=final_model_indx,
-  data_dir = data_dir, zip_filename = zip_filename)
+def _summarizeClassifiedModels(iterator, initial_model_indx = 0):
+  """
+  Do the statistics of the classified models. The reactions are kept as
+  arrays per model and df_classification is built once at the end; the
+  other statistics come from a ClassificationAccumulator.
 
-  biomodel_non_count = 0
+  input
+  -------
+  iterator: iterable-(str-filename, list-ReactionRecord) or None for a model with an error.
+  initial_model_indx: int-index of the first model, used to report errors.
+
+  Returns
+  -------
+  The same 7-tuple as _dataSetStatistics.
+  """
+  #all the lists are following the same order of kinetics classifications
+  types_simplified_name = TYPES_NAME[:-1]
+  num_type_classification = len(types_simplified_name)
+
+  #column buffers of the per model table
+  mol_stat_dct = {k:[] for k in COLUMN_NAME_df_mol_stat}
+  #classified models with reactions
+  classified_models = []
+
+  accumulator = ClassificationAccumulator()
   for idx, item in enumerate(iterator):
     if item is None:
       file_num = initial_model_indx + idx
       print("File %d has an error." % (file_num))
-    else:
-      name = item.filename
-
-      # Create an SBML model. We'll use the model
-      # data/
-      # try:
-      #   path = os.path.join(cn.PROJECT_DIR, "data")
-      # except:
-      #   print("error")
-      # path = os.path.join(path, name)
-      simple = item.model # Create a model
-
-      model = simple.model
-      # If there are functions in the sbml file, expand the functions to kinetic law first
-      if len(simple.function_definitions) > 0:
-        for reaction in simple.reactions:
-          reaction.kinetic_law.expandFormula(simple.function_definitions)
-
-      #do the statistics per model
-      rxn_num_permol = len(simple.reactions)
-      rxn_num_permol_PR = [0]*16 #rxn numbers per model for each PR
-      if rxn_num_permol != 0:
-        flag_biomodel_non = 0
-        mol_stat_row_dct = {k:[] for k in COLUMN_NAME_df_mol_stat}
-        mol_stat_row_dct[SBMLID].append(name)
-        mol_stat_row_dct[RXN_NUM].append(rxn_num_permol)
-
-        rxn_classification_num_permol = [0]*(num_type_classification+1)
-        rxn_classification_num_permol_PR = np.zeros((16,(num_type_classification+1)))
-
-        for reaction in simple.reactions:          
-          flag_classification = [0]*num_type_classification
-          flag_non = 1
-          classification_list = []
-          reaction.kinetic_law.mkSymbolExpression(simple.function_definitions)   
-          classification_row_dct = {k:[] for k in COLUMN_NAME_df_classification}
-          classification_row_dct[SBMLID].append(name)
-          classification_row_dct[REACTIONID].append(reaction.getId())
-          reactant_list = [r.getSpecies() for r in reaction.reactants]
-          product_list = [p.getSpecies() for p in reaction.products]
-
-          reactant_stg = " + ".join(
-            [r.getSpecies() for r in reaction.reactants])
-          product_stg = " + ".join(
-            [p.getSpecies() for p in reaction.products])
-
-          reaction_str = reactant_stg + "->" + product_stg
-
-          species_num = model.getNumSpecies()
-          parameter_num = model.getNumParameters()
-
-          species_list = []
-          parameter_list = []
-          for i in range(species_num):
-            species = model.getSpecies(i)
-            species_id = species.getId()
-            species_list.append(species_id)
-
-          for i in range(parameter_num):
-            parameter = model.getParameter(i)
-            parameter_id =  parameter.getId()
-            parameter_list.append(parameter_id)
-
-          kinetics = reaction.kinetic_law.expanded_formula  
-          #print("kinetics:", kinetics)
-
-          try:
-            kinetics_sim = str(simplify(kinetics))
-          except:
-            kinetics_sim = kinetics
-         
-          #print("kinetics_sim:", kinetics_sim)
-
-          ids_list = list(dict.fromkeys(reaction.kinetic_law.symbols))
-
-          species_in_kinetic_law = []
-          parameters_in_kinetic_law = []
-          others_in_kinetic_law = []
-
-          for i in range(len(ids_list)):
-            if ids_list[i] in species_list:
-              species_in_kinetic_law.append(ids_list[i])
-            elif ids_list[i] in parameter_list:
-              parameters_in_kinetic_law.append(ids_list[i])
-            else:
-              others_in_kinetic_law.append(ids_list[i])
-
-          parameters_in_kinetic_law = parameters_in_kinetic_law + others_in_kinetic_law
-
-          #print("species_in_kinetic_law:", species_in_kinetic_law)
-          #print("parameters_in_kinetic_law:", parameters_in_kinetic_law)
-
-          #only for MM, MMcat and FR
-          if len(reactant_list) != 0:
-            ids_list += reactant_list # some rcts/prds also needs symbols definition
-          if len(product_list) != 0:
-            ids_list += product_list
-          ids_list = list(dict.fromkeys(ids_list))
-
-          # print("reactant_list:", reactant_list)
-          #print("ids_list:", ids_list)
-
-          #Define the keyword arguments
-          kwargs = {"kinetics": kinetics, "kinetics_sim": kinetics_sim, \
-            "reactant_list": reactant_list, "product_list": product_list, \
-            "species_in_kinetic_law": species_in_kinetic_law, "parameters_in_kinetic_law": parameters_in_kinetic_law, \
-            "ids_list": ids_list}
-
-          classification_cp = [#needs to be in order
-            reaction.kinetic_law.isZerothOrder(**kwargs),
-            # reaction.kinetic_law.isPowerTerms(**kwargs),
-            reaction.kinetic_law.isUNDR(**kwargs),
-            reaction.kinetic_law.isUNMO(**kwargs),
-            reaction.kinetic_law.isBIDR(**kwargs),
-            reaction.kinetic_law.isBIMO(**kwargs),
-            reaction.kinetic_law.isMM(**kwargs),
-            reaction.kinetic_law.isMMcat(**kwargs),
-            reaction.kinetic_law.isHill(**kwargs),
-            reaction.kinetic_law.isFraction(**kwargs),
-            #reaction.kinetic_law.isPolynomial(**kwargs),
-          ]
-
-          classification_prds_cp = [
-            reaction.kinetic_law.isNoPrds(**kwargs),
-            reaction.kinetic_law.isSinglePrd(**kwargs),
-            reaction.kinetic_law.isDoublePrds(**kwargs),
-            reaction.kinetic_law.isMulPrds(**kwargs),
-          ]
-
-          classification_rcts_cp = [
-            reaction.kinetic_law.isNoRcts(**kwargs),
-            reaction.kinetic_law.isSingleRct(**kwargs),
-            reaction.kinetic_law.isDoubleRcts(**kwargs),
-            reaction.kinetic_law.isMulRcts(**kwargs),
-          ]
-
-          for i in range(num_type_classification):
-            if classification_cp[i]:
-              rxn_classification_num_permol[i] += 1
-              flag_classification[i] = 1
-              flag_non = 0
-              classification_list.append(types_simplified_name[i])
-              break #stop the loop once flag_non == 0, this applies to exclusive classification
-
-          classification_str = ','.join([str(e) for e in classification_list])
-          classification_row_dct[CLASSIFICATIONS].append(classification_str)
-          classification_row_dct[REACTION].append(reaction_str)
-          classification_row_dct[KINETICLAW].append(reaction.kinetic_law.expanded_formula)
-
-          for i in range(num_type_classification): 
-            if flag_classification[i] == 1:
-              classification_row_dct[COLUMN_NAME_df_classification[5+i]].append('x')
-            else:
-              classification_row_dct[COLUMN_NAME_df_classification[5+i]].append('')
-
-          if flag_non == 1:
-            rxn_classification_num_permol[num_type_classification] += 1
-            classification_row_dct[NA].append('x')
-            flag_biomodel_non = 1
-          else:
-            classification_row_dct[NA].append('')
-          
-          if len(df_classification) == 0:
-              df_classification = pd.DataFrame(classification_row_dct)
-          else:
-              df_classification = pd.concat([df_classification,\
-                  pd.DataFrame(classification_row_dct)], ignore_index=True)
-
-
-          for x in range(4): #4prds
-            for y in range(4): #4rcts
-              flag_non_PR = 1
-              xy = x*4+y
-    
-              if classification_prds_cp[x] and classification_rcts_cp[y]:
-                rxn_num_permol_PR[xy] += 1
-                for i in range(num_type_classification):
-                  if classification_cp[i]:
-                    rxn_classification_num_permol_PR[xy,i] += 1
-                    flag_non_PR = 0
-                    break #stop the loop once, this applies to exclusive classification
-                if flag_non_PR == 1:
-                  rxn_classification_num_permol_PR[xy,num_type_classification] += 1 
-
-        #for each reaction above here, for per model below here:
-        for i in range(num_type_classification+1):
-          rxn_classification_num[i] += rxn_classification_num_permol[i] 
-        rxn_num += rxn_num_permol
-
-        for i in range(num_type_classification):
-          mol_stat_row_dct[COLUMN_NAME_df_mol_stat[2+i]].append(float(rxn_classification_num_permol[i]/rxn_num_permol))
-        mol_stat_row_dct[NA].append(float(rxn_classification_num_permol[num_type_classification]/rxn_num_permol))
-
-        if len(df_mol_stat) == 0:
-            df_mol_stat = pd.DataFrame(mol_stat_row_dct)
-        else:
-            df_mol_stat = pd.concat([df_mol_stat,\
-                pd.DataFrame(mol_stat_row_dct)], ignore_index=True)
-      
-        if flag_biomodel_non == 1:
-          biomodel_non_count += 1
-
-        #PR:
-        for xy in range(16):
-          if rxn_num_permol_PR[xy]!= 0:
-            mol_stat_PR_row_dct = {k:[] for k in COLUMN_NAME_df_mol_stat}
-            mol_stat_PR_row_dct[SBMLID].append(name)
-            
-            mol_stat_PR_row_dct[RXN_NUM].append(rxn_num_permol_PR[xy])
-            for i in range(num_type_classification+1):
-              rxn_classification_num_PR[xy,i] += rxn_classification_num_permol_PR[xy,i] 
-            rxn_num_PR[xy] += rxn_num_permol_PR[xy]
-
-            for i in range(num_type_classification):
-              mol_stat_PR_row_dct[COLUMN_NAME_df_mol_stat[2+i]].append(float(rxn_classification_num_permol_PR[xy,i]/rxn_num_permol_PR[xy]))
-            mol_stat_PR_row_dct[NA].append(float(rxn_classification_num_permol_PR[xy,num_type_classification]/rxn_num_permol_PR[xy]))
-            
-            if len(df_mol_stat_PR[xy]) == 0:
-                df_mol_stat_PR[xy] = pd.DataFrame(mol_stat_PR_row_dct)
-            else:
-                df_mol_stat_PR[xy] = pd.concat([df_mol_stat_PR[xy],\
-                    pd.DataFrame(mol_stat_PR_row_dct)], ignore_index=True) 
-  #for all the biomodels below here
-  # This part is the same as the printed part in main section
-  df_gen_stat = pd.DataFrame(columns = COLUMN_NAME_df_gen_stat)
-  if(rxn_num != 0):
-    for i in range(num_type_classification+1):
-      gen_stat_row_dct = {k:[] for k in COLUMN_NAME_df_gen_stat[0:-2]}
-      gen_stat_row_dct[CLASSIFICATIONS].append(types_name[i])
-      gen_stat_row_dct[PERCENTAGE].append(float(rxn_classification_num[i]/rxn_num))
-      
-      # do a statistics of df_mol_stat and save to df_gen_stat
-      avg_value = df_mol_stat[COLUMN_NAME_df_mol_stat[i+2]].mean()
-      sdv_value = df_mol_stat[COLUMN_NAME_df_mol_stat[i+2]].std()/math.sqrt(len(df_mol_stat.index))
-      if math.isnan(sdv_value):
-        sdv_value = 0.
-      gen_stat_row_dct[PERCENTAGE_PER_MODEL].append(avg_value)
-      gen_stat_row_dct[PERCENTAGE_PER_MODEL_SDER].append(sdv_value)
-
-      if len(df_gen_stat) == 0:
-          df_gen_stat = pd.DataFrame(gen_stat_row_dct)
-      else:
-          df_gen_stat = pd.concat([df_gen_stat,\
-              pd.DataFrame(gen_stat_row_dct)], ignore_index=True) 
-    
-    df_gen_stat.at[0, RXN_NUM] = rxn_num
-    df_gen_stat.at[0, BIOMOL_NUM] = len(df_mol_stat.index)
-
-
-  #PR
-  df_gen_stat_PR = pd.DataFrame(columns = COLUMN_NAME_df_gen_stat[0:-2])
-  for xy in range(16):
-    if(rxn_num_PR[xy] != 0):
-      for i in range(num_type_classification+1):
-        gen_stat_PR_row_dct = {k:[] for k in COLUMN_NAME_df_gen_stat[0:-2]}
-        gen_stat_PR_row_dct[CLASSIFICATIONS].append(types_name[i])
-        gen_stat_PR_row_dct[PERCENTAGE].append(float(rxn_classification_num_PR[xy,i]/rxn_num_PR[xy]))
-
-        # do a statistics of df_mol_stat and save to df_gen_stat
-        avg_value = df_mol_stat_PR[xy][COLUMN_NAME_df_mol_stat[i+2]].mean()
-        sdv_value = df_mol_stat_PR[xy][COLUMN_NAME_df_mol_stat[i+2]].std()/math.sqrt(len(df_mol_stat_PR[xy].index))
-        if math.isnan(sdv_value):
-          sdv_value = 0
-        gen_stat_PR_row_dct[PERCENTAGE_PER_MODEL].append(avg_value)
-        gen_stat_PR_row_dct[PERCENTAGE_PER_MODEL_SDER].append(sdv_value)        
-        if len(df_gen_stat_PR) == 0:
-            df_gen_stat_PR = pd.DataFrame(gen_stat_PR_row_dct)
-        else:
-            df_gen_stat_PR = pd.concat([df_gen_stat_PR,\
-                pd.DataFrame(gen_stat_PR_row_dct)], ignore_index=True) 
-    else: 
-      gen_stat_PR_mul_row_dct = {k:[] for k in COLUMN_NAME_df_gen_stat[0:-2]}
-      gen_stat_PR_mul_row_dct[CLASSIFICATIONS].extend(types_name)
-      gen_stat_PR_mul_row_dct[PERCENTAGE].extend([0.]*(num_type_classification+1))
-      gen_stat_PR_mul_row_dct[PERCENTAGE_PER_MODEL].extend([0.]*(num_type_classification+1))
-      gen_stat_PR_mul_row_dct[PERCENTAGE_PER_MODEL_SDER].extend([0.]*(num_type_classification+1))
-
-      if len(df_gen_stat_PR) == 0:
-          df_gen_stat_PR = pd.DataFrame(gen_stat_PR_mul_row_dct)
-      else:
-          df_gen_stat_PR = pd.concat([df_gen_stat_PR,\
-              pd.DataFrame(gen_stat_PR_mul_row_dct)], ignore_index=True) 
+      continue
+    accumulator.add(item)
+    name, records = item
 
-    df_table_PR.iloc[xy//4,xy%4] = rxn_num_PR[xy]
-    if len(df_mol_stat_PR[xy]) != 0:
-      df_table_PR_per_model.iloc[xy//4,xy%4] = rxn_num_PR[xy]/len(df_mol_stat_PR[xy].index)
-    else:
-      df_table_PR_per_model.iloc[xy//4,xy%4] = 0.
+    #do the statistics per model
+    rxn_num_permol = len(records)
+    if rxn_num_permol != 0:
+      classified_models.append(item)
+      classifications = np.fromiter((record.classification for record in records),
+          dtype=int, count=rxn_num_permol)
+      rxn_classification_num_permol = np.bincount(classifications,
+          minlength=num_type_classification+1)
+      mol_stat_dct[SBMLID].append(name)
+      mol_stat_dct[RXN_NUM].append(rxn_num_permol)
+      fractions = rxn_classification_num_permol/rxn_num_permol
+      for i in range(num_type_classification):
+        mol_stat_dct[COLUMN_NAME_df_mol_stat[2+i]].append(float(fractions[i]))
+      mol_stat_dct[NA].append(float(fractions[num_type_classification]))
+
+  df_classification = _mkClassificationTable(classified_models)
+  df_mol_stat = _mkDataFrame(mol_stat_dct, COLUMN_NAME_df_mol_stat)
 
-  return (df_classification, df_gen_stat, df_mol_stat, df_gen_stat_PR, biomodel_non_count, \
-    df_table_PR, df_table_PR_per_model)
+  return (df_classification, accumulator.getGenStat(), df_mol_stat, accumulator.getGenStatPR(), 
+    accumulator.biomodel_non_count, accumulator.getTablePR(), accumulator.getTablePRPerModel())
+
+
+def _mkClassificationTable(classified_models):
+  """
+  Build the typed df_classification. The model ids are stored once as the
+  categories of the SBMLid column, the types as the categories of the
+  Classifications column and the flags as booleans.
+
+  input
+  -------
+  classified_models: list-(str-filename, list-ReactionRecord).
+
+  Returns
+  -------
+  DataFrame with the columns of COLUMN_NAME_df_classification_typed.
+  """
+  names = [name for name, _ in classified_models]
+  #interned model ids: code of the model of each reaction
+  name_codes = {}
+  codes = [name_codes.setdefault(name, len(name_codes)) for name in names]
+  model_codes = np.repeat(np.array(codes, dtype=int),
+      [len(records) for _, records in classified_models])
+  records = [record for _, model_records in classified_models for record in model_records]
+  num_rxn = len(records)
+  def mkArray(field, dtype):
+    return np.fromiter((getattr(record, field) for record in records),
+        dtype=dtype, count=num_rxn)
+  def mkStrings(field):
+    #the type of the strings is inferred, object for an empty table
+    return pd.Series([getattr(record, field) for record in records],
+        dtype=None if num_rxn > 0 else object)
+  classifications = mkArray("classification", np.int8)
+  #int8 holds the numbers up to 127, more are counted as 127
+  num_rcts, num_prds = [np.minimum(mkArray(field, int), np.iinfo(np.int8).max
+      ).astype(np.int8) for field in ["num_rcts", "num_prds"]]
+  flags = classifications[:, np.newaxis] == np.arange(len(TYPES_NAME))
+  column_dct = {
+      SBMLID: pd.Categorical.from_codes(model_codes, categories=list(name_codes)),
+      REACTIONID: mkStrings("reaction_id"),
+      CLASSIFICATIONS: pd.Categorical.from_codes(classifications, categories=TYPES_NAME),
+      REACTION: mkStrings("reaction"),
+      KINETICLAW: mkStrings("kinetic_law"),
+      }
+  for i, column in enumerate(FLAG_COLUMN_NAME_df_classification):
+    column_dct[column] = flags[:, i]
+  column_dct[TIMEOUT] = mkArray("timeout", bool)
+  column_dct[RCT_NUM] = num_rcts
+  column_dct[PRD_NUM] = num_prds
+  return pd.DataFrame(column_dct, columns = COLUMN_NAME_df_classification_typed)
+
+
+def mkLegacyClassification(df_classification):
+  """
+  String layout of df_classification, as written to the Excel files: the
+  columns of COLUMN_NAME_df_classification, the classification of the NA
+  reactions is '' and the flags are 'x' or ''.
+
+  input
+  -------
+  df_classification: DataFrame-typed df_classification of _dataSetStatistics.
+
+  Returns
+  -------
+  DataFrame
+  """
+  if len(df_classification.index) == 0:
+    return pd.DataFrame(columns = COLUMN_NAME_df_classification)
+  df_legacy = pd.DataFrame({
+      SBMLID: df_classification[SBMLID].astype(str).values,
+      REACTIONID: df_classification[REACTIONID].values,
+      CLASSIFICATIONS: df_classification[CLASSIFICATIONS].astype(str).replace(NA, '').values,
+      REACTION: df_classification[REACTION].values,
+      KINETICLAW: df_classification[KINETICLAW].values,
+      }, columns = COLUMN_NAME_df_classification, index = df_classification.index)
+  for column in FLAG_COLUMN_NAME_df_classification + [TIMEOUT]:
+    df_legacy[column] = np.where(df_classification[column].values, 'x', '').astype(object)
+  return df_legacy
+
+
+def _mkDataFrame(column_dct, column_names):
+  """
+  Build a DataFrame from column buffers.
+
+  input
+  -------
+  column_dct: dict-key: column name, value: list of the column values.
+  column_names: list-str of the column names.
+
+  Returns
+  -------
+  DataFrame with the columns in the order of column_names.
+  """
+  if len(column_dct[column_names[0]]) == 0:
+    return pd.DataFrame(columns = column_names)
+  return pd.DataFrame(column_dct, columns = column_names)
 
 
 if __name__ == '__main__':
@@ -424,5 +1455,6 @@ if __name__ == '__main__':
    final_model_indx = final_model_indx)
   rxn_num = len(df_classification)
   print(rxn_num)
+  print("dedup ratio: %.2f" % fingerprintCacheInfo().dedup_ratio)
 
   print("--- %s seconds ---" % (time.time() - start_time))
@@ -40,7 +40,8 @@ class KineticAnalyzer:
   (Michaelis-Menten kinetics without explicit enzyme), "MMCAT" 
   (Michaelis-Menten kinetics with explicit enzyme), "HILL" (Hill equations), 
   "FR" (Kinetic law in the format of fraction other than MM, MMCAT or HILL) and "NA" 
-  (not classified kinetics). 
+  (not classified kinetics). Other K types are added with 
+  kinetics_classification.registerClassifier before the dataset is loaded.
 
   Reaction type (R type) is quantitatively represented by the number of reactants 
   (r = 0, 1, 2, 3 (representing>2)) and products (p= 0, 1, 2, 3 (representing>2)).
@@ -53,10 +54,31 @@ class KineticAnalyzer:
       
       model_indices: range-(initial_model_indx, final_model_indx)
 
+      workers: int-number of processes classifying the models in parallel, 
+      1 (default) classifies the models serially.
+
+      cache_path: str-path of a SQLite file caching the classification of each model 
+      by the hash of its SBML document, so that only new or modified models are 
+      classified again; None (default) does not cache.
+
+      reaction_timeout: float-wall-clock budget in seconds to classify a reaction; a 
+      reaction exceeding it is classified as "NA" and flagged in the "Timeout" column 
+      of the classification table. None (default) for no limit.
+
+      use_threads: bool-if True, the workers are threads instead of processes, e.g.
+      in a service where processes cannot be created. False (default) uses processes.
+
+      lazy: bool-if True, the dataset is processed on the first query, and only as far
+      as the query needs: the R type queries and the numbers of models and reactions
+      only read the reactant and product numbers, the K type queries classify the 
+      kinetics. The results are kept for the next queries. False (default) classifies
+      the dataset when the analyzer is created.
+
   """
 
   def __init__(self, path = os.path.dirname(os.path.abspath(__file__)), 
-    dataSet = "biomodels", model_indices = range(0,1000)):
+    dataSet = "biomodels", model_indices = range(0,1000), workers = 1,
+    cache_path = None, reaction_timeout = None, use_threads = False, lazy = False):
 
     #In addition to dataSetName, allow users to inmport a zip of sbml files from a path 
     initial_model_indx = min(model_indices)
@@ -65,23 +87,83 @@ class KineticAnalyzer:
     if type(dataSet) == str and dataSet in ["biomodels", "curated", 
     "metabolic", "signalling", "homo_sapiens", "non_homo", 
     "cellular_organisms", "Mus_musculus", "Mammalia", "Saccharomyces_cerevisiae"]:
+      data_dir = kinetics_classification.cn.BIOMODELS_DIR
       zip_filename = dataSet + '.zip'
-      try:
-        self.tuple = kinetics_classification._dataSetStatistics(zip_filename = zip_filename, 
-        initial_model_indx = initial_model_indx, final_model_indx = final_model_indx)
-      except Exception as err:
-          raise Exception (err)
-
     elif '.zip' in dataSet:
-      try:
-        self.tuple = kinetics_classification._dataSetStatistics(data_dir = path, zip_filename = dataSet, 
-        initial_model_indx = initial_model_indx, final_model_indx = final_model_indx)
-      except Exception as err:
-          raise Exception (err)
-
+      data_dir = path
+      zip_filename = dataSet
     else:
       raise Exception("Not a valid dataset input.")
 
+    self._dataset_kwargs = {"data_dir": data_dir, "zip_filename": zip_filename,
+        "initial_model_indx": initial_model_indx, "final_model_indx": final_model_indx}
+    self._classification_kwargs = {"workers": workers, "cache_path": cache_path,
+        "reaction_timeout": reaction_timeout, "use_threads": use_threads}
+    self._tuple = None
+    self._r_type_tuple = None
+    if not lazy:
+      self._tuple = self._process(kinetics_classification._dataSetStatistics,
+          **self._classification_kwargs)
+
+  def _process(self, func, **kwargs):
+    """
+    Process the dataset.
+
+    Args:
+        func: function-kinetics_classification._dataSetStatistics or
+        kinetics_classification._dataSetReactionTypeStatistics.
+
+    Returns:
+        The 7-tuple of statistics.
+    """
+    try:
+      return func(**self._dataset_kwargs, **kwargs)
+    except Exception as err:
+        raise Exception (err)
+
+  @property
+  def tuple(self):
+    """
+    Statistics of the kinetics classification, computed on first use.
+    """
+    if self._tuple is None:
+      self._tuple = self._process(kinetics_classification._dataSetStatistics,
+          **self._classification_kwargs)
+    return self._tuple
+
+  @property
+  def r_type_tuple(self):
+    """
+    Statistics with the R type distributions and the numbers of models and 
+    reactions. Those of the kinetics classification if it was done, otherwise
+    only the reactant and product numbers are read, on first use.
+    """
+    if self._tuple is not None:
+      return self._tuple
+    if self._r_type_tuple is None:
+      self._r_type_tuple = self._process(
+          kinetics_classification._dataSetReactionTypeStatistics)
+    return self._r_type_tuple
+
+  @classmethod
+  def fromAccumulator(cls, accumulator):
+    """
+    Create an analyzer from accumulated statistics, e.g. of shards of a dataset
+    merged with ClassificationAccumulator.merge. The distributions and counts are
+    the same as for the analyzer of the whole dataset, but the tables of the 
+    individual reactions and models are empty.
+
+    Args:
+        accumulator: kinetics_classification.ClassificationAccumulator.
+
+    Returns:
+        KineticAnalyzer
+    """
+    analyzer = cls.__new__(cls)
+    analyzer._tuple = accumulator.getStatistics()
+    analyzer._r_type_tuple = None
+    return analyzer
+
   ##Query Distributions    
 
   def getKTypeDistribution(self):
@@ -93,7 +175,7 @@ class KineticAnalyzer:
         The column names are: "Classifications", "Percentage", "Percentage standard error", 
         "Percentage per model", "Percentage per model standard error".
         
-        The column of "Classifications" covers the ten kinetic law types.
+        The column of "Classifications" covers the kinetic law types.
         
     """  
  
@@ -127,7 +209,7 @@ class KineticAnalyzer:
         The column names are: "Classifications", "Percentage", "Percentage standard error", 
         "Percentage per model", "Percentage per model standard error".
         
-        The column of "Classifications" covers the ten kinetic law types.
+        The column of "Classifications" covers the kinetic law types.
         
     """  
     rct_num = R_type.rct_num
@@ -170,7 +252,7 @@ class KineticAnalyzer:
         The row names represent number of products: "P = 0", "P = 1", "P = 2", "P > 2".
         
     """ 
-    (_, _, _, _, _, df_table_PR, _) = self.tuple
+    (_, _, _, _, _, df_table_PR, _) = self.r_type_tuple
 
     #generate the PR tables
     try:
@@ -192,7 +274,7 @@ class KineticAnalyzer:
         The row names represent number of products: "P = 0", "P = 1", "P = 2", "P > 2".
         
     """ 
-    (_, _, _, _, _, _, df_table_PR_per_model) = self.tuple
+    (_, _, _, _, _, _, df_table_PR_per_model) = self.r_type_tuple
 
     #generate the PR tables
     try:
@@ -429,8 +511,10 @@ class KineticAnalyzer:
     Returns:
         SBMLModels_num: int-number of SBML models.
     """  
-    (_, _, df_mol_stat, _, _, _, _) = self.tuple
-    SBMLModels_num = len(df_mol_stat)
+    (_, df_gen_stat, _, _, _, _, _) = self.r_type_tuple
+    if len(df_gen_stat.index) == 0:
+      return 0
+    SBMLModels_num = int(df_gen_stat.at[0, kinetics_classification.BIOMOL_NUM])
     
     return SBMLModels_num
   
@@ -442,8 +526,10 @@ class KineticAnalyzer:
     Returns:
         rxn_num: int-number of reactions.
     """  
-    (df_classification, _, _, _, _, _, _) = self.tuple
-    rxn_num = len(df_classification)
+    (_, df_gen_stat, _, _, _, _, _) = self.r_type_tuple
+    if len(df_gen_stat.index) == 0:
+      return 0
+    rxn_num = int(df_gen_stat.at[0, kinetics_classification.RXN_NUM])
     
     return rxn_num
 
@@ -776,8 +862,9 @@ class KineticAnalyzer:
     """
     Print the brief statistics for the kinetics type distribution.
     """  
-    (df_classification, df_gen_stat, _, _, biomodel_non_count, _, _) = self.tuple
-    rxn_num = len(df_classification)
+    (_, df_gen_stat, _, _, biomodel_non_count, _, _) = self.tuple
+    #df_classification is empty for an analyzer created from an accumulator
+    rxn_num = self.getNumRxnsAnalyzed()
     if(rxn_num != 0):
       #print("\n\n")
       print("A brief statistics for the classification of reactions:")
@@ -823,6 +910,7 @@ class KineticAnalyzer:
     # Create a Pandas Excel writer using XlsxWriter as the engine.
     writer = pd.ExcelWriter(fileName, engine='xlsxwriter')
     # Write each dataframe to a different worksheet.
+    df_classification = kinetics_classification.mkLegacyClassification(df_classification)
     df_classification.to_excel(writer, sheet_name='classification')
     df_gen_stat.to_excel(writer, sheet_name='general_statistics')
     df_mol_stat.to_excel(writer, sheet_name='statistics_per_model')
@@ -2,6 +2,8 @@
 # https://github.com/SunnyXu/SBMLKinetics
 # This file defines the objects of R_type and K_type.
 
+from SBMLKinetics import kinetics_classification
+
 
 class R_type:
     def __init__(self, rct_num, prd_num):
@@ -15,8 +17,7 @@ class R_type:
 
 class K_type:
     def __init__(self, K_type_str):
-        if type(K_type_str) == str and K_type_str in ["ZERO", "UNDR", "UNMO", "BIDR", "BIMO", "MM", \
-            "MMCAT", "HILL", "FR", "NA"]:
+        if type(K_type_str) == str and K_type_str in kinetics_classification.TYPES_NAME:
             self.K_type_str = K_type_str
         else:
             ValueError('Please enter a valid kinetic law type string!')
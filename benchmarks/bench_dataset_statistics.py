@@ -0,0 +1,71 @@
+"""
+Benchmark of the statistics of classified models.
+
+Synthetic classified models of a growing size are fed to the statistics
+step of the kinetics classification to check that its cost grows linearly
+with the number of models.
+
+Make sure that you have setup your PYTHONPATH environment variable as
+described in the github repository.
+
+Usage:
+  python benchmarks/bench_dataset_statistics.py
+"""
+
+from SBMLKinetics.kinetics_classification import _summarizeClassifiedModels, \
+    ReactionRecord, TYPES_NAME
+
+import random
+import time
+
+NUM_MODELS = [100, 200, 400, 800, 1600]
+NUM_RXNS_PER_MODEL = 20
+SEED = 0
+
+
+def _mkClassifiedModels(num_models, num_rxns = NUM_RXNS_PER_MODEL, seed = SEED):
+  """
+  Make synthetic classified models.
+
+  input
+  -------
+  num_models: int-number of models.
+  num_rxns: int-number of reactions per model.
+  seed: int-seed of the random generator.
+
+  Returns
+  -------
+  list-(str-filename, list-ReactionRecord)
+  """
+  rng = random.Random(seed)
+  items = []
+  for model_num in range(num_models):
+    records = []
+    for rxn_num in range(num_rxns):
+      records.append(ReactionRecord(
+          reaction_id = "R%d" % rxn_num,
+          classification = rng.randrange(len(TYPES_NAME)),
+          reaction = "S1 -> S2",
+          kinetic_law = "k1*S1",
+          num_rcts = rng.randrange(5),
+          num_prds = rng.randrange(5)))
+    items.append(("model%d.xml" % model_num, records))
+  return items
+
+
+def run(num_models_lst = NUM_MODELS):
+  """
+  Time the statistics for each number of models and print the time per model,
+  which stays about constant when the cost is linear.
+  """
+  print("%8s %10s %16s" % ("models", "time(s)", "time/model(ms)"))
+  for num_models in num_models_lst:
+    items = _mkClassifiedModels(num_models)
+    start_time = time.time()
+    _summarizeClassifiedModels(items)
+    elapsed = time.time() - start_time
+    print("%8d %10.3f %16.3f" % (num_models, elapsed, 1000*elapsed/num_models))
+
+
+if __name__ == '__main__':
+  run()
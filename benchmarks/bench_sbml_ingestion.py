@@ -0,0 +1,103 @@
+"""
+Benchmark of the ingestion of SBML documents.
+
+The documents of a zip file are read once as bytes and then converted to
+libsbml models, in the previous way, i.e. each document decoded, probed as
+a file path, joined from its lines and read by a new libsbml reader, and
+with readSBMLDocument, which reads the bytes with the reader of the thread.
+
+Make sure that you have setup your PYTHONPATH environment variable as
+described in the github repository.
+
+Usage:
+  python benchmarks/bench_sbml_ingestion.py [zip file name]
+"""
+
+from SBMLKinetics.common import simple_sbml
+from SBMLKinetics.common import util
+
+import libsbml
+import os
+import sys
+import time
+
+ZIP_FILENAME = "metabolic.zip"
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "SBMLKinetics", "data")
+NUM_REPEAT = 3
+
+
+def _readLegacyDocument(content):
+  """
+  Reads a document as SimpleSBML did before readSBMLDocument.
+
+  input
+  -------
+  content: bytes-SBML document.
+
+  Returns
+  -------
+  libsbml.SBMLDocument
+  """
+  model_reference = content.decode("utf-8")
+  model_str = ""
+  if os.path.isfile(model_reference):
+    with open(model_reference, 'r') as fd:
+      model_str = ''.join(fd.readlines())
+  if len(model_str) == 0:
+    if "readlines" in dir(model_reference):
+      model_str = ''.join(model_reference.readlines())
+    else:
+      model_str = model_reference
+  if not "<sbml" in model_str:
+    raise ValueError("Invalid SBML model.")
+  reader = libsbml.SBMLReader()
+  document = reader.readSBMLFromString(model_str)
+  util.checkSBMLDocument(document, model_reference=model_reference)
+  return document
+
+
+def _time(read_func, contents, num_repeat = NUM_REPEAT):
+  """
+  Returns
+  -------
+  float-best time in seconds to read all the documents.
+  """
+  times = []
+  for _ in range(num_repeat):
+    start_time = time.time()
+    for content in contents:
+      read_func(content)
+    times.append(time.time() - start_time)
+  return min(times)
+
+
+def run(zip_filename = ZIP_FILENAME, data_dir = DATA_DIR):
+  """
+  Time the ingestion of the documents of a zip file in the two ways.
+  """
+  reader = simple_sbml.ZipReader(os.path.join(data_dir, zip_filename))
+  #the members that are not SBML documents, e.g. folders, are skipped
+  contents = [c for c in (reader.read(name) for name in reader.getNames())
+      if b"<sbml" in c]
+  reader.close()
+  num_bytes = sum(len(c) for c in contents)
+  print("%s: %d documents, %.1f MB" % (zip_filename, len(contents), num_bytes/1e6))
+  print("%-28s %10s %16s" % ("ingestion", "time(s)", "time/model(ms)"))
+  for name, read_func in [("legacy", _readLegacyDocument),
+      ("readSBMLDocument", simple_sbml.readSBMLDocument)]:
+    elapsed = _time(read_func, contents)
+    print("%-28s %10.3f %16.3f" % (name, elapsed, 1000*elapsed/len(contents)))
+  start_time = time.time()
+  for _ in simple_sbml.iterSimpleSBML(contents, lazy=True):
+    pass
+  elapsed = time.time() - start_time
+  print("%-28s %10.3f %16.3f" % ("iterSimpleSBML(lazy)", elapsed,
+      1000*elapsed/len(contents)))
+
+
+if __name__ == '__main__':
+  if len(sys.argv) > 1:
+    run(zip_filename = sys.argv[1])
+  else:
+    run()
@@ -0,0 +1,70 @@
+"""
+Tests for classification_cache
+"""
+from SBMLKinetics.common import classification_cache
+
+import os
+import shutil
+import tempfile
+import unittest
+
+
+IGNORE_TEST = False
+SHA = classification_cache.hashContent("<sbml/>")
+ROWS = [("R1", 1, "S1->S2", "k1*S1", 1, 1), ("R2", 9, "S2->", "f(S2)", 1, 0)]
+
+
+#############################
+# Tests
+#############################
+class TestClassificationCache(unittest.TestCase):
+
+  def setUp(self):
+    self.dir = tempfile.mkdtemp()
+    self.path = os.path.join(self.dir, "cache", "classification.db")
+    self.cache = classification_cache.ClassificationCache(self.path, "1")
+
+  def tearDown(self):
+    self.cache.close()
+    shutil.rmtree(self.dir)
+
+  def testHashContent(self):
+    if IGNORE_TEST:
+      return
+    self.assertEqual(len(SHA), 64)
+    self.assertEqual(SHA, classification_cache.hashContent(b"<sbml/>"))
+
+  def testGetPut(self):
+    if IGNORE_TEST:
+      return
+    with self.assertRaises(KeyError):
+      self.cache.get(SHA)
+    self.cache.put(SHA, ROWS)
+    self.assertEqual(self.cache.get(SHA), ROWS)
+    self.cache.put(SHA, ROWS[:1])
+    self.assertEqual(self.cache.get(SHA), ROWS[:1])
+    self.assertEqual(len(self.cache), 1)
+
+  def testError(self):
+    if IGNORE_TEST:
+      return
+    self.cache.put(SHA, None)
+    self.assertIsNone(self.cache.get(SHA))
+    self.cache.put(SHA, [])
+    self.assertEqual(self.cache.get(SHA), [])
+
+  def testPersistence(self):
+    if IGNORE_TEST:
+      return
+    self.cache.put(SHA, ROWS)
+    self.cache.close()
+    with classification_cache.ClassificationCache(self.path, "1") as cache:
+      self.assertEqual(cache.get(SHA), ROWS)
+    with classification_cache.ClassificationCache(self.path, "2") as cache:
+      with self.assertRaises(KeyError):
+        cache.get(SHA)
+    self.cache = classification_cache.ClassificationCache(self.path, "1")
+
+
+if __name__ == '__main__':
+  unittest.main()
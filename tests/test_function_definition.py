@@ -5,6 +5,7 @@ from SBMLKinetics.common import constants as cn
 from SBMLKinetics.common.simple_sbml import SimpleSBML
 from SBMLKinetics.common import simple_sbml
 from SBMLKinetics.common.function_definition import FunctionDefinition
+from SBMLKinetics.common.function_definition import FunctionExpander
 from tests.common import helpers
 
 import copy
@@ -32,6 +33,47 @@ class TestFunctionDefinition(unittest.TestCase):
       return
     self.assertEqual(len(self.function_definition.argument_names), 4)
 
+  def testBodyAST(self):
+    if IGNORE_TEST:
+      return
+    body_ast = self.function_definition.body_ast
+    self.assertEqual(libsbml.formulaToL3String(body_ast),
+        self.function_definition.body)
+    self.assertTrue(self.function_definition.body_ast is body_ast)
+
+  def testFunctionExpander(self):
+    if IGNORE_TEST:
+      return
+    expander = FunctionExpander(self.simple.function_definitions)
+    fd = self.function_definition
+    call = "%s(%s)" % (fd.id, ", ".join(fd.argument_names))
+    expansion = expander.expandFormula(call)
+    self.assertFalse(fd.id in expansion)
+    for argument in fd.argument_names:
+      self.assertTrue(argument in expansion)
+    # Formulas without calls are unchanged
+    self.assertEqual(expander.expandFormula("a+b"), "a+b")
+
+  def testFunctionExpanderInterrupted(self):
+    # Test an interrupted expansion of a body is done again by the next call
+    if IGNORE_TEST:
+      return
+    expander = FunctionExpander(self.simple.function_definitions)
+    fd = self.function_definition
+    call = "%s(%s)" % (fd.id, ", ".join(fd.argument_names))
+    getBodyAST = expander._getBodyAST
+    def interrupt(function_definition):
+      expander._getBodyAST = getBodyAST
+      raise KeyboardInterrupt()
+    expander._getBodyAST = interrupt
+    with self.assertRaises(KeyboardInterrupt):
+      expander.expandFormula(call)
+    self.assertEqual(len(expander._templates), 0)
+    self.assertEqual(len(expander._expanding), 0)
+    expansion = expander.expandFormula(call)
+    self.assertFalse(fd.id in expansion)
+    self.assertTrue(expander._templates[fd.id] is not None)
+
 
 if __name__ == '__main__':
   unittest.main()
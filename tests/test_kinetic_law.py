@@ -88,6 +88,37 @@ class TestKineticLaw(unittest.TestCase):
     # complex kinetic law with function pow()
     checkSubset(['z','u','k4','k4prime'],self.laws[2].symbols)
 
+  def testSymbolDeepFormula(self):
+    # Formulas deeper than the former recursion limit
+    if IGNORE_TEST:
+      return
+    depth = 100
+    names = ["k%d" % n for n in range(depth)]
+    formula = " * (".join(names) + ")" * (depth - 1)
+    libsbml_kinetics = self.laws[0].libsbml_kinetics.clone()
+    libsbml_kinetics.setMath(libsbml.parseL3Formula(formula))
+    kinetic_law = KineticLaw(libsbml_kinetics, None)
+    self.assertEqual(kinetic_law.symbols, names)
+
+  def testGetSymbolTypes(self):
+    if IGNORE_TEST:
+      return
+    simple = helpers.getSimple_BIOMD56()
+    kinds = set(cn.SYMBOL_TYPES + [cn.SYMBOL_OTHER])
+    function_ids = [fd.id for fd in simple.function_definitions]
+    is_function = False
+    for reaction in simple.reactions:
+      symbol_types = reaction.kinetic_law.getSymbolTypes(simple)
+      self.assertEqual(list(symbol_types.keys()), reaction.kinetic_law.symbols)
+      self.assertTrue(set(symbol_types.values()).issubset(kinds))
+      for symbol, symbol_type in symbol_types.items():
+        if symbol in simple.species_dct:
+          self.assertEqual(symbol_type, cn.SYMBOL_SPECIES)
+        elif symbol in function_ids:
+          self.assertEqual(symbol_type, cn.SYMBOL_FUNCTION)
+          is_function = True
+    self.assertTrue(is_function)
+
   def testExpandFormula1(self):
     # Replacement for SBML reactions
     if IGNORE_TEST:
@@ -147,7 +178,7 @@ class TestKineticLaw(unittest.TestCase):
         ]
     kinetic_law = self.mkKineticLawWithFormula("2 + aa(1, 2) + bb(x, z)")
     kinetic_law.expandFormula(function_definitions)
-    self.assertEqual(kinetic_law.expanded_formula, "2 + 1 + 2 + x*z")
+    self.assertEqual(kinetic_law.expanded_formula, "2 + 1 + 2 + x * z")
 
   def testExpandFormula5(self):
     # Test recursive replacements
@@ -162,6 +193,34 @@ class TestKineticLaw(unittest.TestCase):
     kinetic_law.expandFormula(function_definitions)
     self.assertEqual(kinetic_law.expanded_formula, "kl + cc + bb + 1 + 2")
 
+  def testExpandFormula6(self):
+    # Test that ids containing an argument name are not replaced
+    # and that the body keeps its precedence
+    if IGNORE_TEST:
+      return
+    function_definitions = [
+        MockFunctionDefinition("aa", ["x", "y"], "x + y + kx"),
+        MockFunctionDefinition("bb", ["x", "y"], "x - y")
+        ]
+    kinetic_law = self.mkKineticLawWithFormula("2 * aa(A, B) + bb(y, x)")
+    kinetic_law.expandFormula(function_definitions)
+    self.assertEqual(kinetic_law.expanded_formula,
+        "2 * (A + B + kx) + (y - x)")
+
+  def testExpandFormula7(self):
+    # Test nested calls deeper than the former recursion limit
+    if IGNORE_TEST:
+      return
+    function_definitions = [
+        MockFunctionDefinition("aa", ["x"], "2 * x")
+        ]
+    depth = 50
+    formula = "aa(" * depth + "z" + ")" * depth
+    kinetic_law = self.mkKineticLawWithFormula(formula)
+    kinetic_law.expandFormula(function_definitions)
+    self.assertFalse("aa" in kinetic_law.expanded_formula)
+    self.assertEqual(kinetic_law.expanded_formula.count("2 *"), depth)
+
   def testMkSymbolExpression(self):
     # Test replace '^' with '**'
     if IGNORE_TEST:
@@ -741,6 +800,137 @@ class TestKineticLaw(unittest.TestCase):
     test = kinetic_law.isPolynomial(**kwargs)
     self.assertFalse(test)
 
+
+class TestKineticsContext(unittest.TestCase):
+
+  def testNumeratorDenominator(self):
+    # Test the simplified kinetics is parsed with the local symbols
+    if IGNORE_TEST:
+      return
+    context = kinetic_law.KineticsContext(kinetics_sim = "C*X*cell*vd*pow(C + Kd, -1)",
+        ids_list = ['C', 'cell', 'vd', 'X', 'Kd'])
+    self.assertEqual(context.numerator_denominator, ['C*X*cell*vd', 'C + Kd'])
+    self.assertFalse(context.is_polynomial)
+    self.assertFalse("C" in kinetic_law.__dict__)
+
+  def testStrangeFunction(self):
+    # Test kinetics with unknown ids or functions are not parsed
+    if IGNORE_TEST:
+      return
+    for kinetics_sim, ids_list in [("delay(X, tau)*k", ['X', 'tau', 'k']),
+        ("k*X*Y", ['k', 'X']), ("k*X", []), ("k*X", ['k', 'X', 'lambda'])]:
+      context = kinetic_law.KineticsContext(kinetics_sim = kinetics_sim,
+          ids_list = ids_list)
+      self.assertFalse(context.simplified_expression[0])
+      self.assertEqual(context.numerator_denominator, ['', ''])
+
+  def testSharedContext(self):
+    # Test the classifiers give the same result with a shared context
+    if IGNORE_TEST:
+      return
+    kinetics =  "C * cell * vd * X * pow(C + Kd, -1)"
+    ids_list = ['C', 'cell', 'vd', 'X', 'Kd']
+    kwargs = {"reactant_list": ['C'], "product_list": [], "kinetics": kinetics, \
+              "kinetics_sim": kinetics, "ids_list": ids_list, \
+              "species_in_kinetic_law": ['C', 'X'], \
+              "parameters_in_kinetic_law": ['cell', 'vd', 'Kd']}
+    law = helpers.getSimple_BIOMD3().reactions[2].kinetic_law
+    context_kwargs = dict(kwargs)
+    context_kwargs["context"] = kinetic_law.KineticsContext(kinetics = kinetics,
+        kinetics_sim = kinetics, ids_list = ids_list)
+    for name in ["isUNDR", "isUNMO", "isBIDR", "isBIMO", "isMM", "isMMcat",
+        "isHill", "isFraction"]:
+      self.assertEqual(getattr(law, name)(**kwargs), getattr(law, name)(**context_kwargs))
+    self.assertTrue(law.isMMcat(**context_kwargs))
+
+  def testMMFormat(self):
+    # Test the structural Michaelis-Menten matcher
+    if IGNORE_TEST:
+      return
+    law = helpers.getSimple_BIOMD3().reactions[4].kinetic_law
+    ids_list = ['S', 'E', 'V', 'K', 'c', 'h']
+    parameters = ['V', 'K', 'c', 'h']
+    def isMMSingle(kinetics):
+      context = kinetic_law.KineticsContext(kinetics = kinetics,
+          kinetics_sim = kinetics, ids_list = ids_list)
+      return law._MMSingleSpecInNumerator(context, parameters, ['S'])
+    def isMMTwo(kinetics):
+      context = kinetic_law.KineticsContext(kinetics = kinetics,
+          kinetics_sim = kinetics, ids_list = ids_list)
+      return law._MMTwoSpecInNumerator(context, parameters, ['S', 'E'], ['S'])
+    self.assertTrue(isMMSingle("V*S/(K + S)"))
+    self.assertTrue(isMMSingle("c*V*h*S*pow(S + K, -1)"))
+    self.assertTrue(isMMSingle("V*S/(K*(1 + S/K))"))
+    self.assertFalse(isMMSingle("S/(K + S)"))
+    self.assertFalse(isMMSingle("2*V*S/(K + S)"))
+    self.assertFalse(isMMSingle("V*K*S/(K + S)"))
+    self.assertFalse(isMMSingle("V**2*S/(K + S)"))
+    self.assertFalse(isMMSingle("V*S/(K + S)**2"))
+    self.assertFalse(isMMSingle("V*S/(K + c + S)"))
+    self.assertFalse(isMMSingle("V*E/(K + E)"))
+    self.assertTrue(isMMTwo("E*S/(K + S)"))
+    self.assertTrue(isMMTwo("c*V*E*S/(K + S)"))
+    self.assertFalse(isMMTwo("c*V*h*E*S/(K + S)"))
+    self.assertFalse(isMMTwo("V*S/(K + S)"))
+
+
+class TestReactionFeatures(unittest.TestCase):
+
+  def setUp(self):
+    self.kwargs = {"reactant_list": ['A'], "product_list": ['B'],
+        "kinetics": "k1*A - k2*B", "kinetics_sim": "k1*A - k2*B",
+        "ids_list": ['k1', 'A', 'k2', 'B'], "species_in_kinetic_law": ['A', 'B'],
+        "parameters_in_kinetic_law": ['k1', 'k2']}
+
+  def testFeatures(self):
+    # Test the features of the kinetics
+    if IGNORE_TEST:
+      return
+    features = kinetic_law.ReactionFeatures.fromKwargs(self.kwargs)
+    self.assertFalse(hasattr(features, "__dict__"))
+    self.assertEqual(features.terms, ["k1*A ", " k2*B"])
+    self.assertFalse(features.is_single_product_of_terms)
+    self.assertTrue(features.is_diff_of_two_products_of_terms)
+    self.assertTrue(features.is_product_of_terms_with_all_rcts_or_prds)
+    self.assertFalse(features.is_species_all_reactants)
+    self.assertFalse(features.is_power)
+    self.assertEqual(features.numerator, "A*k1 - B*k2")
+    self.assertEqual(features.denominator, "1")
+    self.assertEqual(features.species_in_denominator, frozenset())
+    features = kinetic_law.ReactionFeatures(kinetics = "V*pow(S, n)/(K + pow(S, n))",
+        kinetics_sim = "V*S**n/(K + S**n)", reactant_list = ['S'], product_list = [],
+        species_in_kinetic_law = ['S'], ids_list = ['V', 'S', 'n', 'K'])
+    self.assertTrue(features.is_power)
+    self.assertEqual(features.species_in_denominator, frozenset(['S']))
+    self.assertTrue(features.is_species_all_reactants)
+
+  def testLazy(self):
+    # Test the features are computed once, on their first access
+    if IGNORE_TEST:
+      return
+    features = kinetic_law.ReactionFeatures.fromKwargs(self.kwargs)
+    self.assertTrue(features._numerator is kinetic_law._NOT_COMPUTED)
+    self.assertTrue(features._context is kinetic_law._NOT_COMPUTED)
+    terms = features.terms
+    self.assertTrue(features._numerator is kinetic_law._NOT_COMPUTED)
+    self.assertTrue(features.terms is terms)
+    numerator = features.numerator
+    self.assertTrue(features.numerator is numerator)
+    self.assertEqual(features.context.numerator_denominator[0], numerator)
+
+  def testSharedFeatures(self):
+    # Test the classifiers give the same result with shared features
+    if IGNORE_TEST:
+      return
+    law = helpers.getSimple_BIOMD3().reactions[2].kinetic_law
+    features_kwargs = dict(self.kwargs)
+    features_kwargs["features"] = kinetic_law.ReactionFeatures.fromKwargs(self.kwargs)
+    for name in ["isZerothOrder", "isPowerTerms", "isUNDR", "isUNMO", "isBIDR",
+        "isBIMO", "isMM", "isMMcat", "isHill", "isFraction", "isPolynomial"]:
+      self.assertEqual(getattr(law, name)(**self.kwargs),
+          getattr(law, name)(**features_kwargs))
+    self.assertTrue(law.isBIDR(**features_kwargs))
+
 if __name__ == '__main__':
   unittest.main()
 
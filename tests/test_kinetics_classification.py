@@ -6,9 +6,20 @@ Tests for kinetics_classification.py
 # This file includes all the tests to do the kinetics analysis.
 
 from SBMLKinetics import kinetics_classification
+from SBMLKinetics.common import kinetics_rules
+from SBMLKinetics.common import simple_sbml
+from tests.common import helpers
 from sympy import *
+import concurrent.futures
+import numpy as np
+import pandas as pd
 import unittest 
 import math
+import os
+import shutil
+import signal
+import tempfile
+from unittest import mock
 
 IGNORE_TEST = False
 #sys.stdout = open(os.devnull, 'w') #try to block the print from the main() function
@@ -43,12 +54,15 @@ class TestKineticsClassification(unittest.TestCase):
     self.assertTrue(len(self.df_classification.index)>0) 
 
   def testClassification3(self):
-    # Test all the elements of df_classification are lists of strings
+    # Test all the elements of the legacy df_classification are lists of strings
     if IGNORE_TEST:
       return    
+    df_legacy = kinetics_classification.mkLegacyClassification(self.df_classification)
+    self.assertEqual(list(df_legacy.columns), 
+        kinetics_classification.COLUMN_NAME_df_classification)
     list_classification = []
-    for i in range(len(self.df_classification.columns)):
-      list_classification += self.df_classification.iloc[:,i].tolist()
+    for i in range(len(df_legacy.columns)):
+      list_classification += df_legacy.iloc[:,i].tolist()
     test = all(isinstance(item, str) for item in list_classification)
     self.assertTrue(test)
 
@@ -208,5 +222,544 @@ class TestKineticsClassification(unittest.TestCase):
     test = isinstance(self.biomodel_non_count, int)
     self.assertTrue(test)
 
+
+class TestParallelClassification(unittest.TestCase):
+
+  def testWorkers(self):
+    # Test the process pool gives the same statistics as the serial path
+    if IGNORE_TEST:
+      return
+    kwargs = {"zip_filename": "Mammalia.zip", "initial_model_indx": 6,
+        "final_model_indx": 9}
+    serial_tuple = kinetics_classification._dataSetStatistics(**kwargs)
+    parallel_tuple = kinetics_classification._dataSetStatistics(workers = 2, **kwargs)
+    self.assertEqual(len(serial_tuple), len(parallel_tuple))
+    for serial, parallel in zip(serial_tuple, parallel_tuple):
+      if isinstance(serial, pd.DataFrame):
+        pd.testing.assert_frame_equal(serial, parallel)
+      else:
+        self.assertEqual(serial, parallel)
+
+
+  def testThreads(self):
+    # Test the thread pool gives the same statistics as the serial path
+    if IGNORE_TEST:
+      return
+    kwargs = {"zip_filename": "Mammalia.zip", "initial_model_indx": 6,
+        "final_model_indx": 9}
+    serial_tuple = kinetics_classification._dataSetStatistics(**kwargs)
+    for cache_path in [None, os.path.join(tempfile.mkdtemp(), "cache.db")]:
+      thread_tuple = kinetics_classification._dataSetStatistics(workers = 4,
+          use_threads = True, cache_path = cache_path, **kwargs)
+      for serial, thread in zip(serial_tuple, thread_tuple):
+        if isinstance(serial, pd.DataFrame):
+          pd.testing.assert_frame_equal(serial, thread)
+        else:
+          self.assertEqual(serial, thread)
+      if cache_path is not None:
+        shutil.rmtree(os.path.dirname(cache_path))
+
+  def testConcurrentReactions(self):
+    # Stress test: models shared by threads are classified as serially
+    if IGNORE_TEST:
+      return
+    simples = [helpers.getSimple_BIOMD56()]
+    simples.extend([item.model for item in simple_sbml.modelIterator(initial = 6,
+        final = 12, zip_filename = "Mammalia.zip") if item is not None])
+    expected = [kinetics_classification._classifyModel(s) for s in simples]
+    num_repeat = 4
+    with concurrent.futures.ThreadPoolExecutor(max_workers = 8) as executor:
+      futures = [executor.submit(kinetics_classification._classifyModel, s)
+          for _ in range(num_repeat) for s in simples]
+      results = [f.result() for f in futures]
+    self.assertEqual(results, expected * num_repeat)
+
+
+class TestDirectoryClassification(unittest.TestCase):
+
+  def setUp(self):
+    self.dir = tempfile.mkdtemp()
+    self.filenames = []
+    for item in simple_sbml.contentIterator(initial = 6, final = 9,
+        zip_filename = "Mammalia.zip"):
+      filename = os.path.basename(item.filename)
+      with open(os.path.join(self.dir, filename), "wb") as fd:
+        fd.write(item.content)
+      self.filenames.append(filename)
+
+  def tearDown(self):
+    shutil.rmtree(self.dir)
+
+  def testDirectory(self):
+    # Test the models of a directory are classified as those of the zip file
+    if IGNORE_TEST:
+      return
+    expected = kinetics_classification._dataSetStatistics(zip_filename = "Mammalia.zip",
+        initial_model_indx = 6, final_model_indx = 9)
+    for workers in [1, 2]:
+      df_classification = kinetics_classification._dataSetStatistics(data_dir = self.dir,
+          zip_filename = None, workers = workers)[0]
+      self.assertEqual(df_classification[kinetics_classification.SBMLID].tolist(),
+          [os.path.basename(f) for f in expected[0][kinetics_classification.SBMLID]])
+      self.assertEqual(df_classification[kinetics_classification.CLASSIFICATIONS].tolist(),
+          expected[0][kinetics_classification.CLASSIFICATIONS].tolist())
+
+
+class TestCachedClassification(unittest.TestCase):
+
+  def setUp(self):
+    self.dir = tempfile.mkdtemp()
+    self.cache_path = os.path.join(self.dir, "classification.db")
+
+  def tearDown(self):
+    shutil.rmtree(self.dir)
+
+  def testCachePath(self):
+    # Test the statistics from the persistent cache are the same as without cache
+    if IGNORE_TEST:
+      return
+    kwargs = {"zip_filename": "Mammalia.zip", "initial_model_indx": 6,
+        "final_model_indx": 9}
+    expected_tuple = kinetics_classification._dataSetStatistics(**kwargs)
+    for _ in range(2):
+      cached_tuple = kinetics_classification._dataSetStatistics(
+          cache_path = self.cache_path, **kwargs)
+      for expected, cached in zip(expected_tuple, cached_tuple):
+        if isinstance(expected, pd.DataFrame):
+          pd.testing.assert_frame_equal(expected, cached)
+        else:
+          self.assertEqual(expected, cached)
+    self.assertTrue(os.path.isfile(self.cache_path))
+
+
+class TestReactionTimeout(unittest.TestCase):
+
+  def setUp(self):
+    self.kwargs = {"zip_filename": "Mammalia.zip", "initial_model_indx": 6,
+        "final_model_indx": 7}
+
+  def testBudget(self):
+    # Test the budget interrupts a long computation
+    if IGNORE_TEST:
+      return
+    budget = kinetics_classification._ReactionBudget(0.05)
+    with budget:
+      while True:
+        try:
+          pass
+        except:
+          pass
+    self.assertTrue(budget.expired)
+    with kinetics_classification._ReactionBudget(None) as budget:
+      budget.check()
+    self.assertFalse(budget.expired)
+
+  def testLateAlarm(self):
+    # Test an alarm raised in __exit__, after the classification of a reaction,
+    # is reported as a timeout of the reaction instead of aborting the model
+    if IGNORE_TEST:
+      return
+    simple = helpers.getSimple_BIOMD3()
+    old_handler = signal.getsignal(signal.SIGALRM)
+    exit = kinetics_classification._ReactionBudget.__exit__
+    def lateExit(budget, *args):
+      budget._onAlarm(signal.SIGALRM, None)
+      return exit(budget, *args)
+    with mock.patch.object(kinetics_classification._ReactionBudget, "__exit__",
+        lateExit):
+      records = kinetics_classification._classifyModel(simple,
+          reaction_timeout = 60.)
+    self.assertEqual(len(records), len(simple.reactions))
+    self.assertTrue(all(r.timeout for r in records))
+    num_type_classification = len(kinetics_classification.TYPES_NAME) - 1
+    self.assertTrue(all(r.classification == num_type_classification
+        for r in records))
+    self.assertEqual(signal.getitimer(signal.ITIMER_REAL), (0.0, 0.0))
+    self.assertEqual(signal.getsignal(signal.SIGALRM), old_handler)
+
+  def testReactionTimeout(self):
+    # Test the reactions exceeding the budget are reported as NA with a timeout
+    if IGNORE_TEST:
+      return
+    df_classification = kinetics_classification._dataSetStatistics(
+        reaction_timeout = 0., **self.kwargs)[0]
+    self.assertGreater(len(df_classification.index), 0)
+    self.assertTrue(all(df_classification[kinetics_classification.TIMEOUT]))
+    self.assertTrue(all(df_classification[kinetics_classification.NA]))
+    df_classification = kinetics_classification._dataSetStatistics(
+        reaction_timeout = 60., **self.kwargs)[0]
+    self.assertFalse(any(df_classification[kinetics_classification.TIMEOUT]))
+
+  def testTimeoutNotCached(self):
+    # Test the models with a timeout are not stored in the persistent cache
+    if IGNORE_TEST:
+      return
+    directory = tempfile.mkdtemp()
+    try:
+      cache_path = os.path.join(directory, "classification.db")
+      kinetics_classification._dataSetStatistics(cache_path = cache_path,
+          reaction_timeout = 0., **self.kwargs)
+      with kinetics_classification.classification_cache.ClassificationCache(
+          cache_path, kinetics_classification.CLASSIFIER_VERSION) as cache:
+        self.assertEqual(len(cache), 0)
+    finally:
+      shutil.rmtree(directory)
+
+
+class TestSummarizeClassifiedModels(unittest.TestCase):
+
+  def setUp(self):
+    Record = kinetics_classification.ReactionRecord
+    self.items = [
+        ("model1.xml", [Record("R1", 1, "S1 -> S2", "k1*S1", 1, 1),
+                        Record("R2", 9, "S2 -> S1", "f(S2)", 1, 1)]),
+        None,
+        ("model2.xml", [Record("R1", 3, "S1 + S2 -> S3", "k1*S1*S2", 2, 1)]),
+        ]
+
+  def testSummary(self):
+    # Test the statistics of the synthetic classified models
+    if IGNORE_TEST:
+      return
+    df_classification, df_gen_stat, df_mol_stat, df_gen_stat_PR, \
+        biomodel_non_count, df_table_PR, df_table_PR_per_model \
+        = kinetics_classification._summarizeClassifiedModels(self.items)
+    self.assertEqual(len(df_classification.index), 3)
+    self.assertEqual(df_classification[kinetics_classification.NA].tolist(), [False, True, False])
+    self.assertEqual(df_classification[kinetics_classification.RCT_NUM].tolist(), [1, 1, 2])
+    df_legacy = kinetics_classification.mkLegacyClassification(df_classification)
+    self.assertEqual(df_legacy[kinetics_classification.NA].tolist(), ['', 'x', ''])
+    self.assertEqual(df_legacy[kinetics_classification.CLASSIFICATIONS].tolist(),
+        ['UNDR', '', 'BIDR'])
+    self.assertEqual(df_mol_stat[kinetics_classification.RXN_NUM].tolist(), [2, 1])
+    self.assertEqual(df_gen_stat.at[0, kinetics_classification.RXN_NUM], 3)
+    self.assertEqual(len(df_gen_stat_PR.index), 16*len(kinetics_classification.TYPES_NAME))
+    self.assertEqual(biomodel_non_count, 1)
+    self.assertEqual(df_table_PR.iloc[1,1], 2)
+    self.assertEqual(df_table_PR.iloc[1,2], 1)
+    self.assertTrue(math.isclose(df_table_PR_per_model.iloc[1,1], 2.))
+
+  def testGenStatValues(self):
+    # Test the percentages and standard errors against hand-computed values:
+    # model1 is half UNDR and half NA, model2 is BIDR
+    if IGNORE_TEST:
+      return
+    _, df_gen_stat, df_mol_stat, _, _, _, _ \
+        = kinetics_classification._summarizeClassifiedModels(self.items)
+    types_name = kinetics_classification.TYPES_NAME
+    expected = {name: (0., 0., 0.) for name in types_name}
+    # (percentage, percentage per model, standard error of the percentage per
+    # model, i.e. the sample standard deviation divided by the square root of 2)
+    expected["UNDR"] = (1/3, 0.25, 0.25)
+    expected["NA"] = (1/3, 0.25, 0.25)
+    expected["BIDR"] = (1/3, 0.5, 0.5)
+    self.assertEqual(df_gen_stat[kinetics_classification.CLASSIFICATIONS].tolist(),
+        types_name)
+    for idx, name in enumerate(types_name):
+      percentage, percentage_per_model, sder = expected[name]
+      self.assertTrue(math.isclose(
+          df_gen_stat.at[idx, kinetics_classification.PERCENTAGE], percentage))
+      self.assertTrue(math.isclose(
+          df_gen_stat.at[idx, kinetics_classification.PERCENTAGE_PER_MODEL],
+          percentage_per_model))
+      self.assertTrue(math.isclose(
+          df_gen_stat.at[idx, kinetics_classification.PERCENTAGE_PER_MODEL_SDER],
+          sder))
+    self.assertEqual(df_gen_stat.at[0, kinetics_classification.BIOMOL_NUM], 2)
+    self.assertEqual(df_mol_stat[kinetics_classification.UNI].tolist(), [0.5, 0.])
+    self.assertEqual(df_mol_stat[kinetics_classification.BI].tolist(), [0., 1.])
+
+  def testEmpty(self):
+    # Test the statistics without any classified model
+    if IGNORE_TEST:
+      return
+    df_classification, df_gen_stat, df_mol_stat, _, biomodel_non_count, _, _ \
+        = kinetics_classification._summarizeClassifiedModels([])
+    self.assertEqual(len(df_classification.index), 0)
+    self.assertEqual(len(df_gen_stat.index), 0)
+    self.assertEqual(len(df_mol_stat.index), 0)
+    self.assertEqual(biomodel_non_count, 0)
+
+
+class TestIterClassifications(unittest.TestCase):
+
+  def setUp(self):
+    self.kwargs = {"zip_filename": "Mammalia.zip", "initial_model_indx": 6,
+        "final_model_indx": 9}
+
+  def testIterClassifications(self):
+    # Test the streamed reactions are the rows of df_classification
+    if IGNORE_TEST:
+      return
+    df_classification = kinetics_classification._dataSetStatistics(**self.kwargs)[0]
+    for workers in [1, 2]:
+      reactions = list(kinetics_classification.iterClassifications(
+          workers = workers, **self.kwargs))
+      self.assertEqual([r.sbml_id for r in reactions], 
+          df_classification[kinetics_classification.SBMLID].tolist())
+      self.assertEqual([r.reaction_id for r in reactions], 
+          df_classification[kinetics_classification.REACTIONID].tolist())
+      self.assertEqual([r.kinetic_law for r in reactions], 
+          df_classification[kinetics_classification.KINETICLAW].tolist())
+
+  def testTypedClassification(self):
+    # Test the types of the columns of df_classification
+    if IGNORE_TEST:
+      return
+    df = kinetics_classification._dataSetStatistics(**self.kwargs)[0]
+    self.assertEqual(list(df.columns),
+        kinetics_classification.COLUMN_NAME_df_classification_typed)
+    for column in [kinetics_classification.SBMLID, kinetics_classification.CLASSIFICATIONS]:
+      self.assertIsInstance(df[column].dtype, pd.CategoricalDtype)
+    for column in kinetics_classification.FLAG_COLUMN_NAME_df_classification \
+        + [kinetics_classification.TIMEOUT]:
+      self.assertEqual(df[column].dtype, bool)
+    for column in [kinetics_classification.RCT_NUM, kinetics_classification.PRD_NUM]:
+      self.assertEqual(df[column].dtype, np.int8)
+    # a single flag per reaction, that of its classification
+    flags = df[kinetics_classification.FLAG_COLUMN_NAME_df_classification].values
+    self.assertTrue(all(flags.sum(axis=1) == 1))
+    self.assertEqual([kinetics_classification.TYPES_NAME[i] for i in flags.argmax(axis=1)],
+        df[kinetics_classification.CLASSIFICATIONS].tolist())
+
+  def testAccumulator(self):
+    # Test the accumulated statistics are those of _dataSetStatistics
+    if IGNORE_TEST:
+      return
+    _, df_gen_stat, _, df_gen_stat_PR, biomodel_non_count, df_table_PR, \
+        df_table_PR_per_model = kinetics_classification._dataSetStatistics(**self.kwargs)
+    accumulator = kinetics_classification.ClassificationAccumulator()
+    for reaction in kinetics_classification.iterClassifications(**self.kwargs):
+      accumulator.addReaction(reaction)
+      # the statistics can be queried while adding the reactions
+      self.assertGreater(accumulator.rxn_num, 0)
+    pd.testing.assert_frame_equal(accumulator.getGenStat(), df_gen_stat)
+    pd.testing.assert_frame_equal(accumulator.getGenStatPR(), df_gen_stat_PR)
+    pd.testing.assert_frame_equal(accumulator.getTablePR(), df_table_PR)
+    pd.testing.assert_frame_equal(accumulator.getTablePRPerModel(), df_table_PR_per_model)
+    self.assertEqual(accumulator.biomodel_non_count, biomodel_non_count)
+    self.assertEqual(accumulator.model_num, df_gen_stat.at[0, kinetics_classification.BIOMOL_NUM])
+
+  def testAddAndMerge(self):
+    # Test merging the models added to two accumulators
+    if IGNORE_TEST:
+      return
+    expected_tuple = kinetics_classification._dataSetStatistics(**self.kwargs)
+    items = list(kinetics_classification._iterClassifiedModels(
+        kinetics_classification.cn.BIOMODELS_DIR, "Mammalia.zip", 6, 9))
+    accumulator = kinetics_classification.ClassificationAccumulator()
+    other = kinetics_classification.ClassificationAccumulator()
+    accumulator.add(items[0])
+    for item in items[1:]:
+      other.add(item)
+    accumulated_tuple = accumulator.merge(other).getStatistics()
+    for i in [1, 3, 5, 6]:
+      pd.testing.assert_frame_equal(accumulated_tuple[i], expected_tuple[i])
+    self.assertEqual(accumulated_tuple[4], expected_tuple[4])
+
+  def testPRBuckets(self):
+    # Test the reactions with more than two reactants or products share a PR
+    if IGNORE_TEST:
+      return
+    def mkRecord(num_rcts, num_prds, classification):
+      return kinetics_classification.ReactionRecord(reaction_id="r",
+          classification=classification, reaction=None, kinetic_law=None,
+          num_rcts=num_rcts, num_prds=num_prds)
+    records = [mkRecord(1, 1, 0), mkRecord(1, 1, 1), mkRecord(3, 0, 0),
+        mkRecord(5, 0, 2), mkRecord(0, 7, 0)]
+    accumulator = kinetics_classification.ClassificationAccumulator()
+    accumulator.add(("model", records))
+    df_table_PR = accumulator.getTablePR()
+    self.assertEqual(df_table_PR.loc["P = 1", "R = 1"], 2)
+    self.assertEqual(df_table_PR.loc["P = 0", "R > 2"], 2)
+    self.assertEqual(df_table_PR.loc["P > 2", "R = 0"], 1)
+    self.assertEqual(df_table_PR.values.sum(), len(records))
+    df_gen_stat_PR = accumulator.getGenStatPR()
+    num_types = accumulator.num_types
+    # PR "P = 0, R > 2" is the 4th of the 16 PRs
+    percentages = df_gen_stat_PR[kinetics_classification.PERCENTAGE].values
+    self.assertEqual(list(percentages[3*num_types:3*num_types+3]), [0.5, 0., 0.5])
+
+  def testEmptyAccumulator(self):
+    # Test the statistics without any reaction
+    if IGNORE_TEST:
+      return
+    accumulator = kinetics_classification.ClassificationAccumulator()
+    self.assertEqual(accumulator.rxn_num, 0)
+    self.assertEqual(len(accumulator.getGenStat().index), 0)
+    self.assertEqual(len(accumulator.getGenStatPR().index), 16*accumulator.num_types)
+
+
+class TestSimplifyCache(unittest.TestCase):
+
+  def setUp(self):
+    kinetics_classification.setSimplifyCacheSize()
+
+  def tearDown(self):
+    kinetics_classification.setSimplifyCacheSize()
+
+  def testCanonicalizeKinetics(self):
+    # Test the identifiers are replaced and the sympy names are kept
+    if IGNORE_TEST:
+      return
+    canonical1, id_dct = kinetics_classification._canonicalizeKinetics("Vmax*S1/(Km+S1)")
+    canonical2, _ = kinetics_classification._canonicalizeKinetics("Vm*Sa/(Km+Sa)")
+    self.assertEqual(canonical1, canonical2)
+    self.assertEqual(set(id_dct.values()), {"Vmax", "S1", "Km"})
+    canonical, id_dct = kinetics_classification._canonicalizeKinetics("exp(-k*t)*1e-3*pi")
+    self.assertTrue("exp(" in canonical)
+    self.assertTrue("1e-3" in canonical)
+    self.assertTrue("pi" in canonical)
+    self.assertEqual(set(id_dct.values()), {"k", "t"})
+
+  def testSimplifyKinetics(self):
+    # Test the cached simplification is the same as simplify
+    if IGNORE_TEST:
+      return
+    for kinetics in ["k1*S1", "k2*S2", "c*(kf*X - kr*Y)", "compartment_1*(k1*A - k2*B)",
+        "Vmax*S1/(Km+S1)", "f(x, y)*f", "lambda*x"]:
+      try:
+        expected = str(simplify(kinetics))
+      except:
+        expected = kinetics
+      self.assertEqual(kinetics_classification._simplifyKinetics(kinetics), expected)
+    cache_info = kinetics_classification.simplifyCacheInfo()
+    self.assertEqual(cache_info.hits, 2)
+    self.assertEqual(cache_info.misses, 5)
+
+  def testSetSimplifyCacheSize(self):
+    # Test the cache is bounded
+    if IGNORE_TEST:
+      return
+    kinetics_classification.setSimplifyCacheSize(2)
+    for kinetics in ["a", "a+b", "a+b+c"]:
+      kinetics_classification._simplifyKinetics(kinetics)
+    cache_info = kinetics_classification.simplifyCacheInfo()
+    self.assertEqual(cache_info.maxsize, 2)
+    self.assertEqual(cache_info.currsize, 2)
+
+
+class TestRegisterClassifier(unittest.TestCase):
+
+  def tearDown(self):
+    for name in ["POWER", "ANY"]:
+      if name in kinetics_classification.TYPES_NAME:
+        kinetics_classification.unregisterClassifier(name)
+
+  def testRegisterClassifier(self):
+    # Test the tables have the columns of a registered kinetics type
+    if IGNORE_TEST:
+      return
+    types_name = list(kinetics_classification.TYPES_NAME)
+    kinetics_classification.registerClassifier(kinetics_classification.POWER_TERMS_RULE)
+    self.assertEqual(kinetics_classification.TYPES_NAME,
+        types_name[:1] + ["POWER"] + types_name[1:])
+    self.assertEqual(kinetics_classification.FLAG_COLUMN_NAME_df_classification[1],
+        kinetics_classification.POWER)
+    self.assertTrue(kinetics_classification.POWER in
+        kinetics_classification.COLUMN_NAME_df_mol_stat)
+    self.assertNotEqual(kinetics_classification.getClassifierVersion(),
+        kinetics_classification.CLASSIFIER_VERSION)
+    Record = kinetics_classification.ReactionRecord
+    items = [("model1.xml", [Record("R1", 1, "S1 -> S2", "pow(S1, 2)*k1", 1, 1),
+        Record("R2", 10, "S2 -> S1", "f(S2)", 1, 1)])]
+    df_classification, df_gen_stat, df_mol_stat, df_gen_stat_PR, _, _, _ \
+        = kinetics_classification._summarizeClassifiedModels(items)
+    self.assertEqual(df_classification[kinetics_classification.POWER].tolist(), [True, False])
+    self.assertEqual(df_classification[kinetics_classification.CLASSIFICATIONS].tolist(),
+        ["POWER", "NA"])
+    self.assertEqual(df_gen_stat[kinetics_classification.CLASSIFICATIONS].tolist(),
+        kinetics_classification.TYPES_NAME)
+    self.assertEqual(df_mol_stat.at[0, kinetics_classification.POWER], 0.5)
+    self.assertEqual(len(df_gen_stat_PR), 16*len(kinetics_classification.TYPES_NAME))
+    kinetics_classification.unregisterClassifier("POWER")
+    self.assertEqual(kinetics_classification.TYPES_NAME, types_name)
+    self.assertEqual(kinetics_classification.getClassifierVersion(),
+        kinetics_classification.CLASSIFIER_VERSION)
+
+  def testRegisteredArguments(self):
+    # Test a registered classifier gets the anonymized ids of the canonical kinetic law
+    if IGNORE_TEST:
+      return
+    kinetics_classification.setFingerprintCacheSize()
+    calls = []
+    def isAny(kinetic_law, **kwargs):
+      calls.append(kwargs)
+      return False
+    kinetics_classification.registerClassifier(kinetics_rules.Rule(
+        "ANY", (), isAny, priority=0))
+    simple = helpers.getSimple_BIOMD3()
+    kinetics_classification._classifyModel(simple)
+    self.assertGreater(len(calls), 0)
+    species = set(s.getId() for s in simple.species)
+    for kwargs in calls:
+      self.assertEqual(len(species.intersection(kwargs["ids_list"])), 0)
+      self.assertTrue(all(id.startswith("_x") for id in kwargs["species_in_kinetic_law"]))
+
+  def testClassifyRegistered(self):
+    # Test a registered classifier takes precedence by its priority
+    if IGNORE_TEST:
+      return
+    kwargs = {"zip_filename": "Mammalia.zip", "initial_model_indx": 6,
+        "final_model_indx": 9}
+    expected = [r.classification for r in
+        kinetics_classification.iterClassifications(**kwargs)]
+    kinetics_classification.registerClassifier(kinetics_classification.POWER_TERMS_RULE)
+    classifications = [r.classification for r in
+        kinetics_classification.iterClassifications(**kwargs)]
+    self.assertEqual(len(classifications), len(expected))
+    for classification, old_classification in zip(classifications, expected):
+      # the types after POWER are shifted by one
+      if classification != 1:
+        self.assertEqual(classification,
+            old_classification + (1 if old_classification > 0 else 0))
+      else:
+        self.assertNotEqual(old_classification, 0)
+
+
+class TestFingerprintCache(unittest.TestCase):
+
+  def setUp(self):
+    kinetics_classification.setFingerprintCacheSize()
+    self.kwargs = {"zip_filename": "Mammalia.zip", "initial_model_indx": 6,
+        "final_model_indx": 9}
+
+  def tearDown(self):
+    kinetics_classification.setFingerprintCacheSize()
+
+  def testMkFingerprint(self):
+    # Test the renamed reactions have the same fingerprint
+    if IGNORE_TEST:
+      return
+    fingerprint1 = kinetics_classification._mkFingerprint("k1*A", ["A"], ["B"],
+        ["A"], ["k1"], ["k1", "A", "B"])
+    fingerprint2 = kinetics_classification._mkFingerprint("kf*X", ["X"], ["P"],
+        ["X"], ["kf"], ["kf", "X", "P"])
+    self.assertEqual(fingerprint1, fingerprint2)
+    # The roles of the ids are part of the fingerprint
+    fingerprint3 = kinetics_classification._mkFingerprint("kf*X", ["X"], [],
+        ["X"], ["kf"], ["kf", "X"])
+    self.assertNotEqual(fingerprint1, fingerprint3)
+    # The ids do not match inside of other ids
+    fingerprint = kinetics_classification._mkFingerprint("u/Tau", ["u"], [],
+        ["u"], ["Tau"], ["u", "Tau"])
+    self.assertEqual(fingerprint.kinetics.count(fingerprint.reactant_list[0]), 1)
+
+  def testDedup(self):
+    # Test the reused classifications are those of the classifiers
+    if IGNORE_TEST:
+      return
+    kinetics_classification.setFingerprintCacheSize(0)
+    expected = [r.classification for r in
+        kinetics_classification.iterClassifications(**self.kwargs)]
+    kinetics_classification.setFingerprintCacheSize()
+    classifications = [r.classification for r in
+        kinetics_classification.iterClassifications(**self.kwargs)]
+    self.assertEqual(classifications, expected)
+    cache_info = kinetics_classification.fingerprintCacheInfo()
+    self.assertEqual(cache_info.hits + cache_info.misses, len(expected))
+    self.assertGreater(cache_info.dedup_ratio, 0)
+    self.assertEqual(cache_info.currsize, cache_info.misses)
+
 if __name__ == '__main__':
   unittest.main()
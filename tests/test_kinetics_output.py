@@ -9,6 +9,9 @@ from SBMLKinetics import kinetics_classification
 from SBMLKinetics import kinetics_output
 from SBMLKinetics import types
 from sympy import *
+import contextlib
+import io
+import pandas as pd
 import unittest
 import math
 
@@ -207,6 +210,92 @@ class TestKineticsClassification(unittest.TestCase):
     == 1.)
 
 
+class TestAccumulatedAnalyzer(unittest.TestCase):
+
+  def setUp(self):
+    self.SBMLData = kinetics_output.KineticAnalyzer(dataSet = "Mammalia",
+        model_indices = range(6, 10))
+    #two shards of the same models
+    accumulators = []
+    for initial_model_indx, final_model_indx in [(6, 8), (8, 9)]:
+      accumulator = kinetics_classification.ClassificationAccumulator()
+      for item in kinetics_classification._iterClassifiedModels(
+          kinetics_classification.cn.BIOMODELS_DIR, "Mammalia.zip",
+          initial_model_indx, final_model_indx):
+        accumulator.add(item)
+      accumulators.append(accumulator)
+    accumulator = accumulators[0].merge(accumulators[1])
+    self.accumulated_data = kinetics_output.KineticAnalyzer.fromAccumulator(accumulator)
+
+  def testDistributions(self):
+    # Test the merged shards give the distributions of the whole dataset
+    if IGNORE_TEST:
+      return
+    pd.testing.assert_frame_equal(self.accumulated_data.getKTypeDistribution(),
+        self.SBMLData.getKTypeDistribution())
+    pd.testing.assert_frame_equal(self.accumulated_data.getRTypeDistribution(),
+        self.SBMLData.getRTypeDistribution())
+    pd.testing.assert_frame_equal(self.accumulated_data.getRTypeDistributionPerModel(),
+        self.SBMLData.getRTypeDistributionPerModel())
+    R_type = types.R_type(1,1)
+    pd.testing.assert_frame_equal(self.accumulated_data.getKTypeDistributionPerRType(R_type),
+        self.SBMLData.getKTypeDistributionPerRType(R_type))
+    self.assertEqual(self.accumulated_data.getNumSBMLModelsAnalyzed(),
+        self.SBMLData.getNumSBMLModelsAnalyzed())
+    self.assertEqual(self.accumulated_data.getNumRxnsAnalyzed(),
+        self.SBMLData.getNumRxnsAnalyzed())
+
+  def testPrintBriefStat(self):
+    # Test the brief statistics count the reactions of the merged shards
+    if IGNORE_TEST:
+      return
+    outputs = []
+    for analyzer in [self.accumulated_data, self.SBMLData]:
+      stream = io.StringIO()
+      with contextlib.redirect_stdout(stream):
+        analyzer._printBriefStatOfKTypeDistribution()
+      outputs.append(stream.getvalue())
+    self.assertTrue("Reaction number: %d" % self.SBMLData.getNumRxnsAnalyzed()
+        in outputs[0])
+    self.assertEqual(outputs[0], outputs[1])
+
+
+class TestLazyAnalyzer(unittest.TestCase):
+
+  def setUp(self):
+    kwargs = {"dataSet": "Mammalia", "model_indices": range(6, 10)}
+    self.SBMLData = kinetics_output.KineticAnalyzer(**kwargs)
+    self.lazy_data = kinetics_output.KineticAnalyzer(lazy = True, **kwargs)
+
+  def testRTypeQueries(self):
+    # Test the R type queries do not classify the kinetics
+    if IGNORE_TEST:
+      return
+    pd.testing.assert_frame_equal(self.lazy_data.getRTypeDistribution(),
+        self.SBMLData.getRTypeDistribution())
+    pd.testing.assert_frame_equal(self.lazy_data.getRTypeDistributionPerModel(),
+        self.SBMLData.getRTypeDistributionPerModel())
+    R_type = types.R_type(1,1)
+    self.assertEqual(self.lazy_data.getRTypeProb(R_type), self.SBMLData.getRTypeProb(R_type))
+    self.assertEqual(self.lazy_data.getNumSBMLModelsAnalyzed(),
+        self.SBMLData.getNumSBMLModelsAnalyzed())
+    self.assertEqual(self.lazy_data.getNumRxnsAnalyzed(),
+        self.SBMLData.getNumRxnsAnalyzed())
+    self.assertIsNone(self.lazy_data._tuple)
+
+  def testKTypeQueries(self):
+    # Test the K type queries classify the kinetics once
+    if IGNORE_TEST:
+      return
+    pd.testing.assert_frame_equal(self.lazy_data.getKTypeDistribution(),
+        self.SBMLData.getKTypeDistribution())
+    statistics = self.lazy_data.tuple
+    self.assertEqual(self.lazy_data.getTopKType()[0].K_type_str,
+        self.SBMLData.getTopKType()[0].K_type_str)
+    self.assertIs(self.lazy_data.tuple, statistics)
+    self.assertIs(self.lazy_data.r_type_tuple, statistics)
+
+
 ##Presentations (not applicable)
 ##_functions are not applicable
 
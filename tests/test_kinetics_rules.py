@@ -0,0 +1,137 @@
+"""
+Tests for the rule engine of the kinetics types
+"""
+
+from SBMLKinetics.common import kinetics_rules
+from SBMLKinetics.common.kinetic_law import KineticsContext
+from SBMLKinetics import kinetics_classification
+from tests.common import helpers
+
+import unittest
+
+
+IGNORE_TEST = False
+CLASSIFIERS = ["isZerothOrder", "isUNDR", "isUNMO", "isBIDR", "isBIMO", "isMM",
+    "isMMcat", "isHill", "isFraction"]
+
+
+#############################
+# Tests
+#############################
+class TestRuleEngine(unittest.TestCase):
+
+  def setUp(self):
+    self.law = helpers.getSimple_BIOMD3().reactions[2].kinetic_law
+    self.engine = kinetics_classification.K_TYPE_RULES
+
+  def mkKwargs(self, kinetics, reactant_list, product_list, species, parameters):
+    ids_list = list(dict.fromkeys(species + parameters + reactant_list + product_list))
+    return {"kinetics": kinetics, "kinetics_sim": kinetics,
+        "reactant_list": reactant_list, "product_list": product_list,
+        "species_in_kinetic_law": species, "parameters_in_kinetic_law": parameters,
+        "ids_list": ids_list,
+        "context": KineticsContext(kinetics=kinetics, kinetics_sim=kinetics,
+            ids_list=ids_list)}
+
+  def testRules(self):
+    # Test the rules are in the order of the kinetics types
+    if IGNORE_TEST:
+      return
+    self.assertEqual(self.engine.names, kinetics_classification.TYPES_NAME[:-1])
+    self.assertEqual([r.classifier for r in self.engine.rules], CLASSIFIERS)
+
+  def testInvalidRule(self):
+    # Test the rules are checked when compiled
+    if IGNORE_TEST:
+      return
+    with self.assertRaises(ValueError):
+      kinetics_rules.RuleEngine([kinetics_rules.Rule("ZERO",
+          (("num_modifiers", 0),), "isZerothOrder")])
+    with self.assertRaises(ValueError):
+      kinetics_rules.RuleEngine([kinetics_rules.Rule("ZERO", (), "isZeroth")])
+
+  def testClassify(self):
+    # Test the classification is the first True classifier
+    if IGNORE_TEST:
+      return
+    for args in [
+        ("k1", [], [], [], ["k1"]),
+        ("k1*A", ["A"], ["B"], ["A"], ["k1"]),
+        ("k1*A*E", ["A"], ["B"], ["A", "E"], ["k1"]),
+        ("k1*A - k2*B", ["A"], ["B"], ["A", "B"], ["k1", "k2"]),
+        ("V*S/(K + S)", ["S"], ["P"], ["S"], ["V", "K"]),
+        ("E*S/(K + S)", ["S"], ["P"], ["S", "E"], ["K"]),
+        ("V*pow(S, n)/(pow(K, n) + pow(S, n))", [], ["P"], ["S"], ["V", "K", "n"]),
+        ("V*S/(K + S + I)", ["S"], ["P"], ["S", "I"], ["V", "K"]),
+        ("k1*A*B - k2*A", ["A"], ["B"], ["A", "B"], ["k1", "k2"]),
+        ]:
+      kwargs = self.mkKwargs(*args)
+      flags = [getattr(self.law, name)(**kwargs) for name in CLASSIFIERS]
+      expected = flags.index(True) if True in flags else len(CLASSIFIERS)
+      self.assertEqual(self.engine.classify(self.law, **self.mkKwargs(*args)), expected)
+
+  def testShortCircuit(self):
+    # Test the classifiers are called only while no rule is True and if
+    # the features of the reaction allow them to be True
+    if IGNORE_TEST:
+      return
+    calls = []
+    def check():
+      calls.append(None)
+    kwargs = self.mkKwargs("k1", [], [], [], ["k1"])
+    self.assertEqual(self.engine.classify(self.law, check=check, **kwargs), 0)
+    self.assertEqual(len(calls), 1)
+    calls.clear()
+    kwargs = self.mkKwargs("V*S/(K + S)", ["S"], ["P"], ["S"], ["V", "K"])
+    self.assertEqual(self.engine.classify(self.law, check=check, **kwargs), 5)
+    self.assertEqual(len(calls), 1)
+
+
+class TestRegistry(unittest.TestCase):
+
+  def setUp(self):
+    self.law = helpers.getSimple_BIOMD3().reactions[2].kinetic_law
+    Rule = kinetics_rules.Rule
+    self.engine = kinetics_rules.RuleEngine([
+        Rule("FR", (("species_in_denominator", True),), "isFraction", priority=20),
+        Rule("MM", (("species_in_denominator", True), ("num_species", 1)), "isMM",
+            priority=10, cost=kinetics_rules.COST_SYMBOLIC),
+        Rule("ZERO", (("num_species", 0),), "isZerothOrder", priority=10,
+            cost=kinetics_rules.COST_CHEAP),
+        ])
+
+  def testOrder(self):
+    # Test the rules are ordered by priority and cost, and the conditions by cost
+    if IGNORE_TEST:
+      return
+    self.assertEqual(self.engine.names, ["ZERO", "MM", "FR"])
+    self.assertEqual(self.engine.columns, ["ZERO", "MM", "FR"])
+    conditions = self.engine._compiled[1][0]
+    self.assertEqual([c[0] for c in conditions], ["num_species", "species_in_denominator"])
+
+  def testRegister(self):
+    # Test the rules are added and removed by name
+    if IGNORE_TEST:
+      return
+    def isLinear(kinetic_law, **kwargs):
+      return kwargs["kinetics"] == "k1*A"
+    rule = kinetics_rules.Rule("LIN", (("num_species", 1),), isLinear, priority=15,
+        column="Linear")
+    self.engine.register(rule)
+    self.assertEqual(self.engine.names, ["ZERO", "MM", "LIN", "FR"])
+    self.assertEqual(self.engine.columns[2], "Linear")
+    kwargs = {"kinetics": "k1*A", "kinetics_sim": "k1*A", "reactant_list": ["A"],
+        "product_list": [], "species_in_kinetic_law": ["A"],
+        "parameters_in_kinetic_law": ["k1"], "ids_list": ["k1", "A"]}
+    self.assertEqual(self.engine.classify(self.law, **kwargs), 2)
+    with self.assertRaises(ValueError):
+      self.engine.register(rule)
+    self.engine.unregister("LIN")
+    self.assertEqual(self.engine.names, ["ZERO", "MM", "FR"])
+    self.assertEqual(self.engine.classify(self.law, **kwargs), 3)
+    with self.assertRaises(ValueError):
+      self.engine.unregister("LIN")
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -2,16 +2,21 @@
 Tests for simple_sbml
 """
 from SBMLKinetics.common import constants as cn
+from SBMLKinetics.common import kinetic_law as kinetic_law_module
 from SBMLKinetics.common import simple_sbml
 from SBMLKinetics.common.simple_sbml import SimpleSBML
 from SBMLKinetics.common.reaction import Reaction
 from SBMLKinetics.common import util
 from tests.common import helpers
 
+import concurrent.futures
 import copy
 import numpy as np
 import os
 import libsbml
+import pickle
+import shutil
+import tempfile
 import unittest
 #import tellurium as te
 import zipfile
@@ -45,6 +50,68 @@ class TestSimpleSBML(unittest.TestCase):
     simple = helpers.getSimple_BIOMD56()
     self.assertGreater(len(simple.function_definitions), 0)
 
+  def testIndexes(self):
+    if IGNORE_TEST:
+      return
+    for dct, a_list in [(self.simple.reaction_dct, self.simple.reactions),
+        (self.simple.species_dct, self.simple.species),
+        (self.simple.parameter_dct, self.simple.parameters)]:
+      self.assertEqual(list(dct.keys()), [e.getId() for e in a_list])
+      for e in a_list:
+        self.assertIs(dct[e.getId()], e)
+    self.assertIsNone(self.simple.getSpecies(NO_NAME))
+    # an id shared by several instances is an error
+    species = self.simple.species[0]
+    self.simple.species_dct = self.simple._mkIndex([species, species])
+    with self.assertRaises(ValueError):
+      self.simple.getSpecies(species.getId())
+
+  def testLazy(self):
+    if IGNORE_TEST:
+      return
+    # BIOMD56 has function definitions to expand
+    simple = helpers.getSimple_BIOMD56()
+    lazy_simple = simple_sbml.SimpleSBML(helpers.TEST_PATH_56, lazy=True)
+    self.assertEqual(len(lazy_simple.reactions), len(simple.reactions))
+    for reaction, lazy_reaction in zip(simple.reactions, lazy_simple.reactions):
+      self.assertEqual(len(lazy_reaction.reactants), len(reaction.reactants))
+      self.assertEqual(len(lazy_reaction.products), len(reaction.products))
+      kinetic_law = lazy_reaction.kinetic_law
+      self.assertIs(kinetic_law._formula, kinetic_law_module._NOT_COMPUTED)
+      self.assertIs(kinetic_law._symbols, kinetic_law_module._NOT_COMPUTED)
+      self.assertEqual(kinetic_law.expanded_formula, reaction.kinetic_law.expanded_formula)
+      self.assertEqual(kinetic_law.formula, reaction.kinetic_law.formula)
+      self.assertEqual(kinetic_law.symbols, reaction.kinetic_law.symbols)
+
+  def testGetSymbolType(self):
+    if IGNORE_TEST:
+      return
+    for species in self.simple.species:
+      self.assertEqual(self.simple.getSymbolType(species.getId()),
+          cn.SYMBOL_SPECIES)
+    for parameter in self.simple.parameters:
+      self.assertEqual(self.simple.getSymbolType(parameter.getId()),
+          cn.SYMBOL_PARAMETER)
+    for compartment in self.simple.compartments:
+      self.assertEqual(self.simple.getSymbolType(compartment.getId()),
+          cn.SYMBOL_COMPARTMENT)
+    self.assertEqual(self.simple.getSymbolType(NO_NAME), cn.SYMBOL_OTHER)
+
+  def testFunctionExpander(self):
+    if IGNORE_TEST:
+      return
+    simple = helpers.getSimple_BIOMD56()
+    expander = simple.function_expander
+    self.assertIs(expander.function_definitions, simple.function_definitions)
+    for reaction in simple.reactions:
+      kinetic_law = reaction.kinetic_law
+      self.assertIs(kinetic_law._function_expander, expander)
+      expanded_formula = kinetic_law.expanded_formula
+      kinetic_law.expandFormula(simple.function_definitions)
+      # Repeated expansions are memoized
+      self.assertIs(kinetic_law.expanded_formula, expanded_formula)
+      self.assertIs(kinetic_law._function_expander, expander)
+
   def testGet(self):
     if IGNORE_TEST:
       return
@@ -88,6 +155,121 @@ class TestFunctions(unittest.TestCase):
       return
     self._testIterator(simple_sbml.modelIterator(final=1))
 
+  def testContentIterator(self):
+    if IGNORE_TEST:
+      return
+    INITIAL = 6
+    FINAL = 9
+    itr = simple_sbml.contentIterator(initial=INITIAL, final=FINAL,
+        zip_filename="Mammalia.zip")
+    items = list(itr)
+    self.assertEqual([item.number for item in items], list(range(INITIAL, FINAL)))
+    for item in items:
+      self.assertTrue(isinstance(item.content, bytes))
+      iterator_item = simple_sbml.mkIteratorItem(item)
+      self.assertEqual(iterator_item.filename, item.filename)
+      self.assertTrue(isinstance(iterator_item.model, SimpleSBML))
+
+  def testContentIteratorPrefetch(self):
+    if IGNORE_TEST:
+      return
+    kwargs = {"initial": 6, "final": 12, "zip_filename": "Mammalia.zip"}
+    expected_items = list(simple_sbml.contentIterator(prefetch=0, **kwargs))
+    for prefetch in [1, 3, 10]:
+      items = list(simple_sbml.contentIterator(prefetch=prefetch, **kwargs))
+      self.assertEqual(items, expected_items)
+    # stop before the end
+    itr = simple_sbml.contentIterator(prefetch=3, **kwargs)
+    self.assertEqual(next(itr), expected_items[0])
+    itr.close()
+
+  def testReadSBMLDocument(self):
+    # Test the documents are read from a path, a string, bytes and buffers
+    if IGNORE_TEST:
+      return
+    with open(helpers.TEST_PATH, 'rb') as fd:
+      content = fd.read()
+    num_reaction = SimpleSBML(helpers.TEST_PATH).model.getNumReactions()
+    self.assertGreater(num_reaction, 0)
+    for model_reference in [helpers.TEST_PATH, content.decode("utf-8"), content,
+        memoryview(content), open(helpers.TEST_PATH, 'rb')]:
+      document = simple_sbml.readSBMLDocument(model_reference)
+      self.assertEqual(document.getModel().getNumReactions(), num_reaction)
+
+  def testGetSBMLReader(self):
+    # Test a reader is shared by the documents read in a thread
+    if IGNORE_TEST:
+      return
+    reader = simple_sbml.getSBMLReader()
+    self.assertIs(simple_sbml.getSBMLReader(), reader)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+      other_reader = executor.submit(simple_sbml.getSBMLReader).result()
+    self.assertIsNot(other_reader, reader)
+
+  def testIterSimpleSBML(self):
+    # Test the models of raw documents, None for an invalid one
+    if IGNORE_TEST:
+      return
+    with open(helpers.TEST_PATH, 'rb') as fd:
+      content = fd.read()
+    models = list(simple_sbml.iterSimpleSBML([content, b"not sbml", content],
+        lazy=True))
+    self.assertEqual(len(models), 3)
+    self.assertIsNone(models[1])
+    for model in [models[0], models[2]]:
+      self.assertTrue(isinstance(model, SimpleSBML))
+      self.assertEqual(len(model.reactions), len(helpers.getSimple().reactions))
+
+  def testZipReader(self):
+    if IGNORE_TEST:
+      return
+    path = os.path.join(cn.BIOMODELS_DIR, "Mammalia.zip")
+    reader = simple_sbml.ZipReader(path)
+    names = reader.getNames()
+    content = reader.read(names[6])
+    # a reader is sent to other processes without its handle
+    reader = pickle.loads(pickle.dumps(reader))
+    self.assertEqual(reader.read(names[6]), content)
+    reader.close()
+    self.assertIs(simple_sbml.getZipReader(path), simple_sbml.getZipReader(path))
+
+  def testDirectorySources(self):
+    if IGNORE_TEST:
+      return
+    directory = tempfile.mkdtemp()
+    try:
+      zip_items = list(simple_sbml.contentIterator(initial=6, final=10,
+          zip_filename="Mammalia.zip"))
+      for item in zip_items:
+        path = os.path.join(directory, item.filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as fd:
+          fd.write(item.content)
+      with open(os.path.join(directory, "notes.txt"), "w") as fd:
+        fd.write("not a model")
+      # the XML files under the directory in sorted order, no zip file needed
+      names = simple_sbml.getDocumentNames(data_dir=directory, zip_filename=None)
+      self.assertEqual(names, sorted(item.filename for item in zip_items))
+      items = list(simple_sbml.contentIterator(initial=1, final=3,
+          data_dir=directory, zip_filename=None))
+      self.assertEqual([item.number for item in items], [1, 2])
+      self.assertEqual([item.filename for item in items], names[1:3])
+      for item in items:
+        self.assertTrue(isinstance(item.content, bytes))
+      # glob pattern
+      pattern = os.path.join("*", "*" + os.path.basename(names[0])[-8:])
+      items = list(simple_sbml.contentIterator(data_dir=directory, zip_filename=None,
+          pattern=pattern))
+      self.assertEqual([item.filename for item in items], names[0:1])
+      # list of files, in the given order
+      filenames = [os.path.join(directory, names[2]), names[0]]
+      items = list(simple_sbml.modelIterator(data_dir=directory, zip_filename=None,
+          filenames=filenames))
+      self.assertEqual([item.filename for item in items], filenames)
+      self.assertTrue(all(isinstance(item.model, SimpleSBML) for item in items))
+    finally:
+      shutil.rmtree(directory)
+
   def testGetZipfilePath(self):
     if IGNORE_TEST:
       return
@@ -44,6 +44,22 @@ class TestFunctions(unittest.TestCase):
       except ValueError:
         pass
 
+  def testIsXMLString(self):
+    self.assertTrue(util.isXMLString('<?xml version="1.0"?><sbml/>'))
+    self.assertTrue(util.isXMLString('\ufeff\n  <sbml/>'))
+    self.assertTrue(util.isXMLString(b'\xef\xbb\xbf<sbml/>'))
+    self.assertTrue(util.isXMLString(memoryview(b' <sbml/>')))
+    self.assertFalse(util.isXMLString(cn.TEST_FILE2))
+    self.assertFalse(util.isXMLString(b"model.xml"))
+
+  def testGetXMLBytes(self):
+    xml = '<?xml version="1.0"?><sbml/>'
+    for model_reference in [xml, xml.encode("utf-8"), bytearray(xml.encode("utf-8")),
+        memoryview(xml.encode("utf-8"))]:
+      self.assertEqual(util.getXML(model_reference), xml)
+    with self.assertRaises(ValueError):
+      util.getXML(b"S1 -> S2; k1*S1")
+
   def testIsInt(self):
     self.assertTrue(util.isInt(1))
     self.assertFalse(util.isInt(1.5))